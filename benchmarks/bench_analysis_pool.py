@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark : analyse des pages dans les threads de scan (GIL) ou dans un
+pool de processus (AnalysisPool).
+
+ - aller-retour : latence d'une page seule, sur place vs dans le pool,
+   selon la taille de la page (sert à régler ANALYSIS_POOL_MIN_BYTES)
+ - débit : pages/s sur le corpus synthétique de bench_suite, avec 16
+   threads sur place, puis un pool de 1 à 16 processus (2 threads
+   d'envoi par processus) ; le gain n'apparaît qu'avec autant de cœurs
+
+Usage : python benchmarks/bench_analysis_pool.py [--pages N] [--processes 1,2,4,8,16]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_suite import build_corpus  # noqa: E402
+from rgpd.analysis import analyze_page, warm_up_analysis  # noqa: E402
+from rgpd.engine import AnalysisPool  # noqa: E402
+
+
+def best_latency(func, body, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(body, None, False)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def throughput(func, bodies, threads):
+    """Pages analysées par seconde avec `threads` appels simultanés."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda body: func(body, None, False), bodies))
+    return len(bodies) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse sur place vs pool de processus.")
+    parser.add_argument("--pages", type=int, default=60, help="pages du corpus synthétique")
+    parser.add_argument("--processes", default="1,2,4,8,16", help="tailles de pool mesurées")
+    args = parser.parse_args()
+
+    bodies = [site["html"].decode("utf-8") for site in build_corpus(args.pages)]
+    print("Corpus : %d pages, %.1f Mo ; %d cœurs disponibles"
+          % (len(bodies), sum(map(len, bodies)) / 1e6, os.cpu_count() or 1))
+    warm_up_analysis()
+
+    pool = AnalysisPool(processes=1, min_bytes=0)
+    pool.warm_up()
+    try:
+        for size_kb in (2, 8, 32, 128, 512):
+            # Page du corpus ramenée à la taille voulue (HTML tronqué, toujours analysable)
+            body = next((b for b in sorted(bodies, key=len) if len(b) >= size_kb * 1024), bodies[-1])
+            body = body[:size_kb * 1024]
+            print("Aller-retour, page de %4d Ko : sur place %7.2f ms | pool %7.2f ms"
+                  % (len(body) // 1024, best_latency(analyze_page, body), best_latency(pool.analyze, body)))
+    finally:
+        pool.shutdown()
+
+    inline = throughput(analyze_page, bodies, 16)
+    print("Sur place, 16 threads      : %6.1f pages/s" % inline)
+    for processes in (int(n) for n in args.processes.split(",")):
+        pool = AnalysisPool(processes=processes, min_bytes=0)
+        pool.warm_up()
+        try:
+            rate = throughput(pool.analyze, bodies, processes * 2)
+        finally:
+            pool.shutdown()
+        print("Pool de %2d processus       : %6.1f pages/s (x%.2f)" % (processes, rate, rate / inline))
+
+
+if __name__ == "__main__":
+    main()
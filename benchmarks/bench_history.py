@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark : requêtes sur un historique d'analyses volumineux (ScanHistory).
+
+La base est remplie directement en SQL (nb_domaines x nb_analyses lignes,
+une analyse par jour), puis on mesure :
+ - l'historique des scores d'un domaine
+ - les domaines dont le score a baissé sur les 7 derniers jours
+ - l'enregistrement d'une nouvelle analyse
+
+Usage : python benchmarks/bench_history.py [nb_domaines] [nb_analyses]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rgpdbot2  # noqa: E402
+
+DAY = 86400
+
+
+def populate(history, domains, scans_per_domain, now):
+    db = history._connect()
+    rng = random.Random(42)
+    result = {"https_status": True, "privacy_policy": "/privacy", "cookie_banner": True,
+              "legal_mentions": "/legal", "cookies": [], "gdpr_score": 100}
+    for d in range(domains):
+        url = "https://site-%d.example" % d
+        scores = [rng.choice((50, 75, 100)) for _ in range(scans_per_domain)]
+        domain_id = db.execute(
+            "INSERT INTO domains (url, last_scanned_at, last_score, last_hash, last_result)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (url, now - DAY, scores[-1], "h", json.dumps(dict(result, gdpr_score=scores[-1]))),
+        ).lastrowid
+        db.executemany(
+            "INSERT INTO scans (domain_id, scanned_at, gdpr_score, content_hash, changes)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [
+                (domain_id, now - (scans_per_domain - i) * DAY, score, "h",
+                 json.dumps({"gdpr_score": score}))
+                for i, score in enumerate(scores)
+            ],
+        )
+    db.commit()
+
+
+def timed(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, value
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Requêtes sur un historique d'analyses volumineux.")
+    parser.add_argument("domains", nargs="?", type=int, default=10000, help="domaines de l'historique")
+    parser.add_argument("scans_per_domain", nargs="?", type=int, default=100, help="analyses par domaine")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    domains = args.domains
+    scans_per_domain = args.scans_per_domain
+    now = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        history = rgpdbot2.ScanHistory(os.path.join(tmp, "history.sqlite3"))
+        start = time.perf_counter()
+        populate(history, domains, scans_per_domain, now)
+        print("%d lignes insérées en %.1f s" % (domains * scans_per_domain, time.perf_counter() - start))
+
+        url = "https://site-%d.example" % (domains // 2)
+        ms, rows = timed(lambda: history.score_history(url))
+        print("Historique d'un domaine (%d points)     : %7.2f ms" % (len(rows), ms))
+        ms, rows = timed(lambda: history.score_history(url, since=now - 7 * DAY))
+        print("Historique d'un domaine sur 7 jours      : %7.2f ms" % ms)
+        ms, rows = timed(lambda: history.score_drops(now - 7 * DAY), repeat=3)
+        print("Scores en baisse sur 7 jours (%d domaines) : %7.2f ms" % (len(rows), ms))
+        ms, _ = timed(lambda: history.record(url, {"gdpr_score": 75, "cookie_banner": False}), repeat=20)
+        print("Enregistrement d'une analyse             : %7.2f ms" % ms)
+        history._db.close()
+
+
+if __name__ == "__main__":
+    main()
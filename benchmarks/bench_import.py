@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark : temps d'import (démarrage à froid d'un processus).
+
+Chaque import est mesuré dans un nouvel interpréteur, hors démarrage de
+Python lui-même (meilleur temps sur N lancements) :
+ - rgpd.analysis : worker d'analyse (pas de requests, bs4 / langdetect différés)
+ - rgpd.engine   : batch / worker de scan (réseau, cache, historique)
+ - rgpd.report   : rendu des rapports seul
+ - rgpdbot2      : module complet (tout le paquet ; telegram reste différé)
+ - avec --before REV : rgpdbot2 tel qu'il était à la révision git REV
+   (module unique, avant le découpage)
+Le coût reporté au premier usage (parsing, profils langdetect, signatures
+de traceurs) est mesuré à part.
+
+Usage : python benchmarks/bench_import.py [--runs N] [--before REV]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ("rgpd.config", "rgpd.analysis", "rgpd.engine", "rgpd.report", "rgpdbot2")
+
+FIRST_USE = """
+import time
+start = time.perf_counter()
+import rgpd.analysis as a
+imported = time.perf_counter()
+page = a.PageAnalysis("<html><body><a href='/p'>Politique de confidentialité</a></body></html>")
+a.page_findings(page, a.detect_site_language(page.html))
+a.preload_language_profiles()
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def best_time(code, cwd, runs):
+    """Meilleur temps (s) de `code` mesuré dans l'interpréteur lancé à froid."""
+    probe = "import time; _t = time.perf_counter(); %s; print(time.perf_counter() - _t)" % code
+    best = None
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", probe], cwd=cwd, check=True,
+                             capture_output=True, text=True).stdout
+        elapsed = float(out.split()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def export_revision(rev):
+    """Copie de rgpdbot2.py (et trackers.txt s'il existe) à la révision `rev`."""
+    tmp = tempfile.mkdtemp(prefix="rgpd_import_")
+    for name in ("rgpdbot2.py", "trackers.txt", "imghdr.py"):
+        try:
+            data = subprocess.run(["git", "show", "%s:%s" % (rev, name)], cwd=ROOT, check=True,
+                                  capture_output=True).stdout
+        except subprocess.CalledProcessError:
+            continue
+        with open(os.path.join(tmp, name), "wb") as f:
+            f.write(data)
+    return tmp
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps d'import des modules du bot.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--before", metavar="REV", help="révision git à comparer (ex: HEAD~1)")
+    args = parser.parse_args()
+
+    for module in MODULES:
+        ms = best_time("import %s" % module, ROOT, args.runs) * 1000
+        print("%-14s %7.1f ms" % (module, ms))
+
+    if args.before:
+        tmp = export_revision(args.before)
+        try:
+            ms = best_time("import rgpdbot2", tmp, args.runs) * 1000
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        print("%-14s %7.1f ms  (rgpdbot2 à %s)" % ("avant", ms, args.before))
+
+    out = subprocess.run([sys.executable, "-c", FIRST_USE], cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout.split()
+    print("Premier usage de rgpd.analysis : import %.1f ms, puis %.1f ms à la première page "
+          "(bs4, mots-clés, signatures, profils langdetect)" % (float(out[0]) * 1000, float(out[1]) * 1000))
+
+
+if __name__ == "__main__":
+    main()
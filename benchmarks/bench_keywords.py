@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Microbenchmarks de la détection de mots-clés (politique, mentions, bandeau)
+sur des DOM synthétiques volumineux et profondément imbriqués.
+
+ - "naïf"  : chaque <script>/<div> est recopié et mis en minuscules
+             (les <div> imbriqués recopient plusieurs fois le même texte),
+             puis testé mot-clé par mot-clé ; liens x mots-clés en double boucle
+ - "compilé" : textes extraits une fois (PageAnalysis) + KeywordMatcher
+
+Aucun mot-clé n'est présent dans la page : c'est le pire cas (tout est parcouru).
+
+Usage : python benchmarks/bench_keywords.py [profondeur] [largeur] [répétitions]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import rgpdbot2  # noqa: E402
+
+
+def build_dom(depth, width):
+    """`width` arbres de <div> imbriqués sur `depth` niveaux, avec texte et liens."""
+    block = "".join(
+        "<div class='l%d'>Texte du niveau %d sans rien de particulier <a href='/n%d'>lien %d</a>"
+        % (level, level, level, level)
+        for level in range(depth)
+    ) + "</div>" * depth
+    scripts = "<script>var app = {route: '/home', items: [1, 2, 3]};</script>" * width
+    return "<html lang='fr'><body>%s%s</body></html>" % (block * width, scripts)
+
+
+def naive(soup, site_lang):
+    found = []
+    for key in ("privacy_keywords", "legal_keywords"):
+        keywords = rgpdbot2.get_site_keywords(site_lang, key)
+        for link in soup.find_all("a", href=True):
+            link_text = link.text.lower()
+            if any(kw in link_text for kw in keywords):
+                found.append(link["href"])
+                break
+    keywords = rgpdbot2.get_site_keywords(site_lang, "cookie_keywords")
+    for element in soup.find_all(["script", "div"]):
+        if any(kw in element.text.lower() for kw in keywords):
+            found.append(True)
+            break
+    return found
+
+
+def compiled(page, site_lang):
+    return [
+        rgpdbot2.check_privacy_policy(page, site_lang),
+        rgpdbot2.check_legal_mentions(page, site_lang),
+        rgpdbot2.check_cookie_banner(page, site_lang),
+    ]
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Détection de mots-clés sur des DOM synthétiques.")
+    parser.add_argument("depth", nargs="?", type=int, default=40, help="profondeur d'imbrication des <div>")
+    parser.add_argument("width", nargs="?", type=int, default=100, help="<div> par niveau")
+    parser.add_argument("repeat", nargs="?", type=int, default=3, help="répétitions")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    depth = args.depth
+    width = args.width
+    repeat = args.repeat
+    html = build_dom(depth, width)
+    soup = BeautifulSoup(html, rgpdbot2.HTML_PARSER)
+    page = rgpdbot2.PageAnalysis(html)
+    print("DOM : %d <div> (profondeur %d), %.1f Ko" % (depth * width, depth, len(html) / 1024))
+
+    for site_lang in ("fr", "other"):
+        naive_ms = timed(lambda: naive(soup, site_lang), repeat)
+        extract_ms = timed(lambda: rgpdbot2.PageAnalysis(html), repeat)
+        match_ms = timed(lambda: compiled(page, site_lang), repeat)
+        print("[%s] naïf : %.1f ms | compilé : %.2f ms de recherche (+ %.1f ms d'extraction "
+              "partagée avec les autres vérifications)" % (site_lang, naive_ms, match_ms, extract_ms))
+
+    # Recherche seule sur les textes déjà extraits : any(kw in ...) vs automate
+    # compilé, en faisant croître la liste (ex: nombreuses langues, signatures)
+    blobs = page.text_blobs * 5
+    base = rgpdbot2.get_site_keywords("other", "cookie_keywords")
+    for factor in (1, 10, 100):
+        keywords = base + ["%s %d" % (kw, i) for i in range(factor - 1) for kw in base]
+        matcher = rgpdbot2.KeywordMatcher(keywords)
+        loop_ms = timed(lambda: any(any(kw in t for kw in keywords) for t in blobs), repeat)
+        regex_ms = timed(lambda: any(matcher.search(t) for t in blobs), repeat)
+        print("Recherche seule (%d textes, %4d mots-clés) : boucle %7.1f ms | KeywordMatcher %6.1f ms"
+              % (len(blobs), len(keywords), loop_ms, regex_ms))
+
+if __name__ == "__main__":
+    main()
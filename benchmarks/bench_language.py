@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark : détection de la langue d'un site.
+
+ - "avant" : parsing BeautifulSoup complet, get_text() sur toute la page,
+             puis langdetect.detect() sur les 1000 premiers caractères
+ - "après" : Content-Language / <html lang> lus dans le HTML brut, sinon
+             extrait de texte visible (arrêt dès 1000 caractères) et
+             langdetect préchargé ; "chaud" = même page déjà vue (cache)
+
+Pages : langue déclarée, et page sans déclaration avec beaucoup de JS inline.
+
+Usage : python benchmarks/bench_language.py [ko_de_js] [répétitions]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from langdetect import detect  # noqa: E402
+
+import rgpdbot2  # noqa: E402
+
+TEXT = {
+    "fr": "Nous utilisons des cookies pour améliorer votre expérience sur notre site. ",
+    "de": "Wir verwenden Cookies, um Ihre Erfahrung auf unserer Website zu verbessern. ",
+    "es": "Utilizamos cookies para mejorar su experiencia en nuestro sitio web. ",
+}
+
+
+def build_page(lang, js_kb, declared):
+    script = "<script>var data = [%s];</script>" % ",".join(["1234567"] * (js_kb * 128))
+    paragraphs = "".join("<p>%s</p>" % (TEXT[lang] * 3) for _ in range(200))
+    lang_attr = " lang='%s'" % lang if declared else ""
+    return "<html%s><head>%s</head><body>%s</body></html>" % (lang_attr, script, paragraphs)
+
+
+def before(html):
+    soup = BeautifulSoup(html, rgpdbot2.HTML_PARSER)
+    html_tag = soup.find("html")
+    if html_tag and html_tag.get("lang"):
+        return html_tag.get("lang")
+    return detect(soup.get_text(separator=" ", strip=True)[:1000])
+
+
+def after_cold(html):
+    rgpdbot2.language_cache.clear()
+    return rgpdbot2.detect_site_language(html)
+
+
+def timed(func, html, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Détection de la langue d'un site.")
+    parser.add_argument("js_kb", nargs="?", type=int, default=500, help="Ko de JS inline de la page sans déclaration")
+    parser.add_argument("repeat", nargs="?", type=int, default=5, help="répétitions")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    js_kb = args.js_kb
+    repeat = args.repeat
+
+    start = time.perf_counter()
+    rgpdbot2.preload_language_profiles()
+    print("Chargement des profils langdetect : %.0f ms (une fois au démarrage)"
+          % ((time.perf_counter() - start) * 1000))
+    detect("warm up")  # profils du chemin "avant" chargés hors mesure
+
+    for lang in TEXT:
+        for declared in (True, False):
+            html = build_page(lang, js_kb, declared)
+            rgpdbot2.detect_site_language(html)
+            print("[%s, %s, %.0f Ko] avant : %7.1f ms | après : %6.2f ms | après (cache) : %6.2f ms -> %s"
+                  % (lang, "lang déclarée" if declared else "sans lang", len(html) / 1024,
+                     timed(before, html, repeat), timed(after_cold, html, repeat),
+                     timed(rgpdbot2.detect_site_language, html, repeat),
+                     rgpdbot2.detect_site_language(html)))
+
+
+if __name__ == "__main__":
+    main()
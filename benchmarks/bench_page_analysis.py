@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark : temps CPU par domaine de l'analyse d'une page lourde.
+
+ - "avant" : la page est parsée quatre fois (langue, politique, mentions, bandeau),
+   comme le faisait scan_domains avant le modèle PageAnalysis
+ - "après" : un seul parsing (PageAnalysis) partagé par toutes les vérifications
+
+Usage : python benchmarks/bench_page_analysis.py [taille_js_ko] [répétitions]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import rgpdbot2  # noqa: E402
+
+
+def build_heavy_page(js_kb=1500, blocks=400):
+    """Landing page synthétique : beaucoup de JS inline et de <div> imbriqués."""
+    js_line = "var tracker_%d = function(a, b) { return a + b * 42; };\n"
+    js = "".join(js_line % i for i in range(js_kb * 1024 // len(js_line % 0)))
+    body = []
+    for i in range(blocks):
+        body.append(
+            "<div class='row'><div class='col'><p>Bloc %d</p>"
+            "<a href='/page-%d'>Lien %d</a></div></div>" % (i, i, i)
+        )
+    body.append("<div id='cookie'>Nous utilisons des cookies. Consentement ?</div>")
+    body.append("<footer><a href='/privacy'>Politique de confidentialité</a>"
+                "<a href='/mentions'>Mentions légales</a></footer>")
+    return (
+        "<html lang='fr'><head><script>%s</script></head><body>%s</body></html>"
+        % (js, "".join(body))
+    )
+
+
+def analyse_before(html):
+    """Ancien chemin : un BeautifulSoup(html.parser) par vérification."""
+    soup = BeautifulSoup(html, "html.parser")
+    html_tag = soup.find("html")
+    site_lang = html_tag["lang"] if html_tag and html_tag.has_attr("lang") else "other"
+    for key in ("privacy_keywords", "legal_keywords"):
+        soup = BeautifulSoup(html, "html.parser")
+        keywords = rgpdbot2.get_site_keywords(site_lang, key)
+        for link in soup.find_all("a", href=True):
+            link_text = link.text.lower()
+            if any(kw in link_text for kw in keywords):
+                break
+    soup = BeautifulSoup(html, "html.parser")
+    keywords = rgpdbot2.get_site_keywords(site_lang, "cookie_keywords")
+    for element in soup.find_all(["script", "div"]):
+        if any(kw in element.text.lower() for kw in keywords):
+            break
+
+
+def analyse_after(html):
+    """Nouveau chemin : un seul PageAnalysis partagé."""
+    page = rgpdbot2.PageAnalysis(html)
+    site_lang = rgpdbot2.detect_site_language(html)
+    rgpdbot2.check_privacy_policy(page, site_lang)
+    rgpdbot2.check_legal_mentions(page, site_lang)
+    rgpdbot2.check_cookie_banner(page, site_lang)
+
+
+def cpu_time(func, html, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        func(html)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse d'une page lourde : quatre parsings vs PageAnalysis.")
+    parser.add_argument("js_kb", nargs="?", type=int, default=1500, help="Ko de JS inline de la page")
+    parser.add_argument("repeat", nargs="?", type=int, default=3, help="répétitions")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    js_kb = args.js_kb
+    repeat = args.repeat
+    html = build_heavy_page(js_kb)
+    print("Page : %.2f Mo, parser : %s" % (len(html) / 1e6, rgpdbot2.HTML_PARSER))
+    before = cpu_time(analyse_before, html, repeat)
+    after = cpu_time(analyse_after, html, repeat)
+    print("Avant  (4 parsings) : %.1f ms CPU / domaine" % (before * 1000))
+    print("Après  (1 parsing)  : %.1f ms CPU / domaine" % (after * 1000))
+    print("Gain               : x%.2f" % (before / after if after else float("inf")))
+
+
+if __name__ == "__main__":
+    main()
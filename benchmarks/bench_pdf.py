@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark : rendu du PDF par backend (PDF_BACKENDS de rgpd.report).
+
+ - "reportlab"   : rendu dans le processus, polices chargées une fois
+ - "wkhtmltopdf" : un processus WebKit lancé par rapport (via pdfkit)
+
+Chaque backend est mesuré dans un processus neuf (mémoire non partagée) :
+création et préparation du backend (warm_up : imports, polices), premier
+rapport, puis latence médiane d'un rapport de 1, 10 et 50 domaines.
+Mémoire : pic RSS du processus au-delà de son niveau après import de
+rgpd.report, et pic RSS des processus fils (wkhtmltopdf). Un backend
+indisponible est signalé.
+
+Usage : python benchmarks/bench_pdf.py [répétitions] [backend...]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_report import build_results  # noqa: E402
+from rgpd import report  # noqa: E402
+
+SIZES = (1, 10, 50)
+
+
+def rss_kb(who=resource.RUSAGE_SELF):
+    rss = resource.getrusage(who).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # octets sous macOS
+
+
+def run_backend(name, repeat):
+    """Mesures d'un backend, dans le processus courant (lancé par main)."""
+    base_rss = rss_kb()
+    start = time.perf_counter()
+    try:
+        backend = report.PDF_BACKENDS[name]()
+        backend.warm_up()
+    except (ImportError, OSError) as exc:
+        return {"backend": name, "skipped": str(exc).splitlines()[0]}
+    init_ms = (time.perf_counter() - start) * 1000
+
+    models = {n: report.build_report_model(list(r), r, "fr") for n, r in
+              ((n, build_results(n)) for n in SIZES)}
+    start = time.perf_counter()
+    report.generate_gdpr_report(models[10], backend)
+    first_ms = (time.perf_counter() - start) * 1000
+
+    latencies = {}
+    sizes = {}
+    for n, model in models.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            _, pdf_bytes = report.generate_gdpr_report(model, backend)
+            timings.append((time.perf_counter() - start) * 1000)
+        latencies[n] = statistics.median(timings)
+        sizes[n] = len(pdf_bytes)
+    return {
+        "backend": name, "init_ms": init_ms, "first_ms": first_ms, "p50_ms": latencies,
+        "pdf_bytes": sizes, "rss_delta_kb": rss_kb() - base_rss,
+        "children_rss_kb": rss_kb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rendu du PDF par backend.")
+    parser.add_argument("repeat", nargs="?", type=int, default=10, help="répétitions par taille de rapport")
+    parser.add_argument("backends", nargs="*", metavar="backend",
+                        help="backends mesurés (défaut : tous, parmi %s)" % ", ".join(report.PDF_BACKENDS))
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.backends if name not in report.PDF_BACKENDS]
+    if unknown:
+        parser.error("backend inconnu : %s" % ", ".join(unknown))
+    return args
+
+
+def main():
+    # Mesure d'un backend dans un processus neuf (lancé ci-dessous)
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        print(json.dumps(run_backend(sys.argv[2], int(sys.argv[3]))))
+        return
+
+    args = parse_args()
+    repeat = args.repeat
+    names = args.backends or list(report.PDF_BACKENDS)
+    for name in names:
+        out = subprocess.check_output([sys.executable, os.path.abspath(__file__), "--child", name, str(repeat)])
+        r = json.loads(out.decode().strip().splitlines()[-1])
+        if "skipped" in r:
+            print("%-12s indisponible : %s" % (name, r["skipped"]))
+            continue
+        print("%-12s création %6.1f ms | premier rapport %6.1f ms | %s"
+              % (name, r["init_ms"], r["first_ms"],
+                 " | ".join("%s dom. %7.1f ms (%d Ko)" % (n, ms, r["pdf_bytes"][n] // 1024)
+                            for n, ms in r["p50_ms"].items())))
+        print("%-12s mémoire : +%d Ko dans le processus, pic des processus fils %d Ko"
+              % ("", r["rss_delta_kb"], r["children_rss_kb"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark : rapport PDF d'un portefeuille de domaines (rgpd_batch --report).
+
+Pour chaque taille de portefeuille, un fichier JSONL de résultats
+synthétiques est écrit puis rendu en PDF dans un processus neuf : durée,
+pic RSS au-delà du niveau après imports (le PDF est écrit sur disque au
+fil du rendu), taille du PDF, et découpage du texte Telegram (nombre de
+messages, plus long message). Le pic RSS doit rester à peu près constant
+quand le nombre de domaines augmente.
+
+Usage : python benchmarks/bench_portfolio_report.py [nb_domaines...]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rgpd_batch  # noqa: E402
+from bench_report import build_results  # noqa: E402
+from rgpd import report  # noqa: E402
+
+
+def rss_kb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # octets sous macOS
+
+
+def run_report(results_path, pdf_path):
+    """Mesures d'un rapport, dans le processus courant (lancé par main)."""
+    report.get_pdf_backend().warm_up()
+    base_rss = rss_kb()
+    start = time.perf_counter()
+    count = rgpd_batch.write_report(pdf_path, results_path, "fr")
+    elapsed = time.perf_counter() - start
+    results = rgpd_batch.JsonlResults(results_path)
+    model = report.build_report_model((d for d, _ in results.items()), results, "fr")
+    sizes = [len(text) for text in report.render_report_messages(model)]
+    return {
+        "domains": count, "seconds": elapsed, "rss_delta_kb": rss_kb() - base_rss,
+        "pdf_kb": os.path.getsize(pdf_path) // 1024, "messages": len(sizes), "longest": max(sizes),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rapport PDF d'un portefeuille de domaines.")
+    parser.add_argument("counts", nargs="*", type=int, metavar="nb_domaines",
+                        help="tailles de portefeuille mesurées (défaut : 100 1000 3000)")
+    return parser.parse_args(argv)
+
+
+def main():
+    # Mesure d'un rapport dans un processus neuf (lancé ci-dessous)
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        print(json.dumps(run_report(sys.argv[2], sys.argv[3])))
+        return
+
+    counts = parse_args().counts or [100, 1000, 3000]
+    try:
+        backend = report.get_pdf_backend()
+    except (ImportError, OSError) as exc:
+        print("Rendu PDF indisponible (%s) : benchmark ignoré" % str(exc).splitlines()[0])
+        return
+    print("Backend PDF : %s" % backend.name)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for count in counts:
+            results_path = os.path.join(tmp_dir, "results.jsonl")
+            with open(results_path, "w", encoding="utf-8") as f:
+                for domain, result in build_results(count).items():
+                    f.write(json.dumps({"domain": domain, **result}, ensure_ascii=False) + "\n")
+            out = subprocess.check_output([sys.executable, os.path.abspath(__file__), "--child",
+                                           results_path, os.path.join(tmp_dir, "report.pdf")])
+            r = json.loads(out.decode().strip().splitlines()[-1])
+            print("%5d domaines : %6.1f s | pic RSS +%6d Ko | PDF %6d Ko | texte : %d messages (max %d car.)"
+                  % (r["domains"], r["seconds"], r["rss_delta_kb"], r["pdf_kb"], r["messages"], r["longest"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark : génération d'un rapport (modèle + HTML du PDF + texte Telegram).
+
+Le rendu du PDF n'est pas inclus (voir bench_pdf.py) : seul le coût de
+construction du rapport à partir des gabarits précompilés est mesuré.
+
+Usage : python benchmarks/bench_report.py [nb_domaines] [répétitions]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rgpdbot2  # noqa: E402
+
+
+def build_results(count):
+    """Résultats synthétiques : un mélange d'analyses réussies, en cache et en erreur."""
+    results = {}
+    for i in range(count):
+        domain = "site-%d.example" % i
+        if i % 10 == 9:
+            results[domain] = {"error": rgpdbot2.messages["fr"]["domain_inaccessible"]}
+            continue
+        results[domain] = {
+            "https_status": i % 3 != 0,
+            "privacy_policy": "/privacy" if i % 2 else None,
+            "cookie_banner": i % 4 != 0,
+            "legal_mentions": "/legal" if i % 5 else None,
+            "cookies": [{"name": "c%d" % j, "domain": domain} for j in range(i % 6)],
+            "gdpr_score": (i * 15) % 101,
+            "google_analytics": i % 2 == 0,
+            "facebook_pixel": i % 7 == 0,
+            "contact_form": i % 3 == 1,
+            "third_party_trackers": {"Hotjar": True} if i % 4 == 1 else {},
+            "cached": i % 2 == 0,
+            "scanned_at": time.time() - 60 * i,
+        }
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Génération d'un rapport (modèle, HTML, texte Telegram).")
+    parser.add_argument("count", nargs="?", type=int, default=50, help="domaines du rapport")
+    parser.add_argument("repeat", nargs="?", type=int, default=200, help="répétitions")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    count = args.count
+    repeat = args.repeat
+    results = build_results(count)
+    domains = list(results)
+
+    for lang in ("fr", "en"):
+        # Gabarits de la langue construits au premier rapport, hors mesure
+        rgpdbot2.render_report_text(rgpdbot2.build_report_model(domains, results, lang))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            model = rgpdbot2.build_report_model(domains, results, lang)
+            rgpdbot2.render_report_html(model)
+            rgpdbot2.render_report_text(model)
+        elapsed = (time.perf_counter() - start) / repeat
+        print("%s : %d domaines -> %.3f ms / rapport (modèle + PDF HTML + texte)"
+              % (lang, count, elapsed * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark : re-calcul des scores de tout l'historique quand les règles
+changent (rgpd.scoring).
+
+ - colonnes synthétiques de N analyses (constats tirés au hasard) écrites
+   sur disque : taille, durée de chargement
+ - re-calcul des scores et niveaux de risque de toutes les lignes avec les
+   règles par défaut puis des règles modifiées (compare : scores modifiés
+   et changements de niveau), avec numpy s'il est installé, sinon
+   array.array de la bibliothèque standard
+ - référence : même calcul résultat par résultat sur des dicts (comme à
+   l'analyse), mesuré sur un échantillon et ramené au million de lignes
+ - copie de l'historique SQLite vers les colonnes (sync) sur un petit
+   historique synthétique
+
+Usage : python benchmarks/bench_rescoring.py [lignes] [analyses_historique]
+"""
+
+import argparse
+import array
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rgpd import engine, scoring  # noqa: E402
+
+DOMAINS = 50000
+V2_RULES = dict(
+    scoring.DEFAULT_SCORING_RULES, version=2,
+    weights=dict(scoring.DEFAULT_SCORING_RULES["weights"], google_analytics=-15, third_party_trackers=-10),
+    risk_levels=[["ok", 85], ["medium", 65], ["high", 40], ["critical", 0]],
+)
+
+
+def random_result(rng):
+    if rng.random() < 0.05:
+        return {"error": "timeout"}
+    return {
+        "https_status": rng.random() < 0.9,
+        "privacy_policy": "/privacy" if rng.random() < 0.7 else None,
+        "cookie_banner": rng.random() < 0.5,
+        "legal_mentions": "/mentions" if rng.random() < 0.6 else None,
+        "cookies": [{"name": "_ga"}] if rng.random() < 0.6 else [],
+        "google_analytics": rng.random() < 0.4,
+        "facebook_pixel": rng.random() < 0.2,
+        "contact_form": rng.random() < 0.5,
+        "third_party_trackers": {"Hotjar": 1} if rng.random() < 0.3 else {},
+    }
+
+
+def write_columns(directory, rows):
+    """Colonnes de `rows` analyses au format de ResultColumns, écrites directement."""
+    rng = random.Random(1)
+    rules = scoring.ScoringRules(scoring.DEFAULT_SCORING_RULES)
+    masks = [scoring.feature_mask(random_result(rng)) for _ in range(4096)]
+    os.makedirs(directory, exist_ok=True)
+    chunk = 1 << 18
+    files = {name: open(os.path.join(directory, name + ".bin"), "wb") for name in scoring.RESULT_COLUMNS}
+    latest = array.array("H", [0] * DOMAINS)
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        domain = array.array("I", (rng.randrange(DOMAINS) for _ in range(n)))
+        features = array.array("H", (masks[rng.randrange(4096)] for _ in range(n)))
+        columns = {
+            "domain": domain,
+            "scanned_at": array.array("d", range(start, start + n)),
+            "features": features,
+            "score": array.array("h", map(rules.score_table.__getitem__, features)),
+            "scoring_version": array.array("H", [1]) * n,
+        }
+        for name, column in columns.items():
+            column.tofile(files[name])
+        for i, mask in zip(domain, features):
+            latest[i] = mask
+    for f in files.values():
+        f.close()
+    latest_columns = {
+        "features": latest,
+        "score": array.array("h", map(rules.score_table.__getitem__, latest)),
+        "scoring_version": array.array("H", [1]) * DOMAINS,
+    }
+    for name, column in latest_columns.items():
+        with open(os.path.join(directory, "latest_%s.bin" % name), "wb") as f:
+            column.tofile(f)
+    with open(os.path.join(directory, "domains.txt"), "w", encoding="utf-8") as f:
+        f.writelines("https://d%d.example\n" % i for i in range(DOMAINS))
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+        f.write('{"rows": %d, "domains": %d, "last_scan_id": 0}' % (rows, DOMAINS))
+
+
+def dict_baseline(sample=200000):
+    """Secondes par million de résultats, calcul sur des dicts (ScoringRules.score)."""
+    rng = random.Random(2)
+    results = [random_result(rng) for _ in range(sample)]
+    rules = scoring.ScoringRules(V2_RULES)
+    start = time.perf_counter()
+    for result in results:
+        rules.risk_index(rules.score(result))
+    return (time.perf_counter() - start) * 1e6 / sample
+
+
+def bench_sync(scans):
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        history = engine.ScanHistory(os.path.join(tmp_dir, "history.sqlite3"))
+        rules = scoring.get_scoring_rules()
+        for n in range(scans):
+            result = random_result(rng)
+            if "error" not in result:
+                result = dict(result, gdpr_score=rules.score(result), scoring_version=rules.version)
+            history.record("https://d%d.example" % rng.randrange(1000), result, scanned_at=n)
+        start = time.perf_counter()
+        added = scoring.ResultColumns(os.path.join(tmp_dir, "columns")).sync(history)
+        return added, time.perf_counter() - start
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Re-calcul des scores de l'historique en colonnes.")
+    parser.add_argument("rows", nargs="?", type=int, default=2000000, help="analyses (lignes) des colonnes synthétiques")
+    parser.add_argument("scans", nargs="?", type=int, default=20000, help="analyses de l'historique SQLite copiées")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    rows = args.rows
+    scans = args.scans
+    print("numpy : %s" % ("oui" if scoring._numpy() is not None else "non (array.array)"))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        directory = os.path.join(tmp_dir, "columns")
+        write_columns(directory, rows)
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        start = time.perf_counter()
+        columns = scoring.ResultColumns(directory)
+        load_s = time.perf_counter() - start
+        print("%d analyses, %d domaines : %.1f Mo sur disque, chargement %.2f s"
+              % (rows, DOMAINS, size / 1e6, load_s))
+
+        current = scoring.ScoringRules(scoring.DEFAULT_SCORING_RULES)
+        candidate = scoring.ScoringRules(V2_RULES)
+        for rules in (current, candidate):
+            start = time.perf_counter()
+            columns.rescore(rules)
+            print("Re-calcul (règles v%d)      : %6.2f s" % (rules.version, time.perf_counter() - start))
+        start = time.perf_counter()
+        summary = columns.compare(current, candidate)
+        print("Comparaison v1 -> v2       : %6.2f s (%d scores modifiés, %d domaines changent de niveau)"
+              % (time.perf_counter() - start, summary["scores_changed"],
+                 sum(n for (a, b), n in summary["risk_transitions"].items() if a != b)))
+
+    print("Référence (dicts)          : %6.2f s par million de résultats" % dict_baseline())
+    added, elapsed = bench_sync(scans)
+    print("Copie de l'historique      : %d analyses en %.2f s (%.0f analyses/s)"
+          % (added, elapsed, added / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+"""
+Suite de benchmarks reproductible de rgpdbot2.
+
+Un corpus de pages (synthétiques, plus d'éventuelles pages capturées
+fournies avec --corpus) est servi par un serveur HTTP local. On mesure :
+ - "pipeline" : analyse complète d'un domaine (téléchargement, parsing,
+   vérifications, score), avec --concurrency analyses en parallèle
+ - chaque étape isolément, sur les pages déjà téléchargées : parsing
+   (PageAnalysis), detect_site_language, check_cookie_banner,
+   detect_third_party_trackers, rendu HTML du rapport et generate_gdpr_report
+   (avec le backend PDF configuré, ignoré s'il est indisponible)
+
+Pour chaque mesure : débit, latences p50/p95/p99 ; plus le pic RSS du
+processus. Les résultats sont écrits en JSON (--output) et peuvent être
+comparés à ceux d'un autre commit (--compare).
+
+Le corpus synthétique varie : taille de page, profondeur du DOM, densité
+de traceurs, langue (fr, en, de), cookies déposés (directement ou au
+travers d'une redirection). Il est généré avec une graine fixe.
+
+Usage :
+    python benchmarks/bench_suite.py -o bench.json
+    python benchmarks/bench_suite.py --pages 200 --compare bench_precedent.json
+"""
+
+import argparse
+import datetime
+import http.server
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rgpdbot2  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TEXTS = {
+    "fr": ("Bienvenue sur notre site. Nous proposons des services de qualité à nos clients.",
+           "Politique de confidentialité", "Mentions légales",
+           "Nous utilisons des cookies pour améliorer votre expérience. Consentement"),
+    "en": ("Welcome to our website. We provide quality services to our customers.",
+           "Privacy policy", "Legal notice",
+           "We use cookies to improve your experience. Consent"),
+    "de": ("Willkommen auf unserer Webseite. Wir bieten unseren Kunden hochwertige Dienste.",
+           "Datenschutzerklärung", "Impressum",
+           "Wir verwenden Cookies, um Ihr Erlebnis zu verbessern."),
+}
+
+TRACKER_SCRIPTS = (
+    "https://www.googletagmanager.com/gtag/js?id=G-BENCH",
+    "https://connect.facebook.net/en_US/fbevents.js",
+    "https://static.hotjar.com/c/hotjar-1.js",
+    "https://stats.g.doubleclick.net/dc.js",
+    "https://snap.licdn.com/li.lms-analytics/insight.min.js",
+    "https://cdn.segment.com/analytics.js",
+    "https://bat.bing.com/bat.js",
+    "https://www.clarity.ms/tag/bench",
+)
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+def build_page(rng, lang, size_kb, depth, trackers, banner):
+    """Page synthétique : texte, <div> imbriqués, liens, scripts de traceurs, JS inline."""
+    intro, privacy, legal, banner_text = TEXTS[lang]
+    head = ["<script src='%s'></script>" % url for url in rng.sample(TRACKER_SCRIPTS, trackers)]
+    body = []
+    block = "".join("<div class='d%d'><p>%s</p>" % (level, intro) for level in range(depth))
+    block += "<a href='/page-%d'>%s</a>" % (rng.randrange(1000), intro[:20]) + "</div>" * depth
+    while sum(map(len, body)) < size_kb * 1024 * 0.7:
+        body.append(block)
+    js = "var state_%d = {items: [1, 2, 3], label: 'bench'};\n"
+    head.append("<script>%s</script>" % "".join(js % i for i in range(int(size_kb * 1024 * 0.3 / 48))))
+    if banner:
+        body.append("<div id='consent-banner'>%s</div>" % banner_text)
+    body.append("<footer><a href='/privacy'>%s</a> <a href='/legal'>%s</a></footer>" % (privacy, legal))
+    return "<html lang='%s'><head>%s</head><body>%s</body></html>" % (lang, "".join(head), "".join(body))
+
+
+def build_corpus(count, seed=1234, captured_dir=None):
+    """Liste de sites : {path, lang, html (octets), cookies, redirect, ...}."""
+    rng = random.Random(seed)
+    sites = []
+    for i in range(count):
+        lang = rng.choice(("fr", "fr", "en", "en", "de"))
+        spec = {
+            "path": "/site-%d/" % i,
+            "lang": lang,
+            "size_kb": rng.choice((20, 80, 250, 800)),
+            "depth": rng.choice((2, 8, 30)),
+            "trackers": rng.randrange(len(TRACKER_SCRIPTS) + 1),
+            "banner": rng.random() < 0.6,
+            "cookies": rng.choice((0, 0, 1, 3, 8)),
+            "redirect": rng.random() < 0.3,
+        }
+        html = build_page(rng, lang, spec["size_kb"], spec["depth"], spec["trackers"], spec["banner"])
+        spec["html"] = html.encode("utf-8")
+        sites.append(spec)
+
+    # Pages capturées (fichiers .html d'un répertoire), servies telles quelles
+    if captured_dir:
+        for name in sorted(os.listdir(captured_dir)):
+            if name.endswith((".html", ".htm")):
+                with open(os.path.join(captured_dir, name), "rb") as f:
+                    sites.append({"path": "/captured-%s/" % name, "lang": "captured", "html": f.read(),
+                                  "cookies": 0, "redirect": False})
+    return sites
+
+
+class CorpusServer:
+    """Serveur HTTP/1.1 (keep-alive) local servant le corpus, dans un thread."""
+
+    def __init__(self, sites):
+        by_path = {site["path"]: site for site in sites}
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                path = self.path
+                if path.endswith("/home"):
+                    path = path[:-len("home")]
+                site = by_path.get(path)
+                if site is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if site["redirect"] and not self.path.endswith("/home"):
+                    # Cookie déposé pendant la redirection, comme beaucoup de CMP / CDN
+                    self.send_response(302)
+                    self.send_header("Location", site["path"] + "home")
+                    self.send_header("Set-Cookie", "redirect_id=1; Path=/")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(site["html"])))
+                for n in range(site["cookies"]):
+                    self.send_header("Set-Cookie", "bench_%d=%d; Path=/; SameSite=Lax" % (n, n))
+                self.end_headers()
+                self.wfile.write(site["html"])
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = "http://127.0.0.1:%d" % self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# ---------------------------------------------------------------------------
+# Mesures
+# ---------------------------------------------------------------------------
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(int(round(p / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies, wall):
+    """Débit et latences (ms) d'une série de mesures."""
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "throughput_per_s": round(len(values) / wall, 2) if wall else None,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else None,
+        "p50_ms": round(percentile(values, 50) * 1000, 3) if values else None,
+        "p95_ms": round(percentile(values, 95) * 1000, 3) if values else None,
+        "p99_ms": round(percentile(values, 99) * 1000, 3) if values else None,
+    }
+
+
+def measure(func, items, repeat=1):
+    """Appelle func(item) pour chaque item (repeat fois) ; renvoie le résumé."""
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            t0 = time.perf_counter()
+            func(item)
+            latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_pipeline(urls, concurrency):
+    """Analyse complète de chaque domaine, `concurrency` à la fois."""
+    latencies = []
+    errors = [0]
+
+    def run(url):
+        t0 = time.perf_counter()
+        result = rgpdbot2.analyze_domain(url, "en")
+        latencies.append(time.perf_counter() - t0)
+        errors[0] += "error" in result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(run, urls))
+    summary = summarize(latencies, time.perf_counter() - start)
+    summary["errors"] = errors[0]
+    summary["concurrency"] = concurrency
+    return summary
+
+
+def fresh_trackers(page):
+    page.trackers = None  # la classification est mémorisée sur la page
+    return rgpdbot2.detect_third_party_trackers(page)
+
+
+def detect_language_cold(body):
+    """Détection de langue sans le cache des résultats de langdetect."""
+    rgpdbot2.language_cache.clear()
+    return rgpdbot2.detect_site_language(body)
+
+
+def pdf_backend():
+    """Backend PDF configuré (PDF_BACKEND), ou None s'il est indisponible ici."""
+    try:
+        return rgpdbot2.get_pdf_backend()
+    except (ImportError, OSError):
+        return None
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # octets sous macOS
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args):
+    sites = build_corpus(args.pages, args.seed, args.corpus)
+    results = {}
+    with CorpusServer(sites) as server:
+        urls = [server.base_url + site["path"] for site in sites]
+
+        # Chauffe (DNS, pool HTTP, imports paresseux) hors mesure
+        rgpdbot2.analyze_domain(urls[0], "en")
+        results["pipeline"] = bench_pipeline(urls, args.concurrency)
+
+        snapshots = [rgpdbot2.fetch_site(url) for url in urls]
+    bodies = [s.body for s in snapshots if s is not None and s.body]
+    pages = [rgpdbot2.PageAnalysis(body) for body in bodies]
+    langs = [rgpdbot2.detect_site_language(body) for body in bodies]
+
+    results["parse"] = measure(rgpdbot2.PageAnalysis, bodies, args.repeat)
+    results["detect_site_language"] = measure(detect_language_cold, bodies, args.repeat)
+    results["check_cookie_banner"] = measure(
+        lambda item: rgpdbot2.check_cookie_banner(*item), list(zip(pages, langs)), args.repeat)
+    results["detect_third_party_trackers"] = measure(fresh_trackers, pages, args.repeat)
+
+    # Rapports de 10 domaines, construits à partir des analyses du corpus
+    analysed = [rgpdbot2.analyze_snapshot(s) for s in snapshots if s is not None and s.body]
+    chunks = [analysed[i:i + 10] for i in range(0, len(analysed), 10)]
+    models = [
+        rgpdbot2.build_report_model(
+            ["site-%d" % n for n in range(len(chunk))],
+            {"site-%d" % n: r for n, r in enumerate(chunk)}, "fr")
+        for chunk in chunks
+    ]
+    results["report_html"] = measure(rgpdbot2.render_report_html, models, args.repeat)
+    backend = pdf_backend()
+    if backend is not None:
+        results["generate_gdpr_report"] = measure(rgpdbot2.generate_gdpr_report, models[:args.pdf_reports])
+        results["generate_gdpr_report"]["backend"] = backend.name
+    else:
+        results["generate_gdpr_report"] = {"skipped": "aucun backend PDF (reportlab absent, wkhtmltopdf introuvable)"}
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "html_parser": rgpdbot2.HTML_PARSER,
+            "pages": len(sites),
+            "corpus_bytes": sum(len(site["html"]) for site in sites),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def compare(current, previous_path):
+    """Écarts de p50 / débit par rapport à un fichier de résultats précédent."""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    print("\nComparaison avec %s (commit %s) :" % (previous_path, previous["meta"].get("commit")))
+    for name, now in current["results"].items():
+        before = previous["results"].get(name)
+        if not before or "p50_ms" not in now or "p50_ms" not in before or not before["p50_ms"]:
+            continue
+        ratio = now["p50_ms"] / before["p50_ms"]
+        flag = "  <-- régression" if ratio > 1.10 else ""
+        print("  %-28s p50 %9.3f -> %9.3f ms (x%.2f)%s" % (name, before["p50_ms"], now["p50_ms"], ratio, flag))
+
+
+def print_results(report):
+    meta = report["meta"]
+    print("Corpus : %d pages, %.1f Mo (commit %s, parser %s)"
+          % (meta["pages"], meta["corpus_bytes"] / 1e6, meta["commit"], meta["html_parser"]))
+    for name, r in report["results"].items():
+        if "skipped" in r:
+            print("  %-28s ignoré : %s" % (name, r["skipped"]))
+            continue
+        print("  %-28s %8.1f /s   p50 %9.3f   p95 %9.3f   p99 %9.3f ms"
+              % (name, r["throughput_per_s"], r["p50_ms"], r["p95_ms"], r["p99_ms"]))
+    print("  Pic RSS : %s Ko" % report["peak_rss_kb"])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de rgpdbot2.")
+    parser.add_argument("--pages", type=int, default=50, help="pages synthétiques du corpus")
+    parser.add_argument("--corpus", help="répertoire de pages HTML capturées à ajouter au corpus")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--concurrency", type=int, default=rgpdbot2.SCAN_MAX_WORKERS)
+    parser.add_argument("--repeat", type=int, default=3, help="répétitions des mesures par étape")
+    parser.add_argument("--pdf-reports", type=int, default=3, help="rapports PDF générés")
+    parser.add_argument("-o", "--output", help="fichier JSON de résultats")
+    parser.add_argument("--compare", help="fichier JSON d'un run précédent")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run_suite(args)
+    print_results(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
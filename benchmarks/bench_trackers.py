@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark : classification des traceurs d'une page avec une base de
+signatures volumineuse (trackers.txt + signatures synthétiques).
+
+ - "naïf"    : une recherche de sous-chaîne par signature dans tout le HTML
+ - "compilé" : TrackerDatabase (trie des domaines ; JS inline : préfiltre
+               des TLD puis trie, regex combinée des motifs "script:"),
+               sur une PageAnalysis déjà construite
+
+Usage : python benchmarks/bench_trackers.py [nb_signatures] [nb_ressources] [répétitions]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rgpdbot2  # noqa: E402
+
+
+def build_signatures(count):
+    with open(rgpdbot2.TRACKER_DB_PATH, encoding="utf-8") as f:
+        signatures = list(rgpdbot2.TrackerDatabase.parse(f))
+    # Proportions d'une liste réelle (EasyPrivacy, trackers.txt) : surtout des
+    # domaines, des domaines avec chemin, de rares motifs de JS inline
+    for i in range(max(count - len(signatures), 0)):
+        if i % 100 == 99:
+            signatures.append(("Synthetic %d" % i, "analytics", "script:_trk%d.push(" % i))
+        elif i % 10 == 8:
+            signatures.append(("Synthetic %d" % i, "advertising", "ads%d.example/pixel" % i))
+        else:
+            signatures.append(("Synthetic %d" % i, "tracking", "t%d.metrics-%d.example" % (i, i % 97)))
+    return signatures
+
+
+def build_page(resources):
+    """Page typique : beaucoup de ressources du site, quelques traceurs, du JS inline."""
+    tags = []
+    for i in range(resources):
+        if i % 50 == 0:
+            tags.append("<script src='https://t%d.metrics-%d.example/t.js'></script>" % (i, i % 97))
+        elif i % 3 == 0:
+            tags.append("<img src='/static/img/%d.png'>" % i)
+        elif i % 3 == 1:
+            tags.append("<a href='https://www.site.example/page-%d'>Lien</a>" % i)
+        else:
+            tags.append("<link rel='stylesheet' href='https://fonts.cdn.example/%d.css'>" % i)
+    js = "var config = {api: 'https://api.site.example/v1', items: [1, 2, 3]};\n" * 200
+    js += "(function(){var s=document.createElement('script');s.src='https://static.hotjar.com/c/h.js';})();"
+    return "<html><head><script>%s</script></head><body>%s</body></html>" % (js, "".join(tags))
+
+
+def naive(html_lower, signatures):
+    found = {}
+    for name, category, signature in signatures:
+        needle = signature.split(":", 1)[1] if signature.startswith("script:") else signature
+        if needle in html_lower:
+            found.setdefault(name, category)
+    return found
+
+
+def match_hosts(db, page):
+    host_nodes = {}
+    return [db.match_url(url, host_nodes) for url in page.resource_urls]
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Classification des traceurs avec une base volumineuse.")
+    parser.add_argument("count", nargs="?", type=int, default=10000, help="signatures de la base")
+    parser.add_argument("resources", nargs="?", type=int, default=600, help="ressources de la page")
+    parser.add_argument("repeat", nargs="?", type=int, default=20, help="répétitions")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    count = args.count
+    resources = args.resources
+    repeat = args.repeat
+    signatures = build_signatures(count)
+
+    start = time.perf_counter()
+    db = rgpdbot2.TrackerDatabase(signatures)
+    compile_ms = (time.perf_counter() - start) * 1000
+    html = build_page(resources)
+    page = rgpdbot2.PageAnalysis(html)
+    print("%d signatures compilées en %.0f ms ; page : %.0f Ko, %d URL src/href, %d script(s) inline"
+          % (db.size, compile_ms, len(html) / 1024, len(page.resource_urls), len(page.inline_scripts)))
+
+    naive_ms = best_of(lambda: naive(page.html_lower, signatures), max(repeat // 10, 1))
+    hosts_ms = best_of(lambda: match_hosts(db, page), repeat)
+    classify_ms = best_of(lambda: db.classify(page), repeat)
+    print("Naïf (sous-chaîne par signature)   : %8.2f ms / page" % naive_ms)
+    print("Compilé : hôtes src/href seuls      : %8.2f ms / page" % hosts_ms)
+    print("Compilé : classification complète   : %8.2f ms / page -> %s"
+          % (classify_ms, ", ".join(sorted(db.classify(page)))))
+
+
+if __name__ == "__main__":
+    main()
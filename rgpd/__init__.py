@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""
+Analyse RGPD/ePrivacy de sites web, découpée pour que chaque usage
+n'importe que ce dont il a besoin :
+ - rgpd.config    : configuration (constantes, surcharges par variables d'environnement)
+ - rgpd.messages  : textes multilingues
+ - rgpd.metrics   : compteurs et instrumentation
+ - rgpd.scoring   : règles de score versionnées, re-calcul en colonnes de l'historique
+ - rgpd.analysis  : analyse d'une page déjà téléchargée (sans réseau)
+ - rgpd.fetch     : couche HTTP et téléchargement des pages
+ - rgpd.engine    : moteur de scan (cache, historique, crawl, concurrence)
+ - rgpd.report    : rapports texte et PDF
+ - rgpd.bot       : front-end Telegram
+"""
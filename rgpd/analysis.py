@@ -0,0 +1,816 @@
+# -*- coding: utf-8 -*-
+"""
+Analyse RGPD/ePrivacy d'une page déjà téléchargée : modèle de page
+(un seul parsing), langue du site, mots-clés, traceurs, score.
+Aucun accès réseau ici : ce module s'importe sans requests, et
+BeautifulSoup / langdetect ne sont chargés qu'au premier usage.
+"""
+
+import hashlib
+import html.parser
+import logging
+import re
+import threading
+from urllib.parse import urldefrag, urljoin
+
+from cachetools import LRUCache
+
+from rgpd.config import LANG_CACHE_SIZE, LANG_SAMPLE_CHARS, LANG_SNIFF_CHARS, setting
+from rgpd.messages import messages
+from rgpd.metrics import metrics
+from rgpd.scoring import get_scoring_rules
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# ------------------ Modèle de page (un seul parsing par scan) ---------------
+# ---------------------------------------------------------------------------
+
+def _pick_html_parser():
+    """
+    Choisit le backend de parsing BeautifulSoup : lxml s'il est installé
+    (nettement plus rapide sur les pages lourdes), sinon html.parser.
+    """
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+HTML_PARSER = _pick_html_parser()
+
+def _text_blocks(root):
+    """
+    Blocs dont le texte sert à détecter le bandeau cookies, dans l'ordre du
+    document : chaque <script>, et chaque <div> non imbriqué dans un autre
+    <div>. Le texte d'un <div> contient déjà celui des <div> imbriqués (mais
+    pas celui des <script>, ignoré par get_text) : chaque nœud texte n'est
+    ainsi extrait et parcouru qu'une seule fois.
+    """
+    from bs4 import Tag
+
+    blocks = []
+    stack = [(root, False)]
+    while stack:
+        node, in_div = stack.pop()
+        if node.name == "script":
+            blocks.append(node)
+            continue
+        if node.name == "div" and not in_div:
+            blocks.append(node)
+            in_div = True
+        stack.extend((child, in_div) for child in reversed(node.contents) if isinstance(child, Tag))
+    return blocks
+
+class PageAnalysis:
+    """
+    Document HTML parsé une seule fois par scan. Les liens, les textes
+    <script>/<div> et les URL des ressources sont pré-extraits ici,
+    puis partagés par toutes les fonctions check_* / detect_*.
+    """
+
+    def __init__(self, html_content):
+        self.html = html_content
+        self.html_lower = html_content.lower()
+        from bs4 import BeautifulSoup
+
+        self.soup = BeautifulSoup(html_content, HTML_PARSER)
+
+        # (href, texte du lien en minuscules)
+        self.links = [
+            (link["href"], link.text.lower())
+            for link in self.soup.find_all("a", href=True)
+        ]
+        # Textes des <script> et des <div> de premier niveau, en minuscules ;
+        # le JS inline (<script> sans src) est aussi gardé à part
+        self.text_blobs = []
+        self.inline_scripts = []
+        for element in _text_blocks(self.soup):
+            text = element.text.lower()
+            self.text_blobs.append(text)
+            if element.name == "script" and not element.get("src"):
+                self.inline_scripts.append(text)
+        # URL des ressources et liens de la page (attributs src / href)
+        self.resource_urls = [
+            value
+            for tag in self.soup.find_all(True)
+            for value in (tag.get("src"), tag.get("href"))
+            if isinstance(value, str) and value
+        ]
+        self.trackers = None  # rempli par classify_trackers()
+
+# ---------------------------------------------------------------------------
+# -------------------- Détection de la langue du site -----------------------
+# ---------------------------------------------------------------------------
+
+_HTML_LANG_RE = re.compile(r"""<html\b[^>]*?\blang\s*=\s*["']?\s*([a-z_-]+)""", re.IGNORECASE)
+_META_TAG_RE = re.compile(r"<meta\b[^>]*>", re.IGNORECASE)
+_META_CONTENT_RE = re.compile(r"""\bcontent\s*=\s*["']?\s*([^"'>]+)""", re.IGNORECASE)
+
+def _supported_language(declared):
+    """'de-DE, en' -> 'de' si la langue a ses propres mots-clés, sinon None."""
+    if not declared:
+        return None
+    lang = re.split(r"[,;\s]", declared.strip(), maxsplit=1)[0]
+    lang = re.split(r"[-_]", lang, maxsplit=1)[0].lower()
+    return lang if lang in SITE_LANGUAGES else None
+
+def declared_language(html_content, headers=None):
+    """
+    Langue déclarée, sans parser le document : en-tête Content-Language,
+    puis <html lang="xx">, puis <meta http-equiv="content-language">,
+    cherchés par expression régulière dans le début du HTML brut.
+    Renvoie la première langue reconnue, ou None.
+    """
+    if headers:
+        lang = _supported_language(headers.get("content-language"))
+        if lang:
+            return lang
+    head = html_content[:LANG_SNIFF_CHARS]
+    match = _HTML_LANG_RE.search(head)
+    if match:
+        lang = _supported_language(match.group(1))
+        if lang:
+            return lang
+    for tag in _META_TAG_RE.findall(head):
+        if "content-language" in tag.lower():
+            content = _META_CONTENT_RE.search(tag)
+            return _supported_language(content.group(1)) if content else None
+    return None
+
+class _SampleComplete(Exception):
+    pass
+
+class _VisibleTextSampler(html.parser.HTMLParser):
+    """
+    Premiers caractères de texte visible d'un document : le contenu de
+    <script>, <style>, <template>... est ignoré, et l'analyse s'arrête dès
+    que `limit` caractères sont collectés (pas de parsing complet).
+    """
+
+    SKIPPED_TAGS = frozenset({"script", "style", "noscript", "template", "svg"})
+
+    def __init__(self, limit):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.parts = []
+        self.size = 0
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skipping += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skipping:
+            self._skipping -= 1
+
+    def handle_data(self, data):
+        if self._skipping:
+            return
+        data = data.strip()
+        if data:
+            self.parts.append(data)
+            self.size += len(data) + 1
+            if self.size >= self.limit:
+                raise _SampleComplete
+
+    @classmethod
+    def sample(cls, html_content, limit=LANG_SAMPLE_CHARS):
+        sampler = cls(limit)
+        try:
+            sampler.feed(html_content)
+            sampler.close()
+        except _SampleComplete:
+            pass
+        return " ".join(sampler.parts)[:limit]
+
+_langdetect_factory = None
+_langdetect_lock = threading.Lock()
+
+def preload_language_profiles():
+    """
+    Charge une seule fois les profils de langdetect (~0,4 s), partagés
+    ensuite par tous les threads. Appelé au démarrage du bot / du batch ;
+    sinon, chargement au premier besoin.
+    """
+    global _langdetect_factory
+    with _langdetect_lock:
+        if _langdetect_factory is None:
+            from langdetect import DetectorFactory
+            from langdetect.detector_factory import PROFILES_DIRECTORY
+
+            DetectorFactory.seed = 0  # Rendre langdetect déterministe
+            factory = DetectorFactory()
+            factory.load_profile(PROFILES_DIRECTORY)
+            _langdetect_factory = factory
+    return _langdetect_factory
+
+# Empreinte du texte échantillonné -> langue détectée
+language_cache = LRUCache(maxsize=LANG_CACHE_SIZE)
+_language_cache_lock = threading.Lock()
+
+def guess_language(text):
+    """langdetect sur un extrait de texte (mémorisé par empreinte), ou None."""
+    key = hashlib.blake2b(text.encode("utf-8", "replace"), digest_size=16).digest()
+    with _language_cache_lock:
+        if key in language_cache:
+            return language_cache[key]
+    factory = _langdetect_factory or preload_language_profiles()
+    try:
+        detector = factory.create()
+        detector.append(text)
+        detected = detector.detect()
+    except Exception:  # LangDetectException (ex: texte sans lettres)
+        detected = None
+    with _language_cache_lock:
+        language_cache[key] = detected
+    return detected
+
+def detect_site_language(html_content, headers=None):
+    """
+    Détecte la langue (fr, en, de, es, ...) de la page, par ordre de coût :
+    - en-tête Content-Language, <html lang="xx">, <meta http-equiv="content-language">
+      (HTML brut, avant tout parsing)
+    - sinon, langdetect sur un court extrait du texte visible
+    Retourne une langue de SITE_LANGUAGES, ou 'other' si incertain
+    """
+    lang = declared_language(html_content, headers)
+    if lang:
+        return lang
+
+    text_sample = _VisibleTextSampler.sample(html_content)
+    if text_sample:
+        lang = _supported_language(guess_language(text_sample))
+        if lang:
+            return lang
+
+    return "other"
+
+# ---------------------------------------------------------------------------
+# ------------------------ Fonctions d'analyse RGPD/ePrivacy ----------------
+# ---------------------------------------------------------------------------
+
+def format_domain(domain):
+    """Force https si pas présent."""
+    if not domain.startswith(("http://", "https://")):
+        domain = "https://" + domain
+    return domain
+
+def check_https(url):
+    return url.startswith("https://")
+
+def parse_domains(text_msg):
+    """Liste de domaines séparés par des virgules."""
+    return [d.strip() for d in text_msg.strip().split(",") if d.strip()]
+
+# Mots-clés des autres langues de site reconnues (fr / en : dans messages)
+SITE_KEYWORDS = {
+    "de": {
+        "privacy_keywords": [
+            "datenschutzerklärung", "datenschutz", "privatsphäre", "dsgvo",
+            "datenschutzhinweise"
+        ],
+        "legal_keywords": [
+            "impressum", "rechtliche hinweise", "nutzungsbedingungen", "agb",
+            "allgemeine geschäftsbedingungen"
+        ],
+        "cookie_keywords": [
+            "cookie", "einwilligung", "zustimmung", "dsgvo", "datenschutzeinstellungen"
+        ],
+    },
+    "es": {
+        "privacy_keywords": [
+            "política de privacidad", "privacidad", "protección de datos",
+            "datos personales", "rgpd"
+        ],
+        "legal_keywords": [
+            "aviso legal", "términos y condiciones", "condiciones de uso",
+            "términos de uso"
+        ],
+        "cookie_keywords": [
+            "cookie", "consentimiento", "rgpd", "política de cookies"
+        ],
+    },
+    "it": {
+        "privacy_keywords": [
+            "informativa sulla privacy", "informativa privacy", "protezione dei dati",
+            "dati personali", "trattamento dei dati"
+        ],
+        "legal_keywords": [
+            "note legali", "termini e condizioni", "condizioni d'uso",
+            "termini di utilizzo"
+        ],
+        "cookie_keywords": [
+            "cookie", "consenso", "informativa cookie"
+        ],
+    },
+    "nl": {
+        "privacy_keywords": [
+            "privacyverklaring", "privacybeleid", "gegevensbescherming",
+            "persoonsgegevens", "avg"
+        ],
+        "legal_keywords": [
+            "juridische informatie", "algemene voorwaarden", "gebruiksvoorwaarden",
+            "colofon"
+        ],
+        "cookie_keywords": [
+            "cookie", "toestemming", "cookiebeleid"
+        ],
+    },
+    "pt": {
+        "privacy_keywords": [
+            "política de privacidade", "privacidade", "proteção de dados",
+            "dados pessoais", "lgpd", "rgpd"
+        ],
+        "legal_keywords": [
+            "aviso legal", "termos de uso", "termos e condições", "informação legal"
+        ],
+        "cookie_keywords": [
+            "cookie", "consentimento", "lgpd", "rgpd"
+        ],
+    },
+}
+
+SITE_LANGUAGES = ("fr", "en") + tuple(SITE_KEYWORDS)
+
+def get_site_keywords(site_lang, key):
+    """
+    Mots-clés de la langue du site (plus l'anglais pour les langues autres
+    que fr / en : fréquent sur les sites multilingues), ou fr+en si la
+    langue est incertaine.
+    """
+    if site_lang in ("fr", "en"):
+        return messages[site_lang][key]
+    if site_lang in SITE_KEYWORDS:
+        return SITE_KEYWORDS[site_lang][key] + messages["en"][key]
+    return messages["fr"][key] + messages["en"][key]
+
+class KeywordMatcher:
+    """
+    Liste de mots-clés compilée en une seule expression régulière, factorisée
+    par préfixes communs (trie) : un texte est parcouru une seule fois, quel
+    que soit le nombre de mots-clés, et à une position donnée c'est le mot-clé
+    le plus long qui est retenu. Les textes sont attendus en minuscules.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = tuple(dict.fromkeys(kw for kw in keywords if kw))
+        trie = {}
+        for kw in self.keywords:
+            node = trie
+            for char in kw:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        # (?!) : ne correspond jamais (liste vide)
+        self._regex = re.compile(self._trie_pattern(trie) or "(?!)")
+
+    @classmethod
+    def _trie_pattern(cls, node):
+        branches = [re.escape(char) + cls._trie_pattern(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:%s)" % "|".join(branches)
+        if "" in node:
+            # Fin d'un mot-clé plus court : la suite est facultative (gourmande)
+            pattern = ("(?:%s)?" % pattern) if len(branches) == 1 else pattern + "?"
+        return pattern
+
+    def search(self, text):
+        """Premier mot-clé trouvé dans le texte, ou None."""
+        match = self._regex.search(text)
+        return match.group(0) if match else None
+
+    def finditer(self, text):
+        """(mot-clé, début, fin) pour chaque occurrence (sans chevauchement)."""
+        for match in self._regex.finditer(text):
+            yield match.group(0), match.start(), match.end()
+
+# Compilés une seule fois, à la première page de chaque langue :
+# une par langue, et fr+en pour une langue incertaine
+KEYWORD_MATCHERS = {}
+
+def get_keyword_matcher(site_lang, key):
+    site_lang = site_lang if site_lang in SITE_LANGUAGES else "other"
+    matcher = KEYWORD_MATCHERS.get((site_lang, key))
+    if matcher is None:
+        matcher = KEYWORD_MATCHERS[(site_lang, key)] = KeywordMatcher(get_site_keywords(site_lang, key))
+    return matcher
+
+def find_keyword_matches(page, site_lang, key):
+    """
+    Toutes les occurrences des mots-clés `key` dans la page, avec leur
+    emplacement : source ("link" : texte d'un lien, "block" : bloc
+    <script>/<div> de premier niveau), index dans page.links / page.text_blobs,
+    et position (début, fin) dans ce texte.
+    """
+    matcher = get_keyword_matcher(site_lang, key)
+    matches = []
+    for source, texts in (("link", (text for _, text in page.links)), ("block", page.text_blobs)):
+        for index, text in enumerate(texts):
+            for keyword, start, end in matcher.finditer(text):
+                matches.append({"keyword": keyword, "source": source, "index": index,
+                                "start": start, "end": end})
+    return matches
+
+def _find_keyword_link(page, matcher):
+    for href, link_text in page.links:
+        if matcher.search(link_text):
+            return href
+    return None
+
+def check_privacy_policy(page, site_lang):
+    return _find_keyword_link(page, get_keyword_matcher(site_lang, "privacy_keywords"))
+
+def check_legal_mentions(page, site_lang):
+    return _find_keyword_link(page, get_keyword_matcher(site_lang, "legal_keywords"))
+
+def check_cookie_banner(page, site_lang):
+    matcher = get_keyword_matcher(site_lang, "cookie_keywords")
+    return any(matcher.search(text_lower) for text_lower in page.text_blobs)
+
+# ---------------------------------------------------------------------------
+# ---------------- Base de signatures de traceurs tiers ---------------------
+# ---------------------------------------------------------------------------
+
+# Traceurs présentés à part dans le rapport (et pas dans third_party_trackers)
+GOOGLE_ANALYTICS = "Google Analytics"
+FACEBOOK_PIXEL = "Facebook Pixel"
+
+# Signatures minimales si TRACKER_DB_PATH est introuvable
+DEFAULT_TRACKER_SIGNATURES = (
+    (GOOGLE_ANALYTICS, "analytics", "google-analytics.com"),
+    (GOOGLE_ANALYTICS, "analytics", "googletagmanager.com/gtag/js"),
+    (FACEBOOK_PIXEL, "advertising", "connect.facebook.net"),
+    (FACEBOOK_PIXEL, "advertising", "script:facebook_pixel"),
+    ("DoubleClick", "advertising", "doubleclick.net"),
+    ("Hotjar", "session_replay", "static.hotjar.com"),
+)
+
+# Hôte et chemin d'une URL absolue (http(s)://... ou //...)
+_URL_HOST_RE = re.compile(r"^\s*(?:[a-z][a-z0-9+.-]*:)?//(?:[^/?#@]*@)?([^/?#:]+)(?::\d+)?([^?#]*)", re.I)
+_HOST_CHAR_RE = re.compile(r"[a-z0-9-]")
+_HOST_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789.-"
+
+class TrackerDatabase:
+    """
+    Signatures de traceurs compilées une seule fois :
+     - un trie des domaines par labels inversés (com -> hotjar -> static),
+       pour classer l'hôte de chaque URL src/href en O(nombre de labels),
+       le suffixe le plus spécifique l'emportant ;
+     - pour le JS inline, un préfiltre : une expression régulière des
+       seuls TLD des domaines signés (".com", ".net"...), qui commence par
+       un "." littéral et parcourt donc le texte à la vitesse de C ; le
+       trie n'est consulté que pour l'hôte qui se termine sur chaque TLD
+       trouvé. Les motifs "script:" (peu nombreux) sont cherchés tels
+       quels par une expression combinée (KeywordMatcher).
+    Chaque signature est un triplet (nom, catégorie, signature).
+    """
+
+    def __init__(self, signatures):
+        self.size = 0
+        self._trie = {}
+        self._literals = {}  # motif cherché tel quel dans le JS inline -> (nom, catégorie, est_un_domaine)
+        self._tlds = set()   # dernier label des domaines signés
+        for name, category, signature in signatures:
+            self.add(name, category, signature)
+        self._script_matcher = KeywordMatcher(self._literals)
+        tlds = KeywordMatcher(self._tlds)._regex.pattern
+        self._tld_regex = re.compile(r"\.(?:%s)(?![a-z0-9-])" % tlds)
+
+    @classmethod
+    def load(cls, path=None):
+        """Charge un fichier de signatures (format : voir trackers.txt ; défaut : TRACKER_DB_PATH)."""
+        if path is None:
+            path = setting("TRACKER_DB_PATH")
+        try:
+            with open(path, encoding="utf-8") as f:
+                signatures = list(cls.parse(f))
+        except OSError as exc:
+            logger.warning("Base de traceurs %s illisible (%s), signatures par défaut", path, exc)
+            signatures = DEFAULT_TRACKER_SIGNATURES
+        return cls(signatures)
+
+    @staticmethod
+    def parse(lines):
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith(("#", "!")):
+                continue
+            if line.startswith("||"):
+                # Règle EasyPrivacy/Adblock : ||domaine^ (options $... ignorées)
+                domain = line[2:].split("$")[0].rstrip("^").strip()
+                if domain and "*" not in domain:
+                    yield domain, "tracking", domain
+                continue
+            parts = [part.strip() for part in line.split("|")]
+            if len(parts) == 3 and all(parts):
+                yield tuple(parts)
+            else:
+                logger.warning("Signature de traceur ignorée : %r", line)
+
+    def add(self, name, category, signature):
+        signature = signature.lower()
+        entry = (name, category)
+        if signature.startswith("script:"):
+            self._literals[signature[len("script:"):]] = (name, category, False)
+        else:
+            domain, _, path = signature.partition("/")
+            node = self._trie
+            for label in reversed(domain.split(".")):
+                node = node.setdefault(label, {})
+            if path:
+                paths = node.setdefault("/", [])
+                paths.append(("/" + path, entry))
+                paths.sort(key=lambda item: len(item[0]), reverse=True)
+            else:
+                node[""] = entry
+            if "." in domain:
+                self._tlds.add(domain.rpartition(".")[2])
+            else:
+                self._literals[signature] = (name, category, not path)
+        self.size += 1
+
+    def match_url(self, url, host_nodes=None):
+        """
+        (nom, catégorie) du traceur correspondant à une URL, ou None.
+        host_nodes : dict facultatif mémorisant le parcours du trie par hôte
+        (une page charge souvent de nombreuses ressources du même hôte).
+        """
+        match = _URL_HOST_RE.match(url) if "//" in url else None
+        if not match:
+            return None  # URL relative : ressource du site lui-même
+        host, path = match.group(1), match.group(2)
+        nodes = host_nodes.get(host) if host_nodes is not None else None
+        if nodes is None:
+            nodes = self._host_nodes(host)
+            if host_nodes is not None:
+                host_nodes[host] = nodes
+        return self._match_nodes(nodes, path, 0)
+
+    @staticmethod
+    def _match_nodes(nodes, text, path_at):
+        """Signature la plus spécifique des nœuds d'un hôte, son chemin étant text[path_at:]."""
+        for node in nodes:
+            for prefix, entry in node.get("/", ()):
+                if text.startswith(prefix, path_at):
+                    return entry
+            if "" in node:
+                return node[""]
+        return None
+
+    def _host_nodes(self, host):
+        """Nœuds du trie portant une signature le long de l'hôte, du plus spécifique au plus général."""
+        node, nodes = self._trie, []
+        for label in reversed(host.lower().rstrip(".").split(".")):
+            node = node.get(label) if label else None
+            if node is None:
+                break
+            if "" in node or "/" in node:
+                nodes.append(node)
+        nodes.reverse()
+        return nodes
+
+    def match_script(self, text, host_nodes=None):
+        """(nom, catégorie) de chaque signature citée dans un JS inline (en minuscules)."""
+        text = text.replace("\\/", "/")  # URL échappées en JSON : https:\/\/...
+        if host_nodes is None:
+            host_nodes = {}
+        found = []  # (position, (nom, catégorie)), rendus dans l'ordre du texte
+        # Domaines : l'hôte complet qui se termine sur chaque TLD connu
+        for match in self._tld_regex.finditer(text):
+            start = match.start()
+            before = text[max(start - 253, 0):start]
+            label = before[len(before.rstrip(_HOST_CHARS)):]
+            host = label + match.group(0)
+            nodes = host_nodes.get(host)
+            if nodes is None:
+                nodes = host_nodes[host] = self._host_nodes(host)
+            if nodes:
+                entry = self._match_nodes(nodes, text, match.end())
+                if entry is not None:
+                    found.append((start - len(label), entry))
+        for literal, start, end in self._script_matcher.finditer(text):
+            name, category, is_domain = self._literals[literal]
+            # Un domaine doit être un hôte complet (pas "notgoogle-analytics.com")
+            if start and _HOST_CHAR_RE.match(text[start - 1]):
+                continue
+            if is_domain and _HOST_CHAR_RE.match(text, end):
+                continue
+            found.append((start, (name, category)))
+        found.sort(key=lambda item: item[0])
+        for _, entry in found:
+            yield entry
+
+    def classify(self, page):
+        """
+        Traceurs d'une page {nom: catégorie}, dans l'ordre de découverte :
+        une passe sur les URL src/href, une passe sur le JS inline.
+        """
+        found = {}
+        host_nodes = {}
+        for url in page.resource_urls:
+            entry = self.match_url(url, host_nodes)
+            if entry is not None:
+                found.setdefault(*entry)
+        for script in page.inline_scripts:
+            for name, category in self.match_script(script, host_nodes):
+                found.setdefault(name, category)
+        return found
+
+_tracker_db = None
+_tracker_db_lock = threading.Lock()
+
+def get_tracker_db():
+    """Base de signatures partagée, chargée au premier usage."""
+    global _tracker_db
+    if _tracker_db is None:
+        with _tracker_db_lock:
+            if _tracker_db is None:
+                _tracker_db = TrackerDatabase.load()
+    return _tracker_db
+
+def classify_trackers(page):
+    """Traceurs de la page, classés une seule fois puis partagés par les detect_*."""
+    if page.trackers is None:
+        page.trackers = get_tracker_db().classify(page)
+    return page.trackers
+
+def detect_google_analytics(page):
+    return GOOGLE_ANALYTICS in classify_trackers(page)
+
+def detect_facebook_pixel(page):
+    return FACEBOOK_PIXEL in classify_trackers(page)
+
+def detect_contact_form(page):
+    if "<form" in page.html_lower:
+        return True
+    return False
+
+def detect_third_party_trackers(page):
+    return {
+        name: True
+        for name in classify_trackers(page)
+        if name not in (GOOGLE_ANALYTICS, FACEBOOK_PIXEL)
+    }
+
+# ---------------------------------------------------------------------------
+# ---------------- Niveau de risque d'un score (rgpd.scoring) ----------------
+# ---------------------------------------------------------------------------
+
+def get_risk_level_and_msg(score, lang):
+    """(niveau de risque, message) d'un score, selon les seuils des règles actives."""
+    key = get_scoring_rules().risk_level(score)
+    return (messages[lang]["risk_level"][key], messages[lang]["risk_message"][key])
+
+# ---------------------------------------------------------------------------
+# ---------------- Analyse d'une page téléchargée --------------------------
+# ---------------------------------------------------------------------------
+
+def page_findings(page, site_lang):
+    """Constats tirés d'une page (accueil ou page visitée par le crawl)."""
+    return {
+        "privacy_policy": check_privacy_policy(page, site_lang),
+        "cookie_banner": check_cookie_banner(page, site_lang),
+        "legal_mentions": check_legal_mentions(page, site_lang),
+        "google_analytics": detect_google_analytics(page),
+        "facebook_pixel": detect_facebook_pixel(page),
+        "contact_form": detect_contact_form(page),
+        "third_party_trackers": detect_third_party_trackers(page),
+    }
+
+def analyze_page(html_content, headers=None, with_links=True):
+    """
+    Partie CPU de l'analyse d'une page : langue, parsing et vérifications.
+    Entrées et sorties compactes (texte, dicts, tuples) : peut s'exécuter
+    dans un autre processus (voir engine.AnalysisPool).
+    Renvoie (constats, liens (href, texte) de la page ou None).
+    """
+    # Détecter la langue du site (en-têtes et HTML brut d'abord)
+    with metrics.stage("langdetect"):
+        site_lang = detect_site_language(html_content, headers)
+
+    # Un seul parsing, partagé par toutes les vérifications
+    with metrics.stage("parse"):
+        page = PageAnalysis(html_content)
+
+    with metrics.stage("checks"):
+        findings = page_findings(page, site_lang)
+    return findings, (page.links if with_links else None)
+
+def analyze_page_with_stages(html_content, headers=None, with_links=True):
+    """
+    analyze_page dans un processus d'analyse (engine.AnalysisPool) : renvoie
+    aussi la durée de ses étapes, {nom: secondes}, que le processus
+    principal reporte dans ses métriques et dans la trace du domaine.
+    """
+    metrics.enabled = True
+    with metrics.collect_stages() as stages:
+        findings, links = analyze_page(html_content, headers, with_links)
+    return findings, links, stages
+
+def warm_up_analysis():
+    """
+    Charge d'avance ce que l'analyse ne charge sinon qu'à la première page
+    (BeautifulSoup, profils langdetect, matchers de mots-clés, signatures
+    de traceurs) : au démarrage du bot, et de chaque processus d'analyse.
+    """
+    preload_language_profiles()
+    for site_lang in SITE_LANGUAGES + ("other",):
+        for key in ("privacy_keywords", "legal_keywords", "cookie_keywords"):
+            get_keyword_matcher(site_lang, key)
+    get_tracker_db()
+    analyze_page("<html><body><div><a href='/'>x</a></div></body></html>")
+
+def analyze_snapshot(snapshot, crawler=None, deadline_at=None, analyzer=analyze_page):
+    """
+    Vérifications et score à partir d'un SiteSnapshot déjà téléchargé.
+    Avec un ShallowCrawler, les pages de politique / mentions et quelques
+    sous-pages sont aussi visitées, et leurs constats fusionnés (clé "crawl").
+    analyzer : analyze_page, ou AnalysisPool.analyze pour un pool de processus.
+    """
+    findings, links = analyzer(snapshot.body, snapshot.headers, with_links=crawler is not None)
+
+    # Check
+    https_status = check_https(snapshot.final_url)
+    cookies_list = snapshot.cookies
+
+    crawl = None
+    if crawler is not None:
+        with metrics.stage("crawl"):
+            pages = crawler.crawl(snapshot, links, findings, deadline_at)
+        findings, cookies_list, crawl = merge_crawl_findings(findings, cookies_list, pages, snapshot.final_url)
+
+    result = {
+        "https_status": https_status,
+        "privacy_policy": findings["privacy_policy"],
+        "cookie_banner": findings["cookie_banner"],
+        "legal_mentions": findings["legal_mentions"],
+        "cookies": cookies_list,
+        "gdpr_score": None,
+        "google_analytics": findings["google_analytics"],
+        "facebook_pixel": findings["facebook_pixel"],
+        "contact_form": findings["contact_form"],
+        "third_party_trackers": findings["third_party_trackers"],
+    }
+    rules = get_scoring_rules()
+    # Score sur tous les constats (les règles peuvent pondérer les traceurs, etc.)
+    result["gdpr_score"] = rules.score(result)
+    result["scoring_version"] = rules.version
+    if crawl is not None:
+        result["crawl"] = crawl
+    return result
+
+# Statuts d'un lien de politique / mentions définitivement mort
+LINK_GONE_STATUSES = (404, 410)
+
+def merge_crawl_findings(findings, cookies, pages, base_url):
+    """
+    Fusionne les constats des pages visitées dans ceux de la page d'accueil
+    (base_url : son URL finale, pour résoudre les liens relatifs).
+    Renvoie (constats, cookies, résumé du crawl). Un lien de politique ou de
+    mentions qui mène à une page absente (404/410) n'est plus compté ; un
+    échec temporaire (délai, 5xx, DNS) laisse le constat de la page d'accueil.
+    """
+    merged = dict(findings, third_party_trackers=dict(findings["third_party_trackers"]))
+    cookies = list(cookies)
+    cookie_keys = {(c["name"], c["domain"], c["path"]) for c in cookies}
+    # URL de politique / mentions visitées -> page accessible ou absente
+    reachable = {}
+
+    for crawled in pages:
+        if crawled.kind != "page":
+            if crawled.status in LINK_GONE_STATUSES:
+                reachable[crawled.url] = False
+            elif crawled.status is not None and crawled.status < 400:
+                reachable[crawled.url] = True
+        for cookie in crawled.cookies:
+            key = (cookie["name"], cookie["domain"], cookie["path"])
+            if key not in cookie_keys:
+                cookie_keys.add(key)
+                cookies.append(cookie)
+        sub = crawled.findings
+        if sub is None:
+            continue
+        for key in ("cookie_banner", "google_analytics", "facebook_pixel", "contact_form"):
+            merged[key] = merged[key] or sub[key]
+        for name in sub["third_party_trackers"]:
+            merged["third_party_trackers"].setdefault(name, True)
+        for key in ("privacy_policy", "legal_mentions"):
+            if not merged[key] and sub[key]:
+                merged[key] = urljoin(crawled.final_url, sub[key])
+
+    summary = {
+        "pages": [
+            {"url": p.url, "kind": p.kind, "depth": p.depth, "status": p.status}
+            for p in pages
+        ],
+    }
+    for key in ("privacy_policy", "legal_mentions"):
+        # None : lien absent, page non visitée dans le budget, ou échec temporaire
+        ok = reachable.get(urldefrag(urljoin(base_url, merged[key]))[0]) if merged[key] else None
+        if ok is False:
+            merged[key] = None
+        summary[key + "_ok"] = ok
+    return merged, cookies, summary
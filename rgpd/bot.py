@@ -0,0 +1,633 @@
+# -*- coding: utf-8 -*-
+"""
+Front-end Telegram : file d'attente équitable des demandes, surveillance
+périodique (/watch), commandes du bot et main(). telegram et APScheduler
+ne sont importés qu'au démarrage du bot.
+"""
+
+import datetime
+import json
+import logging
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+
+from rgpd.analysis import (
+    FACEBOOK_PIXEL, GOOGLE_ANALYTICS, format_domain, parse_domains, warm_up_analysis,
+)
+from rgpd.config import (
+    JOB_QUEUE_PER_USER, JOB_QUEUE_SIZE, JOB_QUEUE_WORKERS,
+    PROGRESS_EDIT_INTERVAL, RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW, REPORT_INTRO_MAX_DOMAINS,
+    TELEGRAM_MESSAGE_LIMIT, WATCH_DB, WATCH_INTERVAL, WATCH_JITTER, WATCH_MAX_PER_USER,
+    WATCH_MAX_WORKERS, setting,
+)
+from rgpd.engine import analysis_pool, scan_engine
+from rgpd.messages import get_user_language, messages
+from rgpd.metrics import metrics, scan_stats
+from rgpd.report import (
+    build_report_model, pdf_renderer, render_report_messages, report_key, report_store, warm_up_pdf,
+)
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# ------------- Surveillance périodique des domaines (/watch) ----------------
+# ---------------------------------------------------------------------------
+
+def watch_findings(result):
+    """Ce qui déclenche une notification : le score et les traceurs détectés."""
+    trackers = set(result["third_party_trackers"])
+    if result["google_analytics"]:
+        trackers.add(GOOGLE_ANALYTICS)
+    if result["facebook_pixel"]:
+        trackers.add(FACEBOOK_PIXEL)
+    return {"gdpr_score": result["gdpr_score"], "trackers": sorted(trackers)}
+
+def format_watch_change(domain, before, after, user_lang):
+    """Message de notification d'un changement, ou None si rien n'a changé."""
+    msg = messages[user_lang]
+    lines = []
+    if before["gdpr_score"] != after["gdpr_score"]:
+        lines.append(msg["watch_score"].format(before["gdpr_score"], after["gdpr_score"]))
+    added = [t for t in after["trackers"] if t not in before["trackers"]]
+    removed = [t for t in before["trackers"] if t not in after["trackers"]]
+    if added:
+        lines.append(msg["watch_trackers_added"].format(", ".join(added)))
+    if removed:
+        lines.append(msg["watch_trackers_removed"].format(", ".join(removed)))
+    if not lines:
+        return None
+    return "\n".join([msg["watch_change"].format(domain)] + lines)
+
+class WatchManager:
+    """
+    Surveillance des domaines demandés par /watch : chaque domaine est
+    ré-analysé périodiquement et ses abonnés ne sont prévenus que si le
+    score ou les traceurs détectés changent.
+    - un seul job APScheduler par domaine, quel que soit le nombre d'abonnés
+    - prochaine analyse calculée depuis la dernière (watch_state.checked_at),
+      y compris après un redémarrage ; domaines en retard analysés aussitôt,
+      étalés aléatoirement (jitter)
+    - pool borné de workers du scheduler ; les analyses passent par le
+      ScanEngine, qui plafonne aussi la concurrence globale et par hôte
+    - abonnements et dernier état de chaque domaine persistés en SQLite :
+      les jobs sont recréés au démarrage
+    - le thread du dispatcher Telegram ne fait qu'écrire en base et
+      planifier : analyses et notifications tournent dans le scheduler
+    """
+
+    def __init__(self, engine, db_path=WATCH_DB, interval=WATCH_INTERVAL, jitter=WATCH_JITTER,
+                 workers=WATCH_MAX_WORKERS, max_per_user=WATCH_MAX_PER_USER):
+        self.engine = engine
+        self.db_path = db_path
+        self.interval = interval
+        self.jitter = jitter
+        self.workers = workers
+        self.max_per_user = max_per_user
+        self.bot = None
+        self._scheduler = None
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connect(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS watches ("
+                " chat_id INTEGER NOT NULL,"
+                " url TEXT NOT NULL,"
+                " domain TEXT NOT NULL,"
+                " lang TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (chat_id, url))"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS watches_url ON watches (url)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS watch_state ("
+                " url TEXT PRIMARY KEY,"
+                " checked_at REAL NOT NULL,"
+                " findings TEXT NOT NULL)"
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    def start(self, bot):
+        """Démarre le scheduler (thread d'arrière-plan) et replanifie les domaines surveillés."""
+        # Import ici : seul le bot utilise le scheduler
+        from apscheduler.executors.pool import ThreadPoolExecutor as SchedulerPool
+        from apscheduler.schedulers.background import BackgroundScheduler
+        import pytz
+
+        self.bot = bot
+        self._scheduler = BackgroundScheduler(
+            timezone=pytz.utc,
+            executors={"default": SchedulerPool(self.workers)},
+            job_defaults={
+                # Un job en retard (bot arrêté, pool saturé) ne tourne qu'une fois
+                "coalesce": True,
+                "max_instances": 1,
+                "misfire_grace_time": self.interval,
+            },
+        )
+        self._scheduler.start()
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT w.url, s.checked_at FROM (SELECT DISTINCT url FROM watches) w"
+                " LEFT JOIN watch_state s ON s.url = w.url"
+            ).fetchall()
+        for url, checked_at in rows:
+            self._schedule(url, checked_at)
+        logger.info("Surveillance : %d domaine(s) planifié(s)", len(rows))
+
+    def shutdown(self):
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+
+    def _schedule(self, url, checked_at=None):
+        """
+        Planifie les analyses d'un domaine à partir de la dernière
+        (checked_at, timestamp) : un redémarrage du bot ne repousse pas
+        l'échéance. Domaine jamais analysé ou en retard : analyse tout de
+        suite, décalée au hasard dans le jitter.
+        """
+        from apscheduler.triggers.interval import IntervalTrigger
+        import pytz
+
+        now = time.time()
+        next_run = checked_at + self.interval if checked_at is not None else now
+        if next_run <= now:
+            # Étale les domaines en retard (ex: après un arrêt du bot)
+            next_run = now + random.uniform(0, self.jitter)
+        self._scheduler.add_job(
+            self.check, IntervalTrigger(
+                seconds=self.interval,
+                start_date=datetime.datetime.fromtimestamp(next_run, pytz.utc),
+                jitter=self.jitter,
+                timezone=pytz.utc,
+            ),
+            args=[url], id=url, replace_existing=True,
+        )
+
+    def watch(self, chat_id, domains, lang):
+        """Abonne une conversation ; renvoie (domaines ajoutés, limite atteinte)."""
+        added, new_urls, limit_reached = [], [], False
+        with self._lock:
+            db = self._connect()
+            count = db.execute("SELECT COUNT(*) FROM watches WHERE chat_id = ?", (chat_id,)).fetchone()[0]
+            for domain in dict.fromkeys(domains):
+                url = format_domain(domain)
+                if db.execute("SELECT 1 FROM watches WHERE chat_id = ? AND url = ?", (chat_id, url)).fetchone():
+                    added.append(domain)
+                    continue
+                if count >= self.max_per_user:
+                    limit_reached = True
+                    break
+                if not db.execute("SELECT 1 FROM watches WHERE url = ?", (url,)).fetchone():
+                    new_urls.append(url)
+                db.execute(
+                    "INSERT INTO watches (chat_id, url, domain, lang, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (chat_id, url, domain, lang, time.time()),
+                )
+                count += 1
+                added.append(domain)
+            db.commit()
+        if self._scheduler is not None:
+            for url in new_urls:
+                # Nouveau domaine : état de référence établi rapidement
+                self._schedule(url)
+        return added, limit_reached
+
+    def unwatch(self, chat_id, domains):
+        """Désabonne une conversation ; renvoie les domaines effectivement retirés."""
+        removed, orphans = [], []
+        with self._lock:
+            db = self._connect()
+            for domain in dict.fromkeys(domains):
+                url = format_domain(domain)
+                if db.execute("DELETE FROM watches WHERE chat_id = ? AND url = ?", (chat_id, url)).rowcount:
+                    removed.append(domain)
+                    if not db.execute("SELECT 1 FROM watches WHERE url = ?", (url,)).fetchone():
+                        db.execute("DELETE FROM watch_state WHERE url = ?", (url,))
+                        orphans.append(url)
+            db.commit()
+        if self._scheduler is not None:
+            for url in orphans:
+                if self._scheduler.get_job(url):
+                    self._scheduler.remove_job(url)
+        return removed
+
+    def watched(self, chat_id):
+        with self._lock:
+            return [row[0] for row in self._connect().execute(
+                "SELECT domain FROM watches WHERE chat_id = ? ORDER BY created_at", (chat_id,)
+            )]
+
+    def check(self, url):
+        """Job du scheduler : ré-analyse un domaine et prévient ses abonnés en cas de changement."""
+        result = self.engine.scan([url], "en")[url]
+        if "error" in result:
+            # Site momentanément inaccessible : pas de notification, état inchangé
+            logger.info("Surveillance de %s : %s", url, result["error"])
+            return
+        findings = watch_findings(result)
+
+        with self._lock:
+            db = self._connect()
+            row = db.execute("SELECT findings FROM watch_state WHERE url = ?", (url,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO watch_state (url, checked_at, findings) VALUES (?, ?, ?)",
+                (url, time.time(), json.dumps(findings)),
+            )
+            subscribers = db.execute("SELECT chat_id, domain, lang FROM watches WHERE url = ?", (url,)).fetchall()
+            db.commit()
+
+        if row is None or self.bot is None:
+            return  # premier passage : état de référence
+        before = json.loads(row[0])
+        if before == findings:
+            return
+        for chat_id, domain, lang in subscribers:
+            text = format_watch_change(domain, before, findings, lang)
+            if text is None:
+                continue
+            try:
+                self.bot.send_message(chat_id=chat_id, text=text)
+            except Exception:
+                logger.exception("Échec de la notification de surveillance (%s)", chat_id)
+
+watch_manager = WatchManager(scan_engine, db_path=setting("WATCH_DB"))
+
+# ---------------------------------------------------------------------------
+# ----------- File d'attente des demandes (équité par utilisateur) -----------
+# ---------------------------------------------------------------------------
+
+class FairJobQueue:
+    """
+    File d'attente bornée des demandes d'analyse, servie par un nombre fixe
+    de workers : les handlers Telegram y déposent la demande et rendent la
+    main tout de suite au dispatcher.
+    - équité : une file par utilisateur, servies à tour de rôle (un
+      utilisateur qui envoie dix demandes ne bloque pas les autres)
+    - limites : taille totale, demandes en attente par utilisateur, et
+      nombre de demandes par fenêtre glissante (rate limit)
+    - stats() : profondeur de la file et temps d'attente, pour les opérateurs
+    Les workers sont démarrés à la première demande.
+    """
+
+    def __init__(self, workers=JOB_QUEUE_WORKERS, max_size=JOB_QUEUE_SIZE,
+                 max_per_user=JOB_QUEUE_PER_USER, rate_limit=RATE_LIMIT_REQUESTS,
+                 rate_window=RATE_LIMIT_WINDOW):
+        self.workers = workers
+        self.max_size = max_size
+        self.max_per_user = max_per_user
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self._cond = threading.Condition()
+        self._queues = {}       # utilisateur -> deque de (date d'entrée, fonction, arguments)
+        self._ready = deque()   # utilisateurs ayant des demandes en attente, à tour de rôle
+        self._size = 0
+        self._running = 0
+        self._threads = []
+        # Dates des demandes acceptées dans la fenêtre, par utilisateur ; les
+        # utilisateurs inactifs sont retirés à chaque fenêtre écoulée
+        self._requests = {}
+        self._requests_swept_at = time.monotonic()
+        self._waits = deque(maxlen=1000)  # temps d'attente des dernières demandes (secondes)
+        self._counters = dict.fromkeys(
+            ("accepted", "rate_limited", "rejected", "completed", "failed"), 0
+        )
+
+    def submit(self, user, func, *args):
+        """
+        Dépose func(*args) dans la file de `user`. Renvoie (statut, valeur) :
+        ("queued", position) avec position 0 si un worker est libre,
+        ("rate_limited", secondes avant de réessayer), ("user_full", limite)
+        ou ("full", None).
+        """
+        now = time.monotonic()
+        with self._cond:
+            if not self._threads:
+                self._start()
+            if now - self._requests_swept_at >= self.rate_window:
+                self._sweep_requests(now)
+            recent = self._requests.get(user)
+            if recent is None:
+                recent = self._requests[user] = deque()
+            while recent and now - recent[0] >= self.rate_window:
+                recent.popleft()
+            if len(recent) >= self.rate_limit:
+                self._counters["rate_limited"] += 1
+                return "rate_limited", int(self.rate_window - (now - recent[0])) + 1
+            own = self._queues.get(user)
+            if own is not None and len(own) >= self.max_per_user:
+                self._counters["rejected"] += 1
+                return "user_full", self.max_per_user
+            if self._size >= self.max_size:
+                self._counters["rejected"] += 1
+                return "full", None
+
+            if own is None:
+                own = self._queues[user] = deque()
+                self._ready.append(user)
+            own.append((now, func, args))
+            recent.append(now)
+            self._size += 1
+            self._counters["accepted"] += 1
+            # Rang approximatif à tour de rôle : demandes des autres servies avant celle-ci
+            rank = len(own)
+            ahead = (rank - 1) + sum(min(len(q), rank) for u, q in self._queues.items() if u != user)
+            free = self.workers - self._running
+            self._cond.notify()
+            return "queued", max(ahead + 1 - free, 0)
+
+    def _sweep_requests(self, now):
+        """Retire les utilisateurs sans demande dans la fenêtre (appelé sous self._cond)."""
+        for user in [u for u, recent in self._requests.items()
+                     if not recent or now - recent[-1] >= self.rate_window]:
+            del self._requests[user]
+        self._requests_swept_at = now
+
+    def _start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name="jobs-%d" % i, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._ready:
+                    self._cond.wait()
+                user = self._ready.popleft()
+                own = self._queues[user]
+                enqueued_at, func, args = own.popleft()
+                if own:
+                    self._ready.append(user)
+                else:
+                    del self._queues[user]
+                self._size -= 1
+                self._running += 1
+                self._waits.append(time.monotonic() - enqueued_at)
+            failed = False
+            try:
+                func(*args)
+            except Exception:
+                failed = True
+                logger.exception("Échec d'une demande de la file d'attente")
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._counters["failed" if failed else "completed"] += 1
+
+    def stats(self):
+        """Profondeur de la file, demandes en cours et temps d'attente récents (secondes)."""
+        now = time.monotonic()
+        with self._cond:
+            waits = sorted(self._waits)
+            oldest = min((q[0][0] for q in self._queues.values()), default=None)
+            stats = {
+                "queue_depth": self._size,
+                "queue_users": len(self._queues),
+                "running": self._running,
+                "workers": self.workers,
+                "oldest_wait": round(now - oldest, 2) if oldest is not None else 0.0,
+                "wait_avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "wait_p95": round(waits[min(int(len(waits) * 0.95), len(waits) - 1)], 3) if waits else 0.0,
+                "wait_max": round(waits[-1], 3) if waits else 0.0,
+            }
+            stats.update(self._counters)
+        return stats
+
+job_queue = FairJobQueue()
+
+# ---------------------------------------------------------------------------
+# -------------------------- Fonctions du Bot Telegram -----------------------
+# ---------------------------------------------------------------------------
+
+def start(update, context):
+    user_lang = get_user_language(update)
+    update.message.reply_text(messages[user_lang]["welcome"])
+
+def scan_domains(update, context):
+    user_lang = get_user_language(update)
+    enqueue_scan(update, user_lang, parse_domains(update.message.text))
+
+def rescan(update, context):
+    """/rescan <domaines> : nouvelle analyse sans passer par le cache."""
+    user_lang = get_user_language(update)
+    enqueue_scan(update, user_lang, parse_domains(" ".join(context.args)), use_cache=False)
+
+def enqueue_scan(update, user_lang, domains, use_cache=True):
+    """Dépose la demande dans la file d'attente et rend la main au dispatcher."""
+    if not domains:
+        update.message.reply_text(messages[user_lang]["no_domains"])
+        return
+
+    user = update.effective_user.id if update.effective_user else update.effective_chat.id
+    status, value = job_queue.submit(user, run_scan, update, user_lang, domains, use_cache)
+    msg = messages[user_lang]
+    if status == "queued":
+        if value:
+            update.message.reply_text(msg["analysis_queued"].format(value))
+    elif status == "rate_limited":
+        update.message.reply_text(msg["rate_limited"].format(value))
+    elif status == "user_full":
+        update.message.reply_text(msg["user_queue_full"].format(value))
+    else:
+        update.message.reply_text(msg["queue_full"])
+
+def stats(update, context):
+    """/stats : état de la file d'attente et du scanner (opérateurs)."""
+    user_lang = get_user_language(update)
+    operators = setting("OPERATOR_CHAT_IDS")
+    if operators and update.effective_chat.id not in operators:
+        update.message.reply_text(messages[user_lang]["stats_denied"])
+        return
+    lines = ["%s: %s" % item for item in job_queue.stats().items()]
+    lines.append("")
+    lines += ["%s: %s" % item for item in scan_engine.stats().items()]
+    if report_store is not None:
+        lines.append("")
+        lines += ["%s: %s" % item for item in report_store.stats().items()]
+    update.message.reply_text("\n".join(lines))
+
+def watch(update, context):
+    """/watch <domaines> : surveillance périodique ; sans argument, liste les domaines surveillés."""
+    user_lang = get_user_language(update)
+    chat_id = update.effective_chat.id
+    domains = parse_domains(" ".join(context.args))
+    if not domains:
+        watched = watch_manager.watched(chat_id)
+        if watched:
+            update.message.reply_text(messages[user_lang]["watch_list"].format(", ".join(watched)))
+        else:
+            update.message.reply_text(messages[user_lang]["watch_empty"])
+        return
+
+    added, limit_reached = watch_manager.watch(chat_id, domains, user_lang)
+    if added:
+        update.message.reply_text(messages[user_lang]["watch_added"].format(", ".join(added)))
+    if limit_reached:
+        update.message.reply_text(messages[user_lang]["watch_limit"].format(watch_manager.max_per_user))
+
+def unwatch(update, context):
+    """/unwatch <domaines> : arrête la surveillance."""
+    user_lang = get_user_language(update)
+    domains = parse_domains(" ".join(context.args))
+    if not domains:
+        update.message.reply_text(messages[user_lang]["no_domains"])
+        return
+
+    removed = watch_manager.unwatch(update.effective_chat.id, domains)
+    if removed:
+        update.message.reply_text(messages[user_lang]["watch_removed"].format(", ".join(removed)))
+    missing = [d for d in domains if d not in removed]
+    if missing:
+        update.message.reply_text(messages[user_lang]["watch_not_watched"].format(", ".join(missing)))
+
+def progress_line(domain, result, user_lang):
+    if "error" in result:
+        return messages[user_lang]["progress_error"].format(domain, result["error"])
+    return messages[user_lang]["progress_done"].format(domain, result["gdpr_score"])
+
+def progress_text(header, lines, counter):
+    """
+    Message de progression : en-tête, domaines terminés et compteur. Pour
+    rester sous la limite de Telegram, seules les dernières lignes sont
+    gardées quand il y en a trop.
+    """
+    budget = TELEGRAM_MESSAGE_LIMIT - len(header) - len(counter) - 4
+    shown = []
+    for line in reversed(lines):
+        budget -= len(line) + 1
+        if budget < 0:
+            shown.append("…")
+            break
+        shown.append(line)
+    return "\n".join([header] + shown[::-1] + [counter])
+
+def run_scan(update, user_lang, domains, use_cache=True):
+    """Traitement d'une demande (worker de la file d'attente)."""
+    if not domains:
+        update.message.reply_text(messages[user_lang]["no_domains"])
+        return
+
+    # On informe qu'on analyse ; le message est mis à jour à chaque domaine terminé
+    total = len(dict.fromkeys(domains))
+    shown = ", ".join(list(dict.fromkeys(domains))[:REPORT_INTRO_MAX_DOMAINS])
+    if total > REPORT_INTRO_MAX_DOMAINS:
+        shown += ", … (+%d)" % (total - REPORT_INTRO_MAX_DOMAINS)
+    header = messages[user_lang]["analysis_in_progress"].format(shown)
+    progress = update.message.reply_text(header)
+    lines = []
+    last_edit = [0.0]
+
+    def on_result(domain, result):
+        lines.append(progress_line(domain, result, user_lang))
+        now = time.monotonic()
+        # Telegram limite la fréquence des modifications : le dernier domaine est toujours affiché
+        if len(lines) < total and now - last_edit[0] < PROGRESS_EDIT_INTERVAL:
+            return
+        last_edit[0] = now
+        counter = messages[user_lang]["progress_count"].format(len(lines), total)
+        try:
+            progress.edit_text(progress_text(header, lines, counter))
+        except Exception:
+            logger.warning("Échec de la mise à jour du message de progression", exc_info=True)
+
+    results = scan_engine.scan(domains, user_lang, use_cache=use_cache, on_result=on_result)
+
+    # Texte envoyé tout de suite, en autant de messages que nécessaire
+    for text in render_report_messages(build_report_model(domains, results, user_lang)):
+        update.message.reply_text(text, parse_mode="HTML")
+
+    # Puis le PDF : déjà envoyé (file_id), déjà rendu, ou rendu par le pool
+    send_report_pdf(update, user_lang, domains, results)
+
+def send_report_pdf(update, user_lang, domains, results):
+    """
+    Envoie le PDF du rapport. Avec le stockage des PDF, le rapport ne
+    dépend que des constats (voir report_key) : un rapport identique déjà
+    envoyé est renvoyé par son file_id Telegram (ni rendu, ni upload) ;
+    déjà rendu, il est lu depuis le stockage ; sinon il est rendu par le
+    pool, stocké, puis envoyé.
+    """
+    caption = messages[user_lang]["pdf_caption"]
+    model = build_report_model(domains, results, user_lang, reusable=report_store is not None)
+    key = report_key(model, results) if report_store is not None else None
+    artifact = report_store.get(key) if key is not None else None
+
+    def upload(file_name, pdf_file):
+        sent = update.message.reply_document(document=pdf_file, filename=file_name, caption=caption)
+        if key is not None and sent is not None and sent.document is not None:
+            report_store.set_file_id(key, sent.document.file_id)
+
+    if artifact is not None and artifact["file_id"]:
+        try:
+            update.message.reply_document(document=artifact["file_id"], caption=caption)
+            scan_stats.incr("reports.file_id")
+            return
+        except Exception:
+            logger.warning("file_id refusé par Telegram, nouvel envoi du PDF", exc_info=True)
+            report_store.forget_file_id(key)
+    if artifact is not None and artifact["path"]:
+        with open(artifact["path"], "rb") as pdf_file:
+            upload(artifact["file_name"], pdf_file)
+        scan_stats.incr("reports.stored")
+        return
+
+    def send_pdf(file_name, pdf_file):
+        if key is not None:
+            try:
+                report_store.put(key, file_name, pdf_file)
+            except (OSError, sqlite3.Error):
+                logger.warning("Échec de l'enregistrement du PDF", exc_info=True)
+            pdf_file.seek(0)
+        scan_stats.incr("reports.rendered")
+        upload(file_name, pdf_file)
+
+    def pdf_failed(exc):
+        update.message.reply_text(messages[user_lang]["pdf_error"])
+
+    if not pdf_renderer.submit(model, send_pdf, pdf_failed):
+        update.message.reply_text(messages[user_lang]["pdf_busy"])
+
+def main():
+    token = setting("TELEGRAM_BOT_TOKEN")
+    if not token:
+        sys.exit("TELEGRAM_BOT_TOKEN n'est pas défini : exporter le jeton fourni par @BotFather,"
+                 " ex: TELEGRAM_BOT_TOKEN=123456:ABC... python rgpdbot2.py")
+    # Import ici : l'analyse (et le mode batch) n'a pas besoin de telegram
+    from telegram.ext import Updater, CommandHandler, MessageHandler, Filters
+
+    updater = Updater(token, use_context=True)
+    dp = updater.dispatcher
+
+    dp.add_handler(CommandHandler("start", start))
+    dp.add_handler(CommandHandler("rescan", rescan))
+    dp.add_handler(CommandHandler("watch", watch))
+    dp.add_handler(CommandHandler("unwatch", unwatch))
+    dp.add_handler(CommandHandler("stats", stats))
+    dp.add_handler(MessageHandler(Filters.text & ~Filters.command, scan_domains))
+
+    warm_up_analysis()
+    if analysis_pool is not None:
+        analysis_pool.warm_up()
+    warm_up_pdf()
+    if setting("TRACE_LOG"):
+        metrics.enabled = metrics.trace = True
+    if setting("METRICS_ENABLED"):
+        metrics.add_collector(lambda: {"queue." + k: v for k, v in job_queue.stats().items()})
+        metrics.serve(setting("METRICS_HOST"), setting("METRICS_PORT"))
+    watch_manager.start(updater.bot)
+    updater.start_polling()
+    updater.idle()
+    watch_manager.shutdown()
+    if analysis_pool is not None:
+        analysis_pool.shutdown()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Configuration du bot et du scanner. Les constantes ci-dessous sont les
+valeurs par défaut.
+
+Les réglages qui dépendent du déploiement sont lus via setting() et se
+surchargent par variable d'environnement du même nom :
+    TELEGRAM_BOT_TOKEN, OPERATOR_CHAT_IDS, PDF_BACKEND, WKHTMLTOPDF_PATH,
+    PDF_FONT_DIRS, REPORT_STORE_DIR, HISTORY_DB, RESULT_COLUMNS_DIR,
+    SCAN_CACHE_DB, SCORING_RULES_PATH, TRACKER_DB_PATH, WATCH_DB,
+    SCAN_MAX_WORKERS, SCAN_MAX_PER_HOST, SCAN_DEADLINE, ANALYSIS_PROCESSES,
+    CRAWL_ENABLED, TRACE_LOG, METRICS_ENABLED, METRICS_HOST, METRICS_PORT
+Les objets partagés (historique, cache, moteur de scan, pool d'analyse...)
+sont créés à l'import et lisent ces réglages à ce moment-là : les
+variables doivent être définies avant le lancement. Les autres constantes
+(tailles de cache, délais HTTP, limites de la file, mise en page...) sont
+figées dans ce fichier.
+"""
+
+import os
+
+# ---------------------------------------------------------------------------
+# ------------------------ Configuration du Bot Telegram ---------------------
+# ---------------------------------------------------------------------------
+
+# Jeton fourni par @BotFather : jamais dans le code, uniquement par la
+# variable d'environnement TELEGRAM_BOT_TOKEN
+TELEGRAM_BOT_TOKEN = None
+
+# Rendu des PDF : "reportlab" (dans le processus, requirements.txt), "wkhtmltopdf"
+# (binaire externe via pdfkit), ou "auto" = reportlab s'il est installé, sinon
+# wkhtmltopdf (avec un avertissement au démarrage)
+PDF_BACKEND = "auto"
+# IMPORTANT : wkhtmltopdf doit être installé sur la machine s'il est utilisé
+WKHTMLTOPDF_PATH = r"C:\\Users\\cococe ltd\\Downloads\\wkhtmltopdf\\bin\\wkhtmltopdf.exe"
+PDF_RENDER_WORKERS = 2   # rendus PDF simultanés
+PDF_QUEUE_SIZE = 20      # rapports en attente au-delà desquels on refuse
+PDF_SPOOL_MAX_BYTES = 1024 * 1024  # PDF gardé en mémoire jusqu'à cette taille, sur disque au-delà
+# Polices TrueType du rendu reportlab, cherchées (dans l'ordre) dans ces
+# dossiers ; la police emoji (monochrome) sert aux icônes de risque
+PDF_FONT_DIRS = (
+    "static/fonts", "/usr/share/fonts", "/usr/local/share/fonts",
+    "/Library/Fonts", "/System/Library/Fonts", r"C:\Windows\Fonts",
+)
+PDF_FONTS = {
+    "regular": ("DejaVuSans.ttf", "NotoSans-Regular.ttf", "LiberationSans-Regular.ttf", "arial.ttf"),
+    "bold": ("DejaVuSans-Bold.ttf", "NotoSans-Bold.ttf", "LiberationSans-Bold.ttf", "arialbd.ttf"),
+    "italic": ("DejaVuSans-Oblique.ttf", "NotoSans-Italic.ttf", "LiberationSans-Italic.ttf", "ariali.ttf"),
+    "emoji": ("NotoEmoji-Regular.ttf", "NotoEmoji.ttf", "seguiemj.ttf", "Symbola.ttf", "OpenSansEmoji.ttf"),
+}
+
+# Rapports (texte Telegram et PDF), y compris de portefeuilles de milliers de domaines
+TELEGRAM_MESSAGE_LIMIT = 4096   # caractères max d'un message Telegram
+REPORT_INTRO_MAX_DOMAINS = 20   # domaines cités dans l'introduction (les autres : synthèse)
+REPORT_SUMMARY_MIN_DOMAINS = 2  # synthèse (tableau + sommaire) à partir de ce nombre de domaines
+REPORT_SUMMARY_ROWS = 50        # lignes par tableau de synthèse (mis en page au fil de l'eau)
+# PDF déjà rendus, réutilisés pour des résultats identiques (None pour désactiver)
+REPORT_STORE_DIR = "static/reports"
+REPORT_STORE_MAX_BYTES = 500 * 1024 * 1024  # quota disque (les moins récemment envoyés partent d'abord)
+REPORT_STORE_MAX_AGE = 7 * 24 * 3600        # secondes sans envoi avant suppression
+
+# Requêtes HTTP vers les sites analysés
+HTTP_HEADERS = {"User-Agent": "Mozilla/5.0"}
+HTTP_TIMEOUT = 10
+HTTP_MAX_PAGE_BYTES = 3 * 1024 * 1024  # au-delà, la page est tronquée
+HTTP_CHUNK_SIZE = 64 * 1024
+HTTP_HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+HTTP_POOL_CONNECTIONS = 100  # nombre d'hôtes gardés dans le pool keep-alive
+HTTP_POOL_MAXSIZE = 10       # connexions conservées par hôte
+HTTP_RETRIES = 2             # nouvelles tentatives (lecture, 429/5xx ; pas les échecs de connexion)
+HTTP_BACKOFF_FACTOR = 0.5    # backoff exponentiel entre les tentatives
+DNS_CACHE_TTL = 300          # secondes
+DNS_NEGATIVE_TTL = 30        # secondes (échecs de résolution)
+DNS_CACHE_SIZE = 4096
+
+# Détection de la langue des sites analysés
+LANG_SNIFF_CHARS = 8192      # début du document où chercher <html lang> / <meta>
+LANG_SAMPLE_CHARS = 1000     # texte visible transmis à langdetect
+LANG_CACHE_SIZE = 4096       # résultats de langdetect mémorisés (par empreinte du texte)
+
+# Instrumentation (durée des étapes, erreurs, tailles de page)
+METRICS_ENABLED = False        # endpoint Prometheus local (/metrics)
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+TRACE_LOG = False              # une ligne de log JSON par domaine analysé (logger "rgpdbot2.trace")
+
+# Scan concurrent des domaines
+SCAN_MAX_WORKERS = 8     # domaines analysés en parallèle (tous utilisateurs confondus)
+SCAN_MAX_PER_HOST = 2    # requêtes simultanées max vers un même hôte
+SCAN_DEADLINE = 60       # durée max (secondes) d'une demande complète
+
+# Analyse des pages (parsing, vérifications) dans un pool de processus
+ANALYSIS_PROCESSES = 0             # 0 : analyse dans les threads de scan (pas de pool)
+ANALYSIS_POOL_MIN_BYTES = 32 * 1024  # pages plus petites : analysées sur place
+
+# Cache des résultats d'analyse
+SCAN_CACHE_TTL = 3600    # secondes avant qu'un résultat soit considéré périmé
+SCAN_CACHE_SIZE = 1024   # entrées max en mémoire (éviction LRU)
+SCAN_CACHE_DB = None     # ex: "static/scan_cache.sqlite3" pour persister le cache
+
+# Historique de toutes les analyses (suivi de la conformité dans le temps)
+HISTORY_DB = "static/scan_history.sqlite3"   # None pour désactiver
+# Copie en colonnes de l'historique, pour recalculer les scores (rgpd_rescore.py)
+RESULT_COLUMNS_DIR = "static/result_columns"
+
+# Règles de score (pondérations, seuils de risque) : fichier JSON, ou None pour
+# les règles par défaut (DEFAULT_SCORING_RULES dans rgpd/scoring.py)
+SCORING_RULES_PATH = None
+
+# Crawl superficiel (facultatif) : pages de politique / mentions et quelques pages du site
+CRAWL_ENABLED = False
+CRAWL_MAX_PAGES = 6         # pages téléchargées en plus de la page d'accueil
+CRAWL_SAME_SITE_PAGES = 3   # dont pages "ordinaires" du site (hors politique / mentions)
+CRAWL_MAX_DEPTH = 2         # profondeur max depuis la page d'accueil
+CRAWL_BUDGET = 8            # secondes max par domaine
+CRAWL_WORKERS = 16          # téléchargements simultanés, tous domaines confondus
+
+# File d'attente des demandes d'analyse Telegram
+JOB_QUEUE_WORKERS = 4          # demandes traitées simultanément
+JOB_QUEUE_SIZE = 100           # demandes en attente max, tous utilisateurs confondus
+JOB_QUEUE_PER_USER = 3         # demandes en attente max par utilisateur
+RATE_LIMIT_REQUESTS = 10       # demandes max par utilisateur...
+RATE_LIMIT_WINDOW = 60         # ...sur cette fenêtre glissante (secondes)
+PROGRESS_EDIT_INTERVAL = 1.5   # secondes min entre deux mises à jour du message de progression
+OPERATOR_CHAT_IDS = set()      # conversations autorisées à utiliser /stats (vide = toutes ; env : "123,-456")
+
+# Surveillance périodique des domaines (/watch)
+WATCH_DB = "static/watch.sqlite3"
+WATCH_INTERVAL = 24 * 3600   # secondes entre deux analyses d'un domaine surveillé
+WATCH_JITTER = 600           # décalage aléatoire max (secondes) de chaque analyse
+WATCH_MAX_WORKERS = 4        # analyses de surveillance simultanées
+WATCH_MAX_PER_USER = 50      # domaines surveillés max par conversation
+
+# Base de signatures de traceurs tiers (voir l'en-tête du fichier pour le format)
+TRACKER_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "trackers.txt")
+
+def setting(name):
+    """
+    Valeur de configuration lue à l'exécution (et non à l'import) : variable
+    d'environnement du même nom si elle est définie, sinon la constante de
+    ce module, convertie dans le type de la constante (entier, booléen...).
+    Pour un chemin ou un texte, une valeur vide ou "none" donne None
+    (ex: HISTORY_DB=none désactive l'historique).
+    ex: TELEGRAM_BOT_TOKEN=... WKHTMLTOPDF_PATH=/usr/bin/wkhtmltopdf python rgpdbot2.py
+    """
+    default = globals()[name]
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    if default is None or isinstance(default, str):
+        return None if value.strip().lower() in ("", "none") else value
+    if isinstance(default, bool):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    if isinstance(default, tuple):
+        # Liste de chemins, séparés comme dans PATH (":" ou ";" sous Windows)
+        return tuple(part for part in value.split(os.pathsep) if part)
+    if isinstance(default, (set, frozenset)):
+        # Identifiants entiers séparés par des virgules (ex: OPERATOR_CHAT_IDS)
+        return {int(part) for part in value.replace(",", " ").split()}
+    return value
@@ -0,0 +1,829 @@
+# -*- coding: utf-8 -*-
+"""
+Moteur de scan : cache des résultats, historique SQLite, crawl
+superficiel et analyse concurrente de plusieurs domaines.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait,
+)
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from cachetools import LRUCache
+
+from rgpd.analysis import (
+    LINK_GONE_STATUSES, analyze_page, analyze_page_with_stages, analyze_snapshot, format_domain,
+    warm_up_analysis,
+)
+from rgpd.config import (
+    ANALYSIS_POOL_MIN_BYTES, ANALYSIS_PROCESSES,
+    CRAWL_BUDGET, CRAWL_MAX_DEPTH, CRAWL_MAX_PAGES, CRAWL_SAME_SITE_PAGES,
+    CRAWL_WORKERS, HISTORY_DB, SCAN_CACHE_DB, SCAN_CACHE_SIZE, SCAN_CACHE_TTL,
+    SCAN_MAX_PER_HOST, SCAN_MAX_WORKERS, setting,
+)
+from rgpd.fetch import cookie_identity, fetch_site, http_pool
+from rgpd.messages import messages
+from rgpd.metrics import metrics, scan_stats
+from rgpd.scoring import score_result
+
+try:
+    import resource  # Unix uniquement : pic RSS dans les métriques du scanner
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# ----------------- Cache des résultats (TTL + LRU, SQLite) -----------------
+# ---------------------------------------------------------------------------
+
+class ScanResultCache:
+    """
+    Cache des résultats d'analyse, indexé par l'URL normalisée (format_domain).
+    En mémoire : éviction LRU bornée, fraîcheur (TTL) vérifiée à la lecture.
+    Persistance SQLite optionnelle (db_path) pour que le cache survive aux
+    redémarrages du bot.
+    Une entrée périmée est conservée avec l'ETag / Last-Modified de la page :
+    elle sert à la revalidation conditionnelle (réponse 304 => même analyse).
+    Seules les analyses réussies sont mises en cache (les erreurs sont
+    localisées et souvent passagères).
+    """
+
+    def __init__(self, ttl=SCAN_CACHE_TTL, maxsize=SCAN_CACHE_SIZE, db_path=SCAN_CACHE_DB):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory = LRUCache(maxsize=maxsize)
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS scan_cache ("
+                " url TEXT PRIMARY KEY,"
+                " scanned_at REAL NOT NULL,"
+                " result TEXT NOT NULL)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(scan_cache)")}
+            for column in ("etag", "last_modified"):
+                if column not in columns:
+                    self._db.execute(f"ALTER TABLE scan_cache ADD COLUMN {column} TEXT")
+            self._db.commit()
+
+    def _entry(self, url):
+        """Entrée (fraîche ou non) depuis la mémoire, sinon depuis SQLite."""
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT result, scanned_at, etag, last_modified FROM scan_cache WHERE url = ?",
+                    (url,),
+                ).fetchone()
+                if row:
+                    entry = {
+                        "result": json.loads(row[0]),
+                        "scanned_at": row[1],
+                        "etag": row[2],
+                        "last_modified": row[3],
+                    }
+                    self._memory[url] = entry
+        return entry
+
+    def get(self, url):
+        """Renvoie (résultat, date du scan) si une entrée fraîche existe, sinon None."""
+        entry = self._entry(url)
+        # L'âge est recalculé à partir de la date du scan : une entrée rechargée
+        # depuis SQLite ne bénéficie pas d'un nouveau TTL complet
+        if entry is None or time.time() - entry["scanned_at"] >= self.ttl:
+            return None
+        return entry["result"], entry["scanned_at"]
+
+    def get_revalidation(self, url):
+        """Entrée (même périmée) revalidable par ETag / Last-Modified, sinon None."""
+        entry = self._entry(url)
+        if entry is None or not (entry["etag"] or entry["last_modified"]):
+            return None
+        return entry
+
+    def put(self, url, result, etag=None, last_modified=None):
+        scanned_at = time.time()
+        entry = {"result": result, "scanned_at": scanned_at, "etag": etag, "last_modified": last_modified}
+        with self._lock:
+            self._memory[url] = entry
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO scan_cache (url, scanned_at, result, etag, last_modified)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (url, scanned_at, json.dumps(result), etag, last_modified),
+                )
+                self._db.commit()
+        return scanned_at
+
+scan_cache = ScanResultCache(db_path=setting("SCAN_CACHE_DB"))
+
+# ---------------------------------------------------------------------------
+# ---------------- Historique des analyses (SQLite) --------------------------
+# ---------------------------------------------------------------------------
+
+# Champs d'un résultat propres à une réponse (et non à l'état du site)
+_HISTORY_VOLATILE_FIELDS = ("cached", "scanned_at")
+
+def snapshot_hash(snapshot):
+    """
+    Empreinte du contenu téléchargé : HTML, URL finale et cookies déposés
+    (tout ce dont dépend l'analyse de la page). L'expiration des cookies
+    n'y entre pas : elle change à chaque réponse (Max-Age, Expires).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(snapshot.final_url.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps([cookie_identity(c) for c in snapshot.cookies], sort_keys=True).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(snapshot.body.encode("utf-8", errors="replace"))
+    return digest.hexdigest()
+
+class ScanHistory:
+    """
+    Historique persistant des analyses, un enregistrement par analyse et
+    par domaine (indexé par l'URL normalisée, comme le cache) :
+    - table domains : dernier résultat complet, dernière empreinte du
+      contenu et dernier score de chaque domaine
+    - table scans : une ligne par analyse, avec le score et seulement les
+      champs qui ont changé depuis l'analyse précédente (JSON)
+    Les index (domaine, date) et (date) gardent rapides l'historique d'un
+    domaine et la recherche des scores en baisse, même avec des millions
+    de lignes. La base n'est ouverte qu'à la première utilisation.
+    """
+
+    def __init__(self, db_path=HISTORY_DB):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connect(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS domains ("
+                " id INTEGER PRIMARY KEY,"
+                " url TEXT NOT NULL UNIQUE,"
+                " last_scanned_at REAL NOT NULL,"
+                " last_score INTEGER,"
+                " last_hash TEXT,"
+                " last_result TEXT NOT NULL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS scans ("
+                " id INTEGER PRIMARY KEY,"
+                " domain_id INTEGER NOT NULL REFERENCES domains(id),"
+                " scanned_at REAL NOT NULL,"
+                " gdpr_score INTEGER,"
+                " content_hash TEXT,"
+                " changes TEXT NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS scans_domain_time ON scans (domain_id, scanned_at)")
+            db.execute("CREATE INDEX IF NOT EXISTS scans_time ON scans (scanned_at)")
+            db.execute("CREATE INDEX IF NOT EXISTS domains_last_scan ON domains (last_scanned_at)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    def last(self, url):
+        """Dernier enregistrement d'un domaine : (résultat, empreinte du contenu), sinon None."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT last_result, last_hash FROM domains WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def record(self, url, result, content_hash=None, scanned_at=None):
+        """Enregistre une analyse ; seuls les champs modifiés sont écrits dans scans."""
+        scanned_at = time.time() if scanned_at is None else scanned_at
+        state = {k: v for k, v in result.items() if k not in _HISTORY_VOLATILE_FIELDS}
+        score = state.get("gdpr_score")
+        with self._lock:
+            db = self._connect()
+            row = db.execute("SELECT id, last_result FROM domains WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                changes = state
+                domain_id = db.execute(
+                    "INSERT INTO domains (url, last_scanned_at, last_score, last_hash, last_result)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (url, scanned_at, score, content_hash, json.dumps(state)),
+                ).lastrowid
+            else:
+                domain_id, previous = row[0], json.loads(row[1])
+                changes = {k: v for k, v in state.items() if k not in previous or previous[k] != v}
+                # Champs disparus (ex: "error" quand le site redevient accessible)
+                removed = [k for k in previous if k not in state]
+                if removed:
+                    changes["_removed"] = removed
+                db.execute(
+                    "UPDATE domains SET last_scanned_at = ?, last_score = ?, last_hash = ?,"
+                    " last_result = ? WHERE id = ?",
+                    (scanned_at, score, content_hash, json.dumps(state), domain_id),
+                )
+            db.execute(
+                "INSERT INTO scans (domain_id, scanned_at, gdpr_score, content_hash, changes)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (domain_id, scanned_at, score, content_hash, json.dumps(changes)),
+            )
+            db.commit()
+
+    def score_history(self, url, since=None, until=None):
+        """[(date, score)] d'un domaine, du plus ancien au plus récent (score None = erreur)."""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT s.scanned_at, s.gdpr_score FROM scans s JOIN domains d ON d.id = s.domain_id"
+                " WHERE d.url = ? AND s.scanned_at >= ? AND s.scanned_at < ?"
+                " ORDER BY s.scanned_at",
+                (url, since or 0, until or float("inf")),
+            ).fetchall()
+
+    def result_history(self, url):
+        """(date, résultat complet) de chaque analyse d'un domaine, reconstitués depuis les changements."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT s.scanned_at, s.changes FROM scans s JOIN domains d ON d.id = s.domain_id"
+                " WHERE d.url = ? ORDER BY s.scanned_at",
+                (url,),
+            ).fetchall()
+        state = {}
+        for scanned_at, changes in rows:
+            changes = json.loads(changes)
+            for key in changes.pop("_removed", ()):
+                state.pop(key, None)
+            state.update(changes)
+            yield scanned_at, dict(state)
+
+    def iter_scans(self, after_id=0, batch_size=10000):
+        """
+        (id, url, date, score, changements JSON) de chaque analyse
+        d'identifiant > after_id, dans l'ordre d'enregistrement, lues par
+        lots (sert à la copie en colonnes de rgpd.scoring.ResultColumns).
+        """
+        while True:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT s.id, d.url, s.scanned_at, s.gdpr_score, s.changes"
+                    " FROM scans s JOIN domains d ON d.id = s.domain_id"
+                    " WHERE s.id > ? ORDER BY s.id LIMIT ?",
+                    (after_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            after_id = rows[-1][0]
+
+    def score_drops(self, since):
+        """
+        Domaines dont le score a baissé depuis `since` (timestamp) :
+        [(url, score de référence, dernier score)]. La référence est le
+        dernier score connu avant `since`, ou à défaut le premier de la période.
+        """
+        with self._lock:
+            return self._connect().execute(
+                "SELECT url, baseline, last_score FROM ("
+                "  SELECT d.url, d.last_score, COALESCE("
+                "   (SELECT s.gdpr_score FROM scans s WHERE s.domain_id = d.id"
+                "     AND s.scanned_at < :since AND s.gdpr_score IS NOT NULL"
+                "     ORDER BY s.scanned_at DESC LIMIT 1),"
+                "   (SELECT s.gdpr_score FROM scans s WHERE s.domain_id = d.id"
+                "     AND s.scanned_at >= :since AND s.gdpr_score IS NOT NULL"
+                "     ORDER BY s.scanned_at LIMIT 1)) AS baseline"
+                "  FROM domains d WHERE d.last_scanned_at >= :since AND d.last_score IS NOT NULL"
+                " ) WHERE baseline > last_score ORDER BY baseline - last_score DESC",
+                {"since": since},
+            ).fetchall()
+
+scan_history = ScanHistory(setting("HISTORY_DB")) if setting("HISTORY_DB") else None
+
+# ---------------------------------------------------------------------------
+# ------------- Crawl superficiel (politique, mentions, sous-pages) ----------
+# ---------------------------------------------------------------------------
+
+# Liens qui ne mènent pas à une page web
+_SKIPPED_LINK_PREFIXES = ("mailto:", "tel:", "javascript:", "data:", "#")
+# Extensions jamais suivies comme page "ordinaire" du site
+_NON_PAGE_EXTENSION_RE = re.compile(
+    r"\.(?:pdf|jpe?g|png|gif|svg|webp|ico|zip|gz|rar|mp3|mp4|avi|docx?|xlsx?|pptx?|css|js)$", re.I
+)
+
+def _site_host(url):
+    """Hôte sans "www." : www.exemple.fr et exemple.fr sont le même site."""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+@contextlib.contextmanager
+def _page_in_memory(size):
+    """Compte les octets d'une page téléchargée tant qu'elle est analysée."""
+    inflight = scan_stats.incr("pages.inflight_bytes", size)
+    scan_stats.set_max("pages.inflight_bytes_peak", inflight)
+    scan_stats.set_max("pages.max_bytes", size)
+    metrics.observe_inflight_bytes(inflight)
+    try:
+        yield
+    finally:
+        scan_stats.incr("pages.inflight_bytes", -size)
+
+@dataclass
+class CrawledPage:
+    """Une page téléchargée par le crawl et ce qu'on y a trouvé."""
+    url: str
+    kind: str                 # "privacy", "legal" ou "page"
+    depth: int
+    status: object            # code HTTP, ou None si inaccessible
+    final_url: str = None
+    findings: dict = None     # page_findings(), None si la page n'est pas du HTML
+    cookies: list = field(default_factory=list)
+    size: int = 0             # octets du corps téléchargés
+
+class ShallowCrawler:
+    """
+    Crawl superficiel d'un site à partir de sa page d'accueil :
+    - suit en priorité les liens de politique de confidentialité et de
+      mentions légales (pour vérifier qu'ils existent), puis quelques pages
+      du même site (bandeau cookies ou traceurs chargés sur les sous-pages)
+    - frontière bornée en profondeur et en nombre de pages, URL dédoublonnées
+    - pages téléchargées en parallèle sur un pool de threads partagé par
+      tous les crawls (et sur le pool HTTP keep-alive) ; les liens d'une page
+      sont suivis dès qu'elle arrive, sans attendre les pages plus lentes
+    - budget de temps par domaine, borné par l'échéance de la demande : les
+      pages non terminées sont abandonnées
+    - chaque téléchargement prend un créneau de son hôte (host_slot, fourni
+      par le ScanEngine qui utilise le crawler) : le crawl d'un domaine ne
+      dépasse pas SCAN_MAX_PER_HOST requêtes simultanées vers un même hôte
+    """
+
+    def __init__(self, max_pages=CRAWL_MAX_PAGES, same_site_pages=CRAWL_SAME_SITE_PAGES,
+                 max_depth=CRAWL_MAX_DEPTH, budget=CRAWL_BUDGET, workers=CRAWL_WORKERS,
+                 analysis_pool=None):
+        self.max_pages = max_pages
+        self.same_site_pages = same_site_pages
+        self.max_depth = max_depth
+        self.budget = budget
+        self._analyze = analysis_pool.analyze if analysis_pool is not None else analyze_page
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crawl")
+        # host_slot(url, deadline_at) -> contexte qui vaut True une fois le
+        # créneau de l'hôte obtenu (ScanEngine.host_slot) ; None : pas de limite
+        self.host_slot = None
+
+    def crawl(self, snapshot, links, findings, deadline_at=None):
+        """
+        Pages visitées (liste de CrawledPage, dans l'ordre du parcours) à
+        partir de la page d'accueil déjà analysée (links : ses liens).
+        deadline_at : échéance (time.monotonic) de la demande, qui borne
+        aussi le budget du crawl.
+        """
+        budget_at = time.monotonic() + self.budget
+        if deadline_at is not None:
+            budget_at = min(budget_at, deadline_at)
+        state = {
+            "site": _site_host(snapshot.final_url),
+            "seen": {urldefrag(snapshot.url)[0], urldefrag(snapshot.final_url)[0]},
+            "queued": 0,
+            "same_site": 0,
+            "privacy": False,
+            "legal": False,
+        }
+
+        pages = []
+        pending = {
+            self._executor.submit(self._fetch, url, kind, 1, budget_at)
+            for url, kind in self._discover(state, snapshot.final_url, links, findings)
+        }
+        while pending:
+            remaining = budget_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                crawled, links = future.result()
+                pages.append(crawled)
+                metrics.observe_fetch(crawled.size)
+                if crawled.findings is not None and crawled.depth < self.max_depth:
+                    for url, kind in self._discover(state, crawled.final_url, links, crawled.findings):
+                        pending.add(self._executor.submit(self._fetch, url, kind, crawled.depth + 1, budget_at))
+        # Budget épuisé : les pages encore en attente sont abandonnées
+        for future in pending:
+            future.cancel()
+        return pages
+
+    def _discover(self, state, base_url, links, findings):
+        """Prochaines URL à visiter depuis une page : (url, type)."""
+        candidates = []
+        for kind, key in (("privacy", "privacy_policy"), ("legal", "legal_mentions")):
+            if not state[kind] and findings[key]:
+                candidates.append((findings[key], kind))
+        candidates += [(href, "page") for href, _ in links]
+
+        found = []
+        for href, kind in candidates:
+            if state["queued"] >= self.max_pages:
+                break
+            href = href.strip()
+            if not href or href.lower().startswith(_SKIPPED_LINK_PREFIXES):
+                continue
+            url = urldefrag(urljoin(base_url, href))[0]
+            if not url.startswith(("http://", "https://")) or url in state["seen"]:
+                continue
+            if kind == "page":
+                # Pages ordinaires : même site, pas de fichiers, quota limité
+                if state["same_site"] >= self.same_site_pages:
+                    continue
+                if _site_host(url) != state["site"] or _NON_PAGE_EXTENSION_RE.search(urlparse(url).path):
+                    continue
+                state["same_site"] += 1
+            else:
+                state[kind] = True
+            state["seen"].add(url)
+            state["queued"] += 1
+            found.append((url, kind))
+        return found
+
+    def _fetch(self, url, kind, depth, budget_at):
+        """
+        Télécharge et analyse une page : (CrawledPage, liens de la page).
+        Sans créneau de l'hôte avant budget_at, la page n'est pas téléchargée.
+        """
+        try:
+            with self._slot(url, budget_at) as acquired:
+                if not acquired:
+                    return CrawledPage(url, kind, depth, status=None), []
+                # Une politique en PDF existe bien : seule une page ordinaire doit être du HTML
+                snapshot = fetch_site(url, html_only=(kind == "page"),
+                                      error_statuses=() if kind == "page" else LINK_GONE_STATUSES)
+            if snapshot is None:
+                return CrawledPage(url, kind, depth, status=None), []
+            crawled = CrawledPage(url, kind, depth, status=snapshot.status_code,
+                                  final_url=snapshot.final_url, cookies=snapshot.cookies,
+                                  size=snapshot.size)
+            if not snapshot.body:
+                return crawled, []
+            with _page_in_memory(snapshot.size):
+                crawled.findings, links = self._analyze(snapshot.body, snapshot.headers)
+            return crawled, links
+        except Exception:
+            logger.exception("Échec du crawl de %s", url)
+            return CrawledPage(url, kind, depth, status=None), []
+
+    def _slot(self, url, budget_at):
+        if self.host_slot is None:
+            return contextlib.nullcontext(time.monotonic() < budget_at)
+        return self.host_slot(url, budget_at)
+
+# ---------------------------------------------------------------------------
+# -------------- Analyse des pages dans un pool de processus ----------------
+# ---------------------------------------------------------------------------
+
+class AnalysisPool:
+    """
+    Exécute la partie CPU de l'analyse (analyze_page : parsing, langue,
+    mots-clés, traceurs) dans un pool de processus, hors du GIL partagé
+    par les threads de scan :
+    - processus lancés en "spawn" (sûr malgré les threads du scanner, et
+      seul mode disponible sous Windows), préchauffés une fois chacun par
+      warm_up_analysis (profils langdetect, matchers, signatures)
+    - seules les pages d'au moins min_bytes caractères y partent : en
+      dessous, l'aller-retour coûte plus que l'analyse, faite sur place
+    - échanges compacts : le HTML et l'en-tête Content-Language à l'aller,
+      les constats (et les liens, s'ils servent au crawl) au retour, avec
+      la durée des étapes (langdetect, parse, checks), reportée dans les
+      métriques et la trace du processus principal
+    Si un processus meurt, la page est analysée sur place et le pool recréé.
+    """
+
+    def __init__(self, processes=ANALYSIS_PROCESSES, min_bytes=ANALYSIS_POOL_MIN_BYTES):
+        self.processes = processes
+        self.min_bytes = min_bytes
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=warm_up_analysis,
+                )
+            return self._executor
+
+    def warm_up(self):
+        """Démarre et préchauffe tous les processus (sinon : à la première grosse page)."""
+        pool = self._pool()
+        for future in [pool.submit(os.getpid) for _ in range(self.processes)]:
+            future.result()
+
+    def analyze(self, html_content, headers=None, with_links=True):
+        """Même contrat qu'analyze_page, dans le pool si la page est assez grosse."""
+        if len(html_content) < self.min_bytes:
+            scan_stats.incr("analysis.inline")
+            return analyze_page(html_content, headers, with_links)
+
+        language = headers.get("content-language") if headers else None
+        compact_headers = {"content-language": language} if language else None
+        pool = self._pool()
+        try:
+            with metrics.stage("analysis_pool"):
+                findings, links, stages = pool.submit(
+                    analyze_page_with_stages, html_content, compact_headers, with_links).result()
+        except BrokenProcessPool:
+            logger.exception("Pool d'analyse hors service, recréé ; analyse sur place")
+            with self._lock:
+                if self._executor is pool:
+                    self._executor = None
+            pool.shutdown(wait=False)
+            scan_stats.incr("analysis.inline")
+            return analyze_page(html_content, headers, with_links)
+        scan_stats.incr("analysis.pool")
+        if metrics.enabled:
+            for name, seconds in stages.items():
+                metrics.observe_stage(name, seconds)
+        return findings, links
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+analysis_pool = AnalysisPool(setting("ANALYSIS_PROCESSES")) if setting("ANALYSIS_PROCESSES") else None
+
+# ---------------------------------------------------------------------------
+# ------------------- Moteur de scan concurrent multi-domaines ---------------
+# ---------------------------------------------------------------------------
+
+def analyze_domain(domain, user_lang, crawler=None):
+    """
+    Analyse complète d'un domaine : téléchargement, vérifications et score.
+    Renvoie le dictionnaire de résultats affiché dans le texte et le PDF.
+    """
+    snapshot = fetch_site(format_domain(domain))
+    if snapshot is None or not snapshot.body:
+        return {"error": messages[user_lang]["domain_inaccessible"]}
+    return analyze_snapshot(snapshot, crawler)
+
+class ScanEngine:
+    """
+    Analyse plusieurs domaines en parallèle sur un pool de threads borné :
+    - plafond global (taille du pool, partagé par toutes les demandes)
+    - plafond par hôte, pour ne pas marteler un même serveur : un créneau
+      par téléchargement (page d'accueil et pages du crawl), libéré avant
+      l'analyse
+    - échéance globale par demande ; les domaines non terminés à temps
+      sont signalés comme tels
+    - cache de résultats optionnel devant l'analyse de chaque domaine
+    - crawl superficiel optionnel (ShallowCrawler) après la page d'accueil
+    - pool de processus optionnel (AnalysisPool) pour l'analyse des pages
+    - historique optionnel (ScanHistory) : chaque analyse y est enregistrée,
+      et une page dont le contenu n'a pas changé n'est pas ré-analysée
+    L'ordre du dictionnaire de résultats suit celui des domaines demandés,
+    le texte et le PDF sont donc identiques à ceux d'un scan séquentiel.
+    """
+
+    def __init__(self, max_workers=SCAN_MAX_WORKERS, max_per_host=SCAN_MAX_PER_HOST, cache=None,
+                 crawler=None, history=None, analysis_pool=None):
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.cache = cache
+        self.crawler = crawler
+        self.history = history
+        self.analysis_pool = analysis_pool
+        self._analyze_page = analysis_pool.analyze if analysis_pool is not None else analyze_page
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scan")
+        # Un sémaphore par hôte, libéré automatiquement quand plus personne ne l'utilise
+        self._host_slots = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        if crawler is not None:
+            crawler.host_slot = self.host_slot
+
+    def _host_slot(self, url):
+        host = (urlparse(url).hostname or url).lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_per_host)
+                self._host_slots[host] = slot
+        return slot
+
+    @contextlib.contextmanager
+    def host_slot(self, url, deadline_at=None):
+        """
+        Un des max_per_host créneaux de l'hôte de url pendant le bloc. Le
+        contexte vaut False (sans créneau) si deadline_at passe avant.
+        """
+        slot = self._host_slot(url)
+        if deadline_at is None:
+            acquired = slot.acquire()
+        else:
+            acquired = slot.acquire(timeout=max(deadline_at - time.monotonic(), 0))
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                slot.release()
+
+    def _scan_one(self, domain, user_lang, deadline_at, use_cache):
+        url = format_domain(domain)
+        if use_cache and self.cache is not None:
+            cached = self.cache.get(url)
+            if cached is not None:
+                result, scanned_at = cached
+                return dict(score_result(result), cached=True, scanned_at=scanned_at)
+
+        metrics.begin_trace(domain)
+        result = None
+        try:
+            with metrics.stage("scan"):
+                result = self._fetch_and_analyze(url, user_lang, deadline_at, use_cache)
+            return result
+        except Exception:
+            logger.exception("Échec de l'analyse de %s", domain)
+            metrics.error("analysis")
+            result = {"error": messages[user_lang]["domain_inaccessible"]}
+            return result
+        finally:
+            metrics.end_trace(result)
+
+    def _fetch_and_analyze(self, url, user_lang, deadline_at, use_cache):
+        # Entrée périmée avec ETag / Last-Modified : requête conditionnelle
+        previous = None
+        if use_cache and self.cache is not None:
+            previous = self.cache.get_revalidation(url)
+
+        with self.host_slot(url, deadline_at) as acquired:
+            if not acquired:
+                metrics.error("scan_timeout")
+                return {"error": messages[user_lang]["scan_timeout"]}
+            with metrics.stage("download"):
+                if previous is not None:
+                    scan_stats.incr("revalidation.requests")
+                    snapshot = fetch_site(url, etag=previous["etag"], last_modified=previous["last_modified"])
+                else:
+                    snapshot = fetch_site(url)
+        if snapshot is None:
+            result = {"error": messages[user_lang]["domain_inaccessible"]}
+            if self.history is not None:
+                self.history.record(url, result)
+            return result
+
+        # Mémoire des pages en cours d'analyse (octets téléchargés)
+        metrics.observe_fetch(snapshot.size)
+        with _page_in_memory(snapshot.size):
+            return self._analyze(url, user_lang, snapshot, previous, deadline_at, use_cache)
+
+    def _analyze(self, url, user_lang, snapshot, previous, deadline_at, use_cache):
+        last = self.history.last(url) if self.history is not None else None
+        content_hash = None
+        if previous is not None and snapshot.status_code == 304:
+            # Page inchangée : on réutilise l'analyse stockée (re-scorée si les règles ont changé)
+            scan_stats.incr("revalidation.not_modified")
+            result = score_result(previous["result"])
+            etag = snapshot.headers.get("etag") or previous["etag"]
+            last_modified = snapshot.headers.get("last-modified") or previous["last_modified"]
+            content_hash = last[1] if last is not None else None
+        else:
+            if previous is not None:
+                scan_stats.incr("revalidation.modified")
+            if not snapshot.body:
+                return {"error": messages[user_lang]["domain_inaccessible"]}
+            result = None
+            if self.history is not None:
+                content_hash = snapshot_hash(snapshot)
+                if use_cache:
+                    result = self._unchanged_result(last, content_hash)
+            if result is None:
+                result = analyze_snapshot(snapshot, self.crawler, deadline_at, self._analyze_page)
+            etag = snapshot.headers.get("etag")
+            last_modified = snapshot.headers.get("last-modified")
+
+        if self.cache is not None:
+            scanned_at = self.cache.put(url, result, etag=etag, last_modified=last_modified)
+        else:
+            scanned_at = time.time()
+        if self.history is not None:
+            self.history.record(url, result, content_hash, scanned_at)
+        return dict(result, cached=False, scanned_at=scanned_at)
+
+    def _unchanged_result(self, last, content_hash):
+        """Dernière analyse de l'historique si le contenu téléchargé est identique, sinon None."""
+        if last is None:
+            return None
+        result, last_hash = last
+        if last_hash != content_hash or "error" in result:
+            return None
+        # Analyse faite dans l'autre mode (avec / sans crawl) : à refaire
+        if ("crawl" in result) != (self.crawler is not None):
+            return None
+        scan_stats.incr("history.unchanged")
+        # Règles de score modifiées depuis : mêmes constats, score recalculé
+        return score_result(result)
+
+    def stats(self):
+        """
+        Métriques du scanner : pool HTTP, cache DNS, revalidations
+        conditionnelles et mémoire des pages (pic des octets en cours
+        d'analyse, plus grosse page, pic RSS du processus). Les mêmes
+        mesures par domaine figurent dans les traces (TRACE_LOG).
+        """
+        stats = http_pool.stats()
+        requests_count = scan_stats.get("revalidation.requests")
+        not_modified = scan_stats.get("revalidation.not_modified")
+        stats.update({
+            "revalidation_requests": requests_count,
+            "revalidation_not_modified": not_modified,
+            "revalidation_modified": scan_stats.get("revalidation.modified"),
+            "revalidation_hit_ratio": not_modified / requests_count if requests_count else 0.0,
+            "history_unchanged": scan_stats.get("history.unchanged"),
+            "analysis_pool_pages": scan_stats.get("analysis.pool"),
+            "analysis_inline_pages": scan_stats.get("analysis.inline"),
+            "pages_truncated": scan_stats.get("pages.truncated"),
+            "pages_rejected": scan_stats.get("pages.rejected"),
+            "page_bytes_inflight_peak": scan_stats.get("pages.inflight_bytes_peak"),
+            "page_bytes_max": scan_stats.get("pages.max_bytes"),
+            "process_peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+        })
+        return stats
+
+    def scan(self, domains, user_lang, deadline=None, use_cache=True, on_result=None):
+        """
+        Renvoie {domaine: résultat} dans l'ordre des domaines demandés, en
+        deadline secondes au plus (défaut : SCAN_DEADLINE).
+        use_cache=False force une nouvelle analyse (le résultat frais
+        remplace alors l'entrée du cache).
+        on_result(domaine, résultat) est appelé dans le thread appelant à
+        chaque domaine terminé, dans l'ordre de fin (suivi de progression).
+        """
+        if deadline is None:
+            deadline = setting("SCAN_DEADLINE")
+        deadline_at = time.monotonic() + deadline
+        futures = {
+            domain: self._executor.submit(self._scan_one, domain, user_lang, deadline_at, use_cache)
+            for domain in dict.fromkeys(domains)
+        }
+        if on_result is None:
+            wait(futures.values(), timeout=deadline)
+        else:
+            by_future = {future: domain for domain, future in futures.items()}
+            try:
+                for future in as_completed(by_future, timeout=deadline):
+                    on_result(by_future[future], future.result())
+            except FuturesTimeoutError:
+                pass
+
+        results = {}
+        for domain, future in futures.items():
+            if future.done():
+                results[domain] = future.result()
+            else:
+                future.cancel()
+                metrics.error("scan_timeout")
+                results[domain] = {"error": messages[user_lang]["scan_timeout"]}
+        return results
+
+    def scan_iter(self, domains, user_lang, window=None, use_cache=True):
+        """
+        Analyse un flux de domaines (éventuellement très long, sans échéance)
+        et produit (domaine, résultat) au fil de l'eau, dans l'ordre de fin.
+        Au plus `window` analyses sont soumises à la fois : la mémoire reste
+        bornée quel que soit le nombre de domaines.
+        """
+        window = window or self.max_workers * 2
+        pending = {}
+        for domain in domains:
+            if len(pending) >= window:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+            future = self._executor.submit(self._scan_one, domain, user_lang, None, use_cache)
+            pending[future] = domain
+        for future in as_completed(list(pending)):
+            yield pending.pop(future), future.result()
+
+scan_engine = ScanEngine(
+    max_workers=setting("SCAN_MAX_WORKERS"),
+    max_per_host=setting("SCAN_MAX_PER_HOST"),
+    cache=scan_cache,
+    crawler=ShallowCrawler(analysis_pool=analysis_pool) if setting("CRAWL_ENABLED") else None,
+    history=scan_history,
+    analysis_pool=analysis_pool,
+)
@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+"""
+Couche HTTP du scanner : pool de connexions keep-alive partagé, cache
+DNS, et téléchargement en flux d'une page (SiteSnapshot).
+"""
+
+import codecs
+import re
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+
+import charset_normalizer
+import requests
+import urllib3
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from rgpd.config import (
+    DNS_CACHE_SIZE, DNS_CACHE_TTL, DNS_NEGATIVE_TTL, HTTP_BACKOFF_FACTOR, HTTP_CHUNK_SIZE,
+    HTTP_HEADERS, HTTP_HTML_CONTENT_TYPES, HTTP_MAX_PAGE_BYTES, HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE, HTTP_RETRIES, HTTP_TIMEOUT,
+)
+from rgpd.metrics import metrics, scan_stats
+
+# ---------------------------------------------------------------------------
+# ------------------ Couche HTTP partagée (pool keep-alive) -----------------
+# ---------------------------------------------------------------------------
+
+class DnsCache:
+    """
+    Cache DNS borné (TTL) pour les connexions du scanner. Les échecs de
+    résolution sont aussi mémorisés, plus brièvement, pour que les
+    nouvelles tentatives sur un domaine inexistant échouent immédiatement.
+    """
+
+    def __init__(self, ttl=DNS_CACHE_TTL, negative_ttl=DNS_NEGATIVE_TTL, maxsize=DNS_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._addresses = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._failures = TTLCache(maxsize=maxsize, ttl=negative_ttl)
+
+    def resolve(self, host, port):
+        key = (host, port)
+        with self._lock:
+            addresses = self._addresses.get(key)
+            failure = self._failures.get(key)
+        if addresses is not None:
+            scan_stats.incr("dns.hits")
+            return addresses
+        if failure is not None:
+            scan_stats.incr("dns.hits")
+            raise failure
+
+        scan_stats.incr("dns.misses")
+        try:
+            with metrics.stage("dns"):
+                infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        except socket.gaierror as exc:
+            metrics.error("dns")
+            with self._lock:
+                self._failures[key] = exc
+            raise
+        # Adresses uniques, dans l'ordre renvoyé par le résolveur
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._addresses[key] = addresses
+        return addresses
+
+    def create_connection(self, address, *args, **kwargs):
+        """urllib3.util.connection.create_connection, avec résolution par le cache."""
+        host, port = address
+        error = None
+        for ip in self.resolve(host, port):
+            try:
+                return urllib3.util.connection.create_connection((ip, port), *args, **kwargs)
+            except OSError as exc:
+                error = exc
+        raise error or OSError("getaddrinfo returns an empty list")
+
+class _CachedDnsConnectionMixin:
+    """
+    Ouverture du socket par le DnsCache du pool (attribut de classe posé par
+    _pool_classes) : seules les connexions du scanner passent par le cache,
+    urllib3 n'est pas modifié pour le reste du processus. Le SNI TLS reste
+    sur le nom d'hôte.
+    """
+    dns_cache = None
+
+    def _new_conn(self):
+        extra_kw = {}
+        if self.source_address:
+            extra_kw["source_address"] = self.source_address
+        if self.socket_options:
+            extra_kw["socket_options"] = self.socket_options
+        try:
+            return self.dns_cache.create_connection((self._dns_host, self.port), self.timeout, **extra_kw)
+        except socket.timeout:
+            raise urllib3.exceptions.ConnectTimeoutError(
+                self, "Connection to %s timed out. (connect timeout=%s)" % (self.host, self.timeout))
+        except OSError as exc:
+            raise urllib3.exceptions.NewConnectionError(
+                self, "Failed to establish a new connection: %s" % exc)
+
+class _CountingHTTPConnection(_CachedDnsConnectionMixin, urllib3.connection.HTTPConnection):
+    def _new_conn(self):
+        scan_stats.incr("http.pool_misses")
+        # Connexion TCP (résolution DNS comprise, mesurée aussi à part)
+        with metrics.stage("tcp_connect"):
+            return super()._new_conn()
+
+class _CountingHTTPSConnection(_CachedDnsConnectionMixin, urllib3.connection.HTTPSConnection):
+    _tcp_elapsed = 0.0
+
+    def _new_conn(self):
+        scan_stats.incr("http.pool_misses")
+        if not metrics.enabled:
+            return super()._new_conn()
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self._tcp_elapsed = time.perf_counter() - start
+            metrics.observe_stage("tcp_connect", self._tcp_elapsed)
+
+    def connect(self):
+        if not metrics.enabled:
+            return super().connect()
+        # connect() = _new_conn() (TCP) + poignée de main TLS
+        start = time.perf_counter()
+        self._tcp_elapsed = 0.0
+        try:
+            super().connect()
+        finally:
+            metrics.observe_stage("tls", time.perf_counter() - start - self._tcp_elapsed)
+
+class _CountingHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+    def _get_conn(self, timeout=None):
+        scan_stats.incr("http.pool_requests")
+        return super()._get_conn(timeout)
+
+class _CountingHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+    def _get_conn(self, timeout=None):
+        scan_stats.incr("http.pool_requests")
+        return super()._get_conn(timeout)
+
+def _pool_classes(dns_cache):
+    """Classes de pool par schéma, dont les connexions résolvent les noms via `dns_cache`."""
+    classes = {}
+    for scheme, pool_cls in (("http", _CountingHTTPConnectionPool), ("https", _CountingHTTPSConnectionPool)):
+        conn_cls = type(pool_cls.ConnectionCls.__name__, (pool_cls.ConnectionCls,), {"dns_cache": dns_cache})
+        classes[scheme] = type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": conn_cls})
+    return classes
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter dont les pools comptent les connexions créées / réutilisées
+    et résolvent les noms via le DnsCache de l'adaptateur.
+    """
+
+    def __init__(self, dns_cache, **kwargs):
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _pool_classes(self.dns_cache)
+
+class HttpSessionPool:
+    """
+    Sous-système HTTP partagé par tous les scans (thread-safe) :
+    - un seul adaptateur (pools de connexions keep-alive par hôte)
+    - politique de nouvelles tentatives avec backoff exponentiel (lecture
+      et statuts 429/5xx ; jamais sur un échec de connexion, pour qu'un
+      hôte mort ne coûte qu'un seul délai de connexion)
+    - cache DNS propre aux connexions de ce pool
+    Chaque scan obtient une session neuve (cookie jar vierge, indispensable
+    pour mesurer les cookies du site) qui réutilise les connexions du pool.
+    """
+
+    def __init__(self, pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                 retries=HTTP_RETRIES, backoff_factor=HTTP_BACKOFF_FACTOR):
+        retry = Retry(
+            total=retries,
+            connect=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        self.dns_cache = DnsCache()
+        self.adapter = _CountingHTTPAdapter(
+            self.dns_cache, pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry
+        )
+
+    def session(self):
+        """
+        Nouvelle session branchée sur le pool partagé.
+        Ne pas appeler session.close() : cela fermerait le pool commun.
+        """
+        session = requests.Session()
+        session.headers.update(HTTP_HEADERS)
+        session.mount("http://", self.adapter)
+        session.mount("https://", self.adapter)
+        return session
+
+    def stats(self):
+        """Statistiques de réutilisation des connexions et du cache DNS."""
+        counts = scan_stats.snapshot()
+        requests_count = counts.get("http.pool_requests", 0)
+        misses = counts.get("http.pool_misses", 0)
+        return {
+            "pool_requests": requests_count,
+            "pool_hits": max(requests_count - misses, 0),
+            "pool_misses": misses,
+            "pool_hit_ratio": (requests_count - misses) / requests_count if requests_count else 0.0,
+            "dns_hits": counts.get("dns.hits", 0),
+            "dns_misses": counts.get("dns.misses", 0),
+        }
+
+http_pool = HttpSessionPool()
+
+# ---------------------------------------------------------------------------
+# ---------------- Téléchargement d'une page (un seul échange) --------------
+# ---------------------------------------------------------------------------
+
+@dataclass
+class SiteSnapshot:
+    """
+    Résultat d'un unique échange HTTP avec le site : corps de la page,
+    URL finale, chaîne de redirections, en-têtes et cookies déposés.
+    Toute l'analyse d'un domaine (et donc son score) part de cet instantané.
+    """
+    url: str
+    final_url: str
+    status_code: int
+    body: str
+    headers: dict  # clés en minuscules
+    redirects: list = field(default_factory=list)
+    cookies: list = field(default_factory=list)
+    size: int = 0           # octets du corps téléchargés (après décompression)
+    encoding: str = "utf-8"
+    truncated: bool = False  # corps coupé au plafond HTTP_MAX_PAGE_BYTES
+
+def _cookie_to_dict(cookie):
+    """Cookie http.cookiejar -> dict, avec les attributs Set-Cookie utiles au RGPD."""
+    extra = {key.lower(): value for key, value in cookie._rest.items()}
+    return {
+        "name": cookie.name,
+        "domain": cookie.domain,
+        "path": cookie.path,
+        "secure": bool(cookie.secure),
+        "httponly": "httponly" in extra,
+        "samesite": extra.get("samesite"),
+        "expires": cookie.expires,  # None => cookie de session
+    }
+
+COOKIE_IDENTITY_FIELDS = ("name", "domain", "path", "secure", "httponly", "samesite")
+
+def cookie_identity(cookie):
+    """
+    Attributs d'un cookie (dict de _cookie_to_dict) qui ne changent pas
+    d'une visite à l'autre : sans l'expiration, recalculée à chaque réponse
+    pour les cookies Max-Age/Expires. Sert aux empreintes de contenu.
+    """
+    return {key: cookie.get(key) for key in COOKIE_IDENTITY_FIELDS}
+
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+_HEADER_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+
+def _is_html_content_type(content_type):
+    """Content-Type absent (on regardera les octets) ou de type HTML."""
+    if not content_type:
+        return True
+    mime = content_type.split(";")[0].strip().lower()
+    return mime in HTTP_HTML_CONTENT_TYPES
+
+def _looks_binary(first_chunk):
+    """Octets nuls dans le début du document : contenu binaire étiqueté HTML."""
+    return b"\x00" in first_chunk[:1024] and not first_chunk.startswith(
+        (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE))
+
+def _detect_charset(content_type, first_chunk):
+    """
+    Encodage du document, déterminé sur le premier bloc reçu :
+    charset de l'en-tête, BOM, <meta charset>, puis charset_normalizer.
+    """
+    candidates = []
+    match = _HEADER_CHARSET_RE.search(content_type or "")
+    if match:
+        candidates.append(match.group(1))
+    for bom, name in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"),
+                      (codecs.BOM_UTF16_BE, "utf-16")):
+        if first_chunk.startswith(bom):
+            candidates.append(name)
+    match = _META_CHARSET_RE.search(first_chunk[:4096])
+    if match:
+        candidates.append(match.group(1).decode("ascii", "ignore"))
+    for name in candidates:
+        try:
+            return codecs.lookup(name).name
+        except LookupError:
+            continue
+    best = charset_normalizer.from_bytes(first_chunk).best()
+    # Un premier bloc purement ASCII ne dit rien de la suite : utf-8 l'englobe
+    if best is None or best.encoding == "ascii":
+        return "utf-8"
+    return best.encoding
+
+def _request_error_type(exc):
+    """Type d'erreur HTTP pour les métriques : timeout, tls, connection, http_4xx, ..."""
+    if isinstance(exc, requests.Timeout):
+        return "timeout"
+    if isinstance(exc, requests.exceptions.SSLError):
+        return "tls"
+    if isinstance(exc, requests.ConnectionError):
+        return "connection"
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return "http_%dxx" % (exc.response.status_code // 100)
+    if isinstance(exc, requests.TooManyRedirects):
+        return "redirects"
+    return "request"
+
+def fetch_site(url, etag=None, last_modified=None, max_bytes=HTTP_MAX_PAGE_BYTES, html_only=True,
+               error_statuses=()):
+    """
+    Télécharge la page une seule fois, via le pool HTTP partagé. Le cookie jar
+    de la session accumule les cookies déposés tout au long des redirections.
+    Avec etag / last_modified, la requête est conditionnelle : un snapshot
+    de statut 304 (corps vide) signifie que la page n'a pas changé.
+    Le corps est lu en flux : au plus max_bytes octets sont conservés
+    (pas d'arrêt sur </html>, qui peut figurer dans un script, un gabarit
+    ou un commentaire), et un contenu non HTML (Content-Type ou octets
+    binaires) est rejeté dès le premier bloc.
+    Avec html_only=False, un document non HTML (ex: politique en PDF) donne
+    un snapshot sans corps au lieu d'être rejeté.
+    error_statuses : statuts d'erreur HTTP (ex: 404, 410) renvoyés comme un
+    snapshot sans corps, pour distinguer une page absente d'un échec
+    temporaire.
+    Renvoie un SiteSnapshot, ou None si le site est inaccessible.
+    """
+    conditional_headers = {}
+    if etag:
+        conditional_headers["If-None-Match"] = etag
+    if last_modified:
+        conditional_headers["If-Modified-Since"] = last_modified
+
+    session = http_pool.session()
+    try:
+        with session.get(url, headers=conditional_headers, timeout=HTTP_TIMEOUT, stream=True) as resp:
+            if resp.status_code not in error_statuses:
+                resp.raise_for_status()
+            content_type = resp.headers.get("Content-Type")
+            body_chunks = resp.iter_content(HTTP_CHUNK_SIZE)
+            if resp.status_code in error_statuses:
+                body_chunks = ()
+            elif not _is_html_content_type(content_type):
+                scan_stats.incr("pages.rejected")
+                if html_only:
+                    metrics.error("non_html")
+                    return None
+                body_chunks = ()  # seule la présence du document compte
+
+            chunks, size, truncated, encoding = [], 0, False, "utf-8"
+            for chunk in body_chunks:
+                if not chunks:
+                    if _looks_binary(chunk):
+                        scan_stats.incr("pages.rejected")
+                        if html_only:
+                            metrics.error("non_html")
+                            return None
+                        break
+                    encoding = _detect_charset(content_type, chunk)
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes:
+                    truncated = True
+                    break
+    except requests.RequestException as exc:
+        metrics.error(_request_error_type(exc))
+        return None
+
+    raw = b"".join(chunks)
+    if truncated:
+        raw = raw[:max_bytes]
+        scan_stats.incr("pages.truncated")
+    metrics.observe_page_size(len(raw))
+    return SiteSnapshot(
+        url=url,
+        final_url=resp.url,
+        status_code=resp.status_code,
+        body=raw.decode(encoding, errors="replace"),
+        headers={key.lower(): value for key, value in resp.headers.items()},
+        redirects=[(r.status_code, r.url) for r in resp.history],
+        cookies=[_cookie_to_dict(c) for c in session.cookies],
+        size=len(raw),
+        encoding=encoding,
+        truncated=truncated,
+    )
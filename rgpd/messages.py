@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Textes multilingues (fr/en) du bot, des rapports et des mots-clés
+de détection, et langue Telegram de l'utilisateur.
+"""
+
+# ---------------------------------------------------------------------------
+# -------------------------- Textes multilingues ----------------------------
+# ---------------------------------------------------------------------------
+
+messages = {
+    "fr": {
+        "analysis_name": "RGPD/ePrivacy",
+        "welcome": (
+            "👋 Bienvenue ! Cette analyse RGPD/ePrivacy vous aide à comprendre si un site "
+            "protège réellement les données des utilisateurs et prend les mesures adéquates "
+            "pour se conformer aux réglementations internationales. "
+            "Un manque de conformité peut mener à une violation de la vie privée, à la "
+            "compromission de données utilisateurs, ainsi qu'à de lourdes pénalités et amendes.\n\n"
+            "Envoyez-moi simplement un ou plusieurs noms de domaines (séparés par des virgules).\n"
+            "Utilisez /rescan <domaines> pour forcer une nouvelle analyse sans le cache.\n"
+            "Utilisez /watch <domaines> pour être prévenu des changements (score, traceurs), "
+            "/unwatch <domaines> pour arrêter."
+        ),
+        "analysis_in_progress": "🔍 Analyse en cours pour : {} ...",
+        "domain_inaccessible": "Site inaccessible",
+        "scan_timeout": "Analyse interrompue (délai dépassé)",
+        "pdf_caption": (
+            "📄 Voici le rapport PDF.\n"
+            "⚠️ Avertissement : Cette analyse RGPD/ePrivacy est automatisée. "
+            "Elle ne remplace pas un audit complet ni l'avis d'un expert certifié. "
+            "Consultez un DPO ou un expert juridique pour confirmer votre conformité."
+        ),
+        "no_domains": "⚠️ Veuillez entrer au moins un nom de domaine.",
+        "pdf_error": "⚠️ Impossible de récupérer le rapport PDF.",
+        "pdf_busy": "⚠️ Trop de rapports PDF en cours de génération, réessayez dans quelques instants.",
+        # File d'attente et progression
+        "analysis_queued": "⏳ Demande en file d'attente (position {}).",
+        "rate_limited": "⚠️ Trop de demandes, réessayez dans {} s.",
+        "user_queue_full": "⚠️ Vous avez déjà {} demandes en attente, patientez avant d'en envoyer d'autres.",
+        "queue_full": "⚠️ Le service est très sollicité, réessayez dans quelques instants.",
+        "progress_done": "✅ {} : {}/100",
+        "progress_error": "⚠️ {} : {}",
+        "progress_count": "{}/{} domaine(s) analysé(s)",
+        "stats_denied": "⚠️ Commande réservée aux opérateurs.",
+        # Surveillance (/watch, /unwatch)
+        "watch_added": "👀 Surveillance activée pour : {}. Vous serez prévenu si le score ou les traceurs changent.",
+        "watch_removed": "🛑 Surveillance arrêtée pour : {}",
+        "watch_not_watched": "Ces domaines n'étaient pas surveillés : {}",
+        "watch_list": "👀 Domaines surveillés : {}",
+        "watch_empty": "Aucun domaine surveillé. Utilisez /watch <domaines>.",
+        "watch_limit": "⚠️ Limite de {} domaines surveillés atteinte.",
+        "watch_change": "🔔 Changement détecté pour {} :",
+        "watch_score": "• Score : {}/100 → {}/100",
+        "watch_trackers_added": "• Nouveaux traceurs : {}",
+        "watch_trackers_removed": "• Traceurs disparus : {}",
+        # Rapport
+        "report_title": "Rapport RGPD/ePrivacy",
+        "report_header": "<h2>=== RAPPORT RGPD/ePrivacy ===</h2><p><i>Date : {}</i></p>",
+        "report_intro": (
+            "<p>Cette analyse vise à déterminer si les données des utilisateurs sont protégées, "
+            "et si le site respecte le cadre RGPD/ePrivacy. Un manque de conformité "
+            "peut exposer à de graves risques de violation de la vie privée, la compromission "
+            "de données, et de lourdes sanctions pécuniaires.</p>"
+            "<p><strong>Analyse demandée pour :</strong> {}</p>"
+        ),
+        "report_per_domain": (
+            "<hr><h3>Résultats pour {}</h3>"
+        ),
+        "report_error": "<p><em>Erreur :</em> {}</p>",
+        "report_more_domains": "{} et {} autres domaines (voir la synthèse)",
+        "report_summary_title": "Synthèse",
+        "report_summary_columns": ("Domaine", "Score", "Niveau de risque"),
+        "cached_result": "♻️ Résultat en cache (analyse effectuée il y a {})",
+        "report_fields": {
+            "score": "Score RGPD/ePrivacy :",
+            "risk_level": "Niveau de risque :",
+            "risk_message": "Recommandation :",
+            "https_status": "HTTPS :",
+            "privacy": "Politique de confidentialité :",
+            "cookie_banner": "Bandeau cookies :",
+            "legal": "Mentions légales :",
+            "cookies_count": "Cookies détectés :",
+            "ga": "Google Analytics :",
+            "fb": "Facebook Pixel :",
+            "form": "Formulaire de contact :",
+            "trackers": "Trackers tiers :",
+        },
+        # Texte Telegram
+        "text_header": "<b>=== RAPPORT RGPD/ePrivacy ===</b>\n<i>Date : {}</i>\n\n",
+        "text_per_domain": "<b>Résultats pour {} :</b>\n",
+        "report_warning": (
+            "<hr><p><strong>⚠️ Avertissement :</strong> Cette analyse RGPD/ePrivacy "
+            "est une évaluation automatisée. Elle ne remplace pas un audit complet "
+            "ni l'avis d'un expert certifié. Consultez un <strong>DPO</strong> ou "
+            "un expert juridique pour confirmer votre conformité.</p>"
+            "<p><em>De plus, ce rapport peut contenir des erreurs et ne couvre pas tous "
+            "les aspects du RGPD/ePrivacy. Une vérification manuelle par un professionnel "
+            "reste indispensable pour garantir la conformité.</em></p>"
+        ),
+        # Risques
+        "risk_level": {
+            "ok": "✅ Conforme",
+            "medium": "⚠️ Risque Modéré",
+            "high": "🛑 Risque Élevé",
+            "critical": "🚨 Risque Critique",
+        },
+        "risk_message": {
+            "ok": "Le site semble respecter le RGPD/ePrivacy. Continuez à surveiller les évolutions légales.",
+            "medium": "Quelques éléments sont manquants. Vérifiez votre politique de confidentialité et votre bandeau cookies.",
+            "high": "Votre site présente des manquements ! Ajoutez une politique de confidentialité et un bandeau cookies.",
+            "critical": "Votre site n’est pas conforme. Vous risquez de lourdes sanctions ! Consultez un DPO.",
+        },
+        # Oui / Non
+        "yes": "✅ Oui",
+        "no": "❌ Non",
+        "none": "Aucun",
+        # Mots-clés (exhaustifs)
+        "privacy_keywords": [
+            "politique de confidentialité", "vie privée", "protection des données",
+            "données personnelles", "charte de confidentialité", "rgpd"
+        ],
+        "legal_keywords": [
+            "mentions légales", "legal notice", "conditions générales", 
+            "conditions d'utilisation", "cgu", "cgv"
+        ],
+        "cookie_keywords": [
+            "cookie", "consent", "rgpd", "gdpr", "eprivacy", 
+            "bandeau cookies", "traceurs", "consentement"
+        ],
+    },
+    "en": {
+        "analysis_name": "GDPR/ePrivacy",
+        "welcome": (
+            "👋 Welcome! This GDPR/ePrivacy analysis helps you see if a site truly "
+            "protects user data and takes adequate measures to comply with international "
+            "regulations. Non-compliance may lead to privacy violations, user data compromise, "
+            "and heavy penalties or fines.\n\n"
+            "Just send me one or more domain names (separated by commas).\n"
+            "Use /rescan <domains> to force a fresh analysis, bypassing the cache.\n"
+            "Use /watch <domains> to be notified of changes (score, trackers), "
+            "/unwatch <domains> to stop."
+        ),
+        "analysis_in_progress": "🔍 Analysis in progress for: {} ...",
+        "domain_inaccessible": "Site inaccessible",
+        "scan_timeout": "Analysis interrupted (time limit exceeded)",
+        "pdf_caption": (
+            "📄 Here is the PDF report.\n"
+            "⚠️ Warning: This GDPR/ePrivacy analysis is automated. "
+            "It does not replace a full audit or expert advice. "
+            "Consult a DPO or legal expert to confirm your compliance."
+        ),
+        "no_domains": "⚠️ Please enter at least one domain name.",
+        "pdf_error": "⚠️ Unable to retrieve the PDF report.",
+        "pdf_busy": "⚠️ Too many PDF reports are being generated, please try again shortly.",
+        # Queue and progress
+        "analysis_queued": "⏳ Request queued (position {}).",
+        "rate_limited": "⚠️ Too many requests, please try again in {} s.",
+        "user_queue_full": "⚠️ You already have {} requests waiting, please wait before sending more.",
+        "queue_full": "⚠️ The service is very busy, please try again shortly.",
+        "progress_done": "✅ {}: {}/100",
+        "progress_error": "⚠️ {}: {}",
+        "progress_count": "{}/{} domain(s) analysed",
+        "stats_denied": "⚠️ This command is reserved for operators.",
+        # Monitoring (/watch, /unwatch)
+        "watch_added": "👀 Now watching: {}. You will be notified if the score or trackers change.",
+        "watch_removed": "🛑 Stopped watching: {}",
+        "watch_not_watched": "These domains were not being watched: {}",
+        "watch_list": "👀 Watched domains: {}",
+        "watch_empty": "No watched domains. Use /watch <domains>.",
+        "watch_limit": "⚠️ Limit of {} watched domains reached.",
+        "watch_change": "🔔 Change detected for {}:",
+        "watch_score": "• Score: {}/100 → {}/100",
+        "watch_trackers_added": "• New trackers: {}",
+        "watch_trackers_removed": "• Trackers removed: {}",
+        # Report
+        "report_title": "GDPR/ePrivacy Report",
+        "report_header": "<h2>=== GDPR/ePrivacy REPORT ===</h2><p><i>Date: {}</i></p>",
+        "report_intro": (
+            "<p>This analysis aims to determine whether user data is protected and if the site "
+            "respects GDPR/ePrivacy rules. Non-compliance may expose you to serious privacy "
+            "risks, data compromise, and heavy fines.</p>"
+            "<p><strong>Analysis requested for:</strong> {}</p>"
+        ),
+        "report_per_domain": (
+            "<hr><h3>Results for {}</h3>"
+        ),
+        "report_error": "<p><em>Error:</em> {}</p>",
+        "report_more_domains": "{} and {} more domains (see summary)",
+        "report_summary_title": "Summary",
+        "report_summary_columns": ("Domain", "Score", "Risk level"),
+        "cached_result": "♻️ Cached result (analysed {} ago)",
+        "report_fields": {
+            "score": "GDPR/ePrivacy Score:",
+            "risk_level": "Risk Level:",
+            "risk_message": "Recommendation:",
+            "https_status": "HTTPS:",
+            "privacy": "Privacy Policy:",
+            "cookie_banner": "Cookie Banner:",
+            "legal": "Legal Mentions:",
+            "cookies_count": "Cookies detected:",
+            "ga": "Google Analytics:",
+            "fb": "Facebook Pixel:",
+            "form": "Contact Form:",
+            "trackers": "Third-party Trackers:",
+        },
+        # Telegram text
+        "text_header": "<b>=== GDPR/ePrivacy REPORT ===</b>\n<i>Date: {}</i>\n\n",
+        "text_per_domain": "<b>Results for {}:</b>\n",
+        "report_warning": (
+            "<hr><p><strong>⚠️ Warning:</strong> This GDPR/ePrivacy analysis "
+            "is automated. It does not replace a full compliance audit or professional "
+            "legal advice. Please consult a <strong>DPO</strong> or a legal expert "
+            "to confirm your compliance.</p>"
+            "<p><em>Additionally, this report may contain errors and does not cover all "
+            "aspects of GDPR/ePrivacy. A manual review by a professional remains essential "
+            "to ensure compliance.</em></p>"
+        ),
+        # Risk
+        "risk_level": {
+            "ok": "✅ Compliant",
+            "medium": "⚠️ Moderate Risk",
+            "high": "🛑 High Risk",
+            "critical": "🚨 Critical Risk",
+        },
+        "risk_message": {
+            "ok": "The site appears GDPR/ePrivacy compliant. Keep monitoring legal changes.",
+            "medium": "Some elements are missing. Check your privacy policy and cookie banner.",
+            "high": "Your site has major gaps! Add a privacy policy and a cookie banner.",
+            "critical": "Your site is not compliant. You risk significant fines! Consult a DPO.",
+        },
+        # Yes / No
+        "yes": "✅ Yes",
+        "no": "❌ No",
+        "none": "None",
+        # More exhaustive keywords
+        "privacy_keywords": [
+            "privacy policy", "privacy", "data protection", "personal data", 
+            "gdpr policy", "data privacy"
+        ],
+        "legal_keywords": [
+            "legal notice", "terms of service", "terms of use", 
+            "imprint", "disclaimer"
+        ],
+        "cookie_keywords": [
+            "cookie", "consent", "rgpd", "gdpr", "eprivacy", 
+            "cookie banner", "trackers"
+        ],
+    },
+}
+
+# ---------------------------------------------------------------------------
+# ------------------- Détection de la langue de l'utilisateur ----------------
+# ---------------------------------------------------------------------------
+
+def get_user_language(update):
+    """
+    Récupère la langue Telegram de l'utilisateur (ex: 'fr', 'en'...),
+    renvoie 'fr' ou 'en' par défaut (fallback en).
+    """
+    user_lang = update.effective_user.language_code
+    if not user_lang:
+        return "en"
+    user_lang = user_lang.lower()
+    if user_lang.startswith("fr"):
+        return "fr"
+    else:
+        return "en"
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Compteurs du scanner et instrumentation du pipeline : durée des étapes,
+erreurs par type, tailles de page, traces par domaine et endpoint
+Prometheus local.
+"""
+
+import contextlib
+import json
+import logging
+import threading
+import time
+
+from rgpd.config import METRICS_ENABLED, METRICS_HOST, METRICS_PORT, TRACE_LOG
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# ------------------------- Compteurs du scanner -----------------------------
+# ---------------------------------------------------------------------------
+
+class StatsCounter:
+    """Compteurs thread-safe du scanner (pool HTTP, cache DNS, ...)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            value = self._counts[name] = self._counts.get(name, 0) + amount
+        return value
+
+    def set_max(self, name, value):
+        """Jauge de pic : ne garde que la plus grande valeur observée."""
+        with self._lock:
+            if value > self._counts.get(name, 0):
+                self._counts[name] = value
+
+    def get(self, name):
+        with self._lock:
+            return self._counts.get(name, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+scan_stats = StatsCounter()
+
+# ---------------------------------------------------------------------------
+# ------------- Instrumentation du pipeline (métriques, traces) -------------
+# ---------------------------------------------------------------------------
+
+# Bornes des histogrammes (secondes, octets)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+PAGE_SIZE_BUCKETS = (1024, 10240, 51200, 102400, 262144, 524288, 1048576, 3145728)
+
+trace_logger = logging.getLogger("rgpdbot2.trace")
+
+class _StageTimer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+# Renvoyé par Metrics.stage() quand l'instrumentation est désactivée
+_NO_TIMER = contextlib.nullcontext()
+
+class Metrics:
+    """
+    Instrumentation légère du pipeline de scan :
+    - stage(nom) : chronomètre une étape (dns, tcp_connect, tls, download,
+      parse, langdetect, checks, crawl, scan, pdf) -> histogramme des durées
+    - error(type) : compteur d'erreurs et de délais dépassés par type
+    - observe_page_size(octets) : histogramme des tailles de page
+    - traces : une ligne JSON par domaine (étapes, durées, résultat,
+      octets de chaque téléchargement, pic des octets en cours d'analyse
+      dans le processus pendant l'analyse du domaine)
+    render() produit le format texte de Prometheus, servi par serve().
+    Désactivée, chaque point de mesure se réduit à un test de booléen.
+    """
+
+    def __init__(self, enabled=METRICS_ENABLED or TRACE_LOG, trace=TRACE_LOG):
+        self.enabled = enabled
+        self.trace = trace
+        self._lock = threading.Lock()
+        self._histograms = {}   # (nom, étiquette) -> [compteurs par borne..., +Inf, somme]
+        self._counters = {}     # (nom, étiquette) -> valeur
+        self._collectors = []   # fonctions renvoyant {nom: valeur} (jauges)
+        self._local = threading.local()
+        self._open_traces = {}  # id(trace) -> trace, des analyses en cours
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NO_TIMER
+        return _StageTimer(self, name)
+
+    def _observe(self, key, buckets, value):
+        with self._lock:
+            counts = self._histograms.get(key)
+            if counts is None:
+                counts = self._histograms[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[len(buckets)] += 1
+            counts[-1] += value
+
+    def observe_stage(self, name, seconds):
+        self._observe(("rgpd_stage_seconds", ("stage", name)), STAGE_BUCKETS, seconds)
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            trace["stages"][name] = round(trace["stages"].get(name, 0) + seconds, 6)
+        collected = getattr(self._local, "collected", None)
+        if collected is not None:
+            collected[name] = collected.get(name, 0) + seconds
+
+    @contextlib.contextmanager
+    def collect_stages(self):
+        """
+        Durées des étapes chronométrées dans le bloc par le thread courant,
+        {nom: secondes} : pour les renvoyer depuis un processus d'analyse.
+        """
+        collected = self._local.collected = {}
+        try:
+            yield collected
+        finally:
+            self._local.collected = None
+
+    def observe_page_size(self, size):
+        if self.enabled:
+            self._observe(("rgpd_page_bytes", None), PAGE_SIZE_BUCKETS, size)
+
+    def incr(self, name, label=None, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            key = (name, label)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def error(self, kind):
+        """Erreur ou délai dépassé, par type (timeout, connection, tls, http_4xx, ...)."""
+        self.incr("rgpd_errors_total", ("type", kind))
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            trace["errors"].append(kind)
+
+    def add_collector(self, collector):
+        """Jauges supplémentaires, lues à chaque rendu : collector() -> {nom: valeur}."""
+        self._collectors.append(collector)
+
+    # ---- Traces par domaine ----
+
+    def begin_trace(self, domain):
+        if self.trace:
+            trace = self._local.trace = {
+                "domain": domain, "stages": {}, "errors": [], "start": time.time(),
+                "fetch_bytes": [], "inflight_bytes_peak": scan_stats.get("pages.inflight_bytes"),
+            }
+            with self._lock:
+                self._open_traces[id(trace)] = trace
+
+    def observe_fetch(self, size):
+        """Octets mis en mémoire par un téléchargement du domaine en cours (trace)."""
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            trace["fetch_bytes"].append(size)
+
+    def observe_inflight_bytes(self, total):
+        """
+        Octets en cours d'analyse dans le processus (tous domaines) : pic
+        retenu par la trace de chaque domaine en cours d'analyse.
+        """
+        if not self.trace:
+            return
+        with self._lock:
+            for trace in self._open_traces.values():
+                if total > trace["inflight_bytes_peak"]:
+                    trace["inflight_bytes_peak"] = total
+
+    def end_trace(self, result):
+        trace = getattr(self._local, "trace", None)
+        if trace is None:
+            return
+        self._local.trace = None
+        with self._lock:
+            self._open_traces.pop(id(trace), None)
+        result = result or {}
+        trace["duration"] = round(time.time() - trace.pop("start"), 6)
+        trace["score"] = result.get("gdpr_score")
+        trace["error"] = result.get("error")
+        trace["cached"] = result.get("cached", False)
+        trace_logger.info(json.dumps(trace, ensure_ascii=False))
+
+    # ---- Exposition ----
+
+    @staticmethod
+    def _labels(label, extra=None):
+        pairs = [label] if label else []
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{%s}" % ",".join('%s="%s"' % (k, str(v).replace('"', '\\"')) for k, v in pairs)
+
+    def render(self):
+        """Métriques au format texte d'exposition Prometheus."""
+        lines = []
+        with self._lock:
+            histograms = {k: list(v) for k, v in self._histograms.items()}
+            counters = dict(self._counters)
+        declared = set()
+        for (name, label), counts in sorted(histograms.items(), key=lambda item: str(item[0])):
+            buckets = STAGE_BUCKETS if name == "rgpd_stage_seconds" else PAGE_SIZE_BUCKETS
+            if name not in declared:
+                lines.append("# TYPE %s histogram" % name)
+                declared.add(name)
+            cumulative = 0
+            for bound, count in zip(buckets, counts):
+                cumulative += count
+                lines.append("%s_bucket%s %d" % (name, self._labels(label, ("le", bound)), cumulative))
+            cumulative += counts[len(buckets)]
+            lines.append("%s_bucket%s %d" % (name, self._labels(label, ("le", "+Inf")), cumulative))
+            lines.append("%s_sum%s %s" % (name, self._labels(label), counts[-1]))
+            lines.append("%s_count%s %d" % (name, self._labels(label), cumulative))
+        for (name, label), value in sorted(counters.items(), key=lambda item: str(item[0])):
+            if name not in declared:
+                lines.append("# TYPE %s counter" % name)
+                declared.add(name)
+            lines.append("%s%s %s" % (name, self._labels(label), value))
+        # Compteurs internes du scanner (pool HTTP, DNS, pages...) et collecteurs
+        gauges = dict(("scanner." + k, v) for k, v in scan_stats.snapshot().items())
+        for collector in self._collectors:
+            try:
+                gauges.update(collector())
+            except Exception:
+                logger.exception("Échec d'un collecteur de métriques")
+        if gauges:
+            lines.append("# TYPE rgpd_gauge gauge")
+            for key, value in sorted(gauges.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append("rgpd_gauge%s %s" % (self._labels(("name", key)), value))
+        return "\n".join(lines) + "\n"
+
+    def serve(self, host=METRICS_HOST, port=METRICS_PORT):
+        """Démarre l'endpoint HTTP /metrics dans un thread d'arrière-plan."""
+        import http.server
+
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.enabled = True
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        logger.info("Métriques exposées sur http://%s:%d/metrics", host, server.server_address[1])
+        return server
+
+metrics = Metrics()
@@ -0,0 +1,893 @@
+# -*- coding: utf-8 -*-
+"""
+Rapports : modèle commun, rendu PDF (reportlab dans le processus, ou HTML
+converti par wkhtmltopdf) et texte Telegram, pool de rendu des PDF.
+reportlab / pdfkit ne sont chargés qu'au premier PDF.
+
+Les rapports sont produits section par section (un domaine à la fois) :
+un rapport de portefeuille (milliers de domaines) ne tient jamais en
+entier en mémoire, ni en HTML, ni en flowables, ni en texte.
+"""
+
+import datetime
+import hashlib
+import html
+import io
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from rgpd.analysis import get_risk_level_and_msg
+from rgpd.config import (
+    PDF_FONTS, PDF_QUEUE_SIZE, PDF_RENDER_WORKERS, PDF_SPOOL_MAX_BYTES, REPORT_INTRO_MAX_DOMAINS,
+    REPORT_STORE_DIR, REPORT_STORE_MAX_AGE, REPORT_STORE_MAX_BYTES, REPORT_SUMMARY_MIN_DOMAINS,
+    REPORT_SUMMARY_ROWS, TELEGRAM_MESSAGE_LIMIT, setting,
+)
+from rgpd.fetch import cookie_identity
+from rgpd.messages import messages
+from rgpd.metrics import metrics, scan_stats
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# ------------- Modèle de rapport et gabarits précompilés (PDF/texte) --------
+# ---------------------------------------------------------------------------
+
+# Ordre des lignes de détail d'un domaine (libellés dans messages[...]["report_fields"])
+REPORT_FIELDS = (
+    "score", "risk_level", "risk_message", "https_status", "privacy", "cookie_banner",
+    "legal", "cookies_count", "ga", "fb", "form", "trackers",
+)
+
+REPORT_SEPARATOR_TEXT = "----------------------------------------\n"
+
+REPORT_HTML_HEAD = """<html>
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+    <style>
+    body {{
+        font-family: 'Segoe UI Emoji', 'Apple Color Emoji', 'Noto Color Emoji', Arial, sans-serif;
+        margin: 40px;
+    }}
+    h2, h3 {{
+        margin-bottom: 0.3em;
+    }}
+    p {{
+        margin-top: 0.3em;
+        margin-bottom: 0.9em;
+    }}
+    table {{
+        border-collapse: collapse;
+        margin-bottom: 0.9em;
+    }}
+    th, td {{
+        text-align: left;
+        padding: 2px 10px 2px 0;
+        border-bottom: 1px solid #ddd;
+    }}
+    </style>
+</head>
+<body>
+"""
+
+def _strip_tags(html_fragment):
+    """
+    Texte brut d'un fragment HTML (un paragraphe par ligne), échappé pour le
+    mode HTML de Telegram.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_fragment, "html.parser")
+    for block in soup.find_all(["p", "h2", "h3"]):
+        block.append("\n")
+    return html.escape(soup.get_text(), quote=False)
+
+_PDF_BLOCK_RE = re.compile(r"<hr>|<(h2|h3|p)>(.*?)</\1>", re.S)
+
+def _pdf_blocks(html_fragment):
+    """
+    Blocs (style, balisage) d'un fragment HTML des messages pour le rendu
+    reportlab : <h2>, <h3>, <p> deviennent des paragraphes (le balisage
+    en ligne <strong>, <em>, <i> est compris par reportlab), <hr> un filet.
+    """
+    return [
+        ("hr", None) if match.group(1) is None else (match.group(1), match.group(2))
+        for match in _PDF_BLOCK_RE.finditer(html_fragment)
+    ]
+
+class ReportTemplate:
+    """
+    Fragments statiques d'un rapport, calculés une seule fois par langue au
+    démarrage : en-tête HTML, préfixes des lignes de détail, introduction et
+    avertissement déjà débarrassés de leurs balises pour Telegram.
+    Le rendu d'un rapport se réduit ensuite à des concaténations.
+    """
+
+    def __init__(self, lang):
+        msg = messages[lang]
+        labels = msg["report_fields"]
+        # PDF (HTML complet pour wkhtmltopdf)
+        self.html_head = REPORT_HTML_HEAD.format(title=msg["report_title"])
+        self.html_header = msg["report_header"]
+        self.html_intro = msg["report_intro"]
+        self.html_domain = msg["report_per_domain"]
+        self.html_error = msg["report_error"]
+        self.html_rows = {f: "<p><strong>%s</strong> " % labels[f] for f in REPORT_FIELDS}
+        self.html_footer = msg["report_warning"] + "</body></html>"
+        self.html_summary_head = "<h3>%s</h3><table><tr>%s</tr>" % (
+            msg["report_summary_title"], "".join("<th>%s</th>" % c for c in msg["report_summary_columns"]))
+        # PDF reportlab (mêmes fragments, découpés en paragraphes)
+        self.pdf_title = msg["report_title"]
+        self.pdf_header = _pdf_blocks(msg["report_header"])
+        self.pdf_intro = _pdf_blocks(msg["report_intro"])
+        self.pdf_domain = _pdf_blocks(msg["report_per_domain"])
+        self.pdf_error = _pdf_blocks(msg["report_error"])
+        self.pdf_rows = {f: "<strong>%s</strong> " % labels[f] for f in REPORT_FIELDS}
+        self.pdf_footer = _pdf_blocks(msg["report_warning"])
+        self.pdf_summary_title = msg["report_summary_title"]
+        self.pdf_summary_columns = ["<strong>%s</strong>" % c for c in msg["report_summary_columns"]]
+        # Texte Telegram (HTML léger : <b>, <i>)
+        self.text_header = msg["text_header"]
+        self.text_intro = _strip_tags(msg["report_intro"])
+        self.text_domain = msg["text_per_domain"]
+        self.text_rows = {f: "• <b>%s</b> " % labels[f] for f in REPORT_FIELDS}
+        self.text_footer = REPORT_SEPARATOR_TEXT + _strip_tags(msg["report_warning"])
+
+# Construits au premier rapport de chaque langue
+REPORT_TEMPLATES = {}
+
+def get_report_template(lang):
+    tpl = REPORT_TEMPLATES.get(lang)
+    if tpl is None:
+        tpl = REPORT_TEMPLATES[lang] = ReportTemplate(lang)
+    return tpl
+
+def cached_notice(data, user_lang):
+    """Mention « résultat en cache » avec l'âge de l'analyse (ex: 12 min, 2 h 05)."""
+    minutes = int(max(time.time() - data["scanned_at"], 0) // 60)
+    if minutes < 1:
+        age = "< 1 min"
+    elif minutes < 60:
+        age = f"{minutes} min"
+    else:
+        age = f"{minutes // 60} h {minutes % 60:02d}"
+    return messages[user_lang]["cached_result"].format(age)
+
+def report_field_values(data, user_lang):
+    """Valeurs affichées (déjà formatées) des lignes de détail d'un domaine."""
+    msg = messages[user_lang]
+    yes, no = msg["yes"], msg["no"]
+    risk_level, risk_message = get_risk_level_and_msg(data["gdpr_score"], user_lang)
+    trackers = data["third_party_trackers"]
+    return {
+        "score": f"{data['gdpr_score']}/100",
+        "risk_level": risk_level,
+        "risk_message": risk_message,
+        "https_status": yes if data["https_status"] else no,
+        "privacy": yes if data["privacy_policy"] else no,
+        "cookie_banner": yes if data["cookie_banner"] else no,
+        "legal": yes if data["legal_mentions"] else no,
+        "cookies_count": str(len(data["cookies"])),
+        "ga": yes if data["google_analytics"] else no,
+        "fb": yes if data["facebook_pixel"] else no,
+        "form": yes if data["contact_form"] else no,
+        "trackers": html.escape(", ".join(trackers.keys()), quote=False) if trackers else msg["none"],
+    }
+
+def report_section(index, domain, data, user_lang, notices=True):
+    """
+    Section d'un domaine dans le rapport (valeurs déjà formatées et
+    échappées). notices=False : sans la mention « en cache », qui dépend
+    de l'heure.
+    """
+    section = {
+        "anchor": "d%d" % index, "domain": html.escape(domain, quote=False),
+        "error": None, "fields": None, "notice": None,
+    }
+    if "error" in data:
+        section["error"] = html.escape(data["error"], quote=False)
+    else:
+        section["fields"] = report_field_values(data, user_lang)
+        if notices and data.get("cached"):
+            section["notice"] = cached_notice(data, user_lang)
+    return section
+
+class ReportSections:
+    """
+    Sections d'un rapport, recalculées à chaque parcours à partir des
+    résultats plutôt que gardées en mémoire. `results` : dict {domaine:
+    résultat}, ou tout objet qui fournit items() et len() (ex: résultats
+    relus depuis un fichier JSONL par le mode batch).
+    """
+
+    def __init__(self, results, user_lang, notices=True):
+        self._results = results
+        self._lang = user_lang
+        self._notices = notices
+
+    def __len__(self):
+        return len(self._results)
+
+    def __iter__(self):
+        for index, (domain, data) in enumerate(self._results.items()):
+            yield report_section(index, domain, data, self._lang, self._notices)
+
+def format_domain_list(domains, total, user_lang):
+    """Domaines cités dans l'introduction : les REPORT_INTRO_MAX_DOMAINS premiers, puis « et N autres »."""
+    shown = list(islice(domains, REPORT_INTRO_MAX_DOMAINS))
+    text = html.escape(", ".join(shown), quote=False)
+    if total > len(shown):
+        text = messages[user_lang]["report_more_domains"].format(text, total - len(shown))
+    return text
+
+def build_report_model(domains, results, user_lang, reusable=False):
+    """
+    Modèle unique d'un rapport, rendu ensuite en PDF et en texte Telegram.
+    Les valeurs sont déjà formatées et échappées ; les sections sont
+    produites à la demande (voir ReportSections).
+    reusable=True : modèle d'un PDF conservé par ReportArtifactStore, qui ne
+    dépend que de report_key() : date du jour sans l'heure (nom du fichier
+    compris), sans mention « en cache ».
+    """
+    now = datetime.datetime.now()
+    return {
+        "lang": user_lang,
+        "date": now,
+        "date_label": now.strftime("%Y-%m-%d" if reusable else "%Y-%m-%d %H:%M:%S"),
+        "file_date": now.strftime("%Y-%m-%d" if reusable else "%Y-%m-%d_%H-%M"),
+        "domains": format_domain_list(domains, len(results), user_lang),
+        "sections": ReportSections(results, user_lang, notices=not reusable),
+    }
+
+def iter_report_html(model):
+    """HTML complet du rapport (entrée de wkhtmltopdf), produit par morceaux."""
+    tpl = get_report_template(model["lang"])
+    yield tpl.html_head
+    yield tpl.html_header.format(model["date_label"])
+    yield tpl.html_intro.format(model["domains"])
+    sections = model["sections"]
+    # Synthèse : un lien par domaine vers sa section (sommaire cliquable)
+    if len(sections) >= REPORT_SUMMARY_MIN_DOMAINS:
+        yield tpl.html_summary_head
+        for section in sections:
+            if section["error"] is not None:
+                score, risk = "-", section["error"]
+            else:
+                score, risk = section["fields"]["score"], section["fields"]["risk_level"]
+            yield '<tr><td><a href="#%s">%s</a></td><td>%s</td><td>%s</td></tr>' % (
+                section["anchor"], section["domain"], score, risk)
+        yield "</table>"
+    for section in sections:
+        parts = ['<a name="%s"></a>' % section["anchor"], tpl.html_domain.format(section["domain"])]
+        if section["error"] is not None:
+            parts.append(tpl.html_error.format(section["error"]))
+        else:
+            fields = section["fields"]
+            for name in REPORT_FIELDS:
+                parts.append(tpl.html_rows[name] + fields[name] + "</p>")
+            if section["notice"]:
+                parts.append("<p><em>%s</em></p>" % section["notice"])
+        yield "".join(parts)
+    yield tpl.html_footer
+
+def render_report_html(model):
+    """HTML complet du rapport (entrée de wkhtmltopdf)."""
+    return "".join(iter_report_html(model))
+
+def iter_report_text(model):
+    """Texte HTML léger (<b>, <i>) du rapport, un bloc par domaine (plus en-tête et avertissement)."""
+    tpl = get_report_template(model["lang"])
+    yield (tpl.text_header.format(model["date_label"])
+           + tpl.text_intro.format(model["domains"]))
+    for section in model["sections"]:
+        parts = [REPORT_SEPARATOR_TEXT, tpl.text_domain.format(section["domain"])]
+        if section["error"] is not None:
+            parts.append("<i>%s</i>\n" % section["error"])
+        else:
+            fields = section["fields"]
+            for name in REPORT_FIELDS:
+                parts.append(tpl.text_rows[name] + fields[name] + "\n")
+            if section["notice"]:
+                parts.append("<i>%s</i>\n" % section["notice"])
+        parts.append("\n")
+        yield "".join(parts)
+    yield tpl.text_footer
+
+def render_report_text(model):
+    """Texte HTML léger (<b>, <i>) à envoyer dans Telegram."""
+    return "".join(iter_report_text(model))
+
+def _split_text_block(block, limit):
+    """
+    Morceaux d'au plus `limit` caractères d'un bloc trop long : coupé entre
+    deux lignes, et une ligne trop longue entre deux mots (balises et
+    entités ne contiennent pas d'espace : elles ne sont jamais coupées).
+    """
+    if len(block) <= limit:
+        yield block
+        return
+    for line in block.splitlines(keepends=True):
+        while len(line) > limit:
+            cut = line.rfind(" ", 0, limit) + 1 or limit
+            yield line[:cut]
+            line = line[cut:]
+        yield line
+
+def render_report_messages(model, limit=TELEGRAM_MESSAGE_LIMIT):
+    """
+    Texte du rapport découpé en messages Telegram d'au plus `limit`
+    caractères, produits au fil de l'eau. Les coupures tombent entre deux
+    domaines, sauf pour un domaine qui dépasse à lui seul la limite.
+    """
+    message = []
+    size = 0
+    for block in iter_report_text(model):
+        for piece in _split_text_block(block, limit):
+            if message and size + len(piece) > limit:
+                yield "".join(message)
+                message, size = [], 0
+            message.append(piece)
+            size += len(piece)
+    if message:
+        yield "".join(message)
+
+# ---------------------------------------------------------------------------
+# ---------------- Génération du PDF RGPD/ePrivacy --------------------------
+# ---------------------------------------------------------------------------
+
+def _find_font_files(dirs):
+    """Chemins des fichiers de police des dossiers donnés, par nom en minuscules (le premier trouvé)."""
+    found = {}
+    for root_dir in dirs:
+        for dirpath, _dirnames, filenames in os.walk(root_dir):
+            for filename in filenames:
+                found.setdefault(filename.lower(), os.path.join(dirpath, filename))
+    return found
+
+# Caractères sans chasse des séquences emoji (sélecteurs de variante, ZWJ)
+_PDF_IGNORED_CHARS = {0xFE0E, 0xFE0F, 0x200D}
+_PDF_NON_LATIN1_RE = re.compile("[^\x00-\xff]")
+
+class PdfFonts:
+    """
+    Polices TrueType du rendu reportlab (PDF_FONTS, cherchées dans
+    PDF_FONT_DIRS), lues et enregistrées une seule fois par processus.
+    Sans police TrueType, les polices standard du PDF (Helvetica) sont
+    utilisées. Les caractères absents de la police principale (icônes de
+    risque ✅ ⚠️ 🚨...) passent par la police emoji, ou sont retirés.
+    """
+
+    def __init__(self, dirs=None, candidates=PDF_FONTS):
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        files = _find_font_files(dirs if dirs is not None else setting("PDF_FONT_DIRS"))
+        paths = {}
+        for style, names in candidates.items():
+            paths[style] = next((files[n.lower()] for n in names if n.lower() in files), None)
+
+        if paths["regular"]:
+            self.regular = "RgpdSans"
+            pdfmetrics.registerFont(TTFont(self.regular, paths["regular"]))
+            self.glyphs = set(pdfmetrics.getFont(self.regular).face.charToGlyph)
+            self.bold = self.italic = self.regular
+            if paths["bold"]:
+                self.bold = "RgpdSans-Bold"
+                pdfmetrics.registerFont(TTFont(self.bold, paths["bold"]))
+            if paths["italic"]:
+                self.italic = "RgpdSans-Italic"
+                pdfmetrics.registerFont(TTFont(self.italic, paths["italic"]))
+            pdfmetrics.registerFontFamily(self.regular, normal=self.regular, bold=self.bold,
+                                          italic=self.italic, boldItalic=self.bold)
+        else:
+            logger.warning("Aucune police TrueType trouvée : PDF en Helvetica")
+            self.regular, self.bold, self.italic = "Helvetica", "Helvetica-Bold", "Helvetica-Oblique"
+            self.glyphs = {ord(c) for c in bytes(range(32, 256)).decode("cp1252", "ignore")}
+
+        self.emoji = None
+        self.emoji_glyphs = set()
+        if paths["emoji"]:
+            try:
+                pdfmetrics.registerFont(TTFont("RgpdEmoji", paths["emoji"]))
+            except Exception:
+                # Police emoji couleur sans contours (CBDT, sbix) : inutilisable
+                logger.warning("Police emoji illisible par reportlab : %s", paths["emoji"])
+            else:
+                self.emoji = "RgpdEmoji"
+                self.emoji_glyphs = set(pdfmetrics.getFont(self.emoji).face.charToGlyph)
+
+    def markup(self, text):
+        """Balisage Paragraph où chaque caractère hors de la police principale change de police."""
+        return _PDF_NON_LATIN1_RE.sub(self._fallback, text)
+
+    def _fallback(self, match):
+        code = ord(match.group(0))
+        if code in _PDF_IGNORED_CHARS:
+            return ""
+        if code in self.glyphs:
+            return match.group(0)
+        if code in self.emoji_glyphs:
+            return '<font name="%s">%s</font>' % (self.emoji, match.group(0))
+        return ""
+
+def _story_chunks(flowables, size=32):
+    """
+    Flowable qui alimente la mise en page par tranches de `size` flowables
+    tirées d'un générateur : seuls les flowables de la tranche en cours
+    existent en mémoire. Repose sur le mécanisme de DocWhile (reportlab) :
+    à chaque passage, la tranche suivante est ajoutée devant le reste de
+    l'histoire (contenu généré du cadre), suivie d'un nouveau flowable de
+    tranches, tant que le générateur en fournit. La tranche est tirée quand
+    le flowable est placé (draw) et non à chaque wrap : un flowable reporté
+    au cadre suivant ne saute pas de tranche. Une tranche ne se termine pas
+    sur un flowable keepWithNext (titre), qui reste avec ce qui le suit.
+    """
+    from reportlab.platypus import DocWhile
+
+    class StoryChunks(DocWhile):
+        # Comme les autres flowables de taille nulle de reportlab : l'espace
+        # après le flowable précédent reste fusionné avec l'espace avant le suivant
+        _SPACETRANSFER = True
+
+        def __init__(self):
+            DocWhile.__init__(self, "True", [])
+
+        def wrap(self, availWidth, availHeight):
+            return 0, 0
+
+        def draw(self):
+            chunk = list(islice(source, size))
+            while chunk and chunk[-1].getKeepWithNext():
+                extra = next(source, None)
+                if extra is None:
+                    break
+                chunk.append(extra)
+            if chunk:
+                # Nouvelle instance : celle-ci a pu être marquée "reportée" par reportlab
+                self.add_content(*chunk, StoryChunks())
+
+    source = iter(flowables)
+    return StoryChunks()
+
+class ReportlabBackend:
+    """
+    Rendu du PDF dans le processus avec reportlab, directement à partir du
+    modèle de rapport (sans HTML ni navigateur). Polices et styles sont
+    préparés à la création du backend. ImportError si reportlab est absent.
+
+    Les flowables sont créés au fur et à mesure de la mise en page : la
+    mémoire ne dépend pas du nombre de domaines, hormis le PDF produit.
+    Avec plusieurs domaines, une synthèse (domaine, score, risque) ouvre le
+    rapport ; chaque ligne renvoie à la section du domaine, qui figure aussi
+    dans le sommaire (signets) du PDF.
+    """
+
+    name = "reportlab"
+
+    def __init__(self):
+        from reportlab.lib.styles import ParagraphStyle
+
+        self.fonts = PdfFonts()
+        # Équivalent de la feuille de style de REPORT_HTML_HEAD
+        body = ParagraphStyle("p", fontName=self.fonts.regular, fontSize=11, leading=15,
+                              spaceBefore=3, spaceAfter=9)
+        self.styles = {
+            "p": body,
+            "h2": ParagraphStyle("h2", parent=body, fontName=self.fonts.bold, fontSize=17,
+                                 leading=22, spaceBefore=12, spaceAfter=5),
+            "h3": ParagraphStyle("h3", parent=body, fontName=self.fonts.bold, fontSize=13,
+                                 leading=17, spaceBefore=10, spaceAfter=4, keepWithNext=1),
+            "cell": ParagraphStyle("cell", parent=body, fontSize=9, leading=11,
+                                   spaceBefore=0, spaceAfter=0),
+        }
+
+    def warm_up(self):
+        """Rapport vide rendu une fois : imports de platypus et préparation des polices."""
+        self.render(build_report_model([], {}, "fr"), io.BytesIO())
+
+    def _blocks(self, blocks, *args):
+        from reportlab.platypus import HRFlowable, Paragraph
+
+        for style, markup in blocks:
+            if style == "hr":
+                yield HRFlowable(width="100%", thickness=0.5, color="#999999", spaceBefore=6, spaceAfter=6)
+            else:
+                yield Paragraph(self.fonts.markup(markup.format(*args) if args else markup), self.styles[style])
+
+    def _paragraph(self, markup, style="p"):
+        from reportlab.platypus import Paragraph
+
+        return Paragraph(self.fonts.markup(markup), self.styles[style])
+
+    def _summary(self, tpl, sections):
+        """Tableau de synthèse, découpé en tableaux de REPORT_SUMMARY_ROWS lignes (en-tête répété)."""
+        from reportlab.platypus import Table
+
+        yield self._paragraph(tpl.pdf_summary_title, "h3")
+        header = [self._paragraph(c, "cell") for c in tpl.pdf_summary_columns]
+        style = [
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("LINEBELOW", (0, 0), (-1, -1), 0.25, "#dddddd"),
+            ("LEFTPADDING", (0, 0), (-1, -1), 0),
+        ]
+        rows = []
+        for section in sections:
+            if section["error"] is not None:
+                score, risk = "-", section["error"]
+            else:
+                score, risk = section["fields"]["score"], section["fields"]["risk_level"]
+            rows.append([
+                self._paragraph('<a href="#%s">%s</a>' % (section["anchor"], section["domain"]), "cell"),
+                self._paragraph(score, "cell"),
+                self._paragraph(risk, "cell"),
+            ])
+            if len(rows) == REPORT_SUMMARY_ROWS:
+                yield Table([header] + rows, colWidths=["50%", "15%", "35%"], repeatRows=1, style=style)
+                rows = []
+        if rows:
+            yield Table([header] + rows, colWidths=["50%", "15%", "35%"], repeatRows=1, style=style)
+
+    def _story(self, model, tpl):
+        yield from self._blocks(tpl.pdf_header, model["date_label"])
+        yield from self._blocks(tpl.pdf_intro, model["domains"])
+        sections = model["sections"]
+        if len(sections) >= REPORT_SUMMARY_MIN_DOMAINS:
+            yield from self._summary(tpl, sections)
+        for section in sections:
+            for (style, _), flowable in zip(tpl.pdf_domain, self._blocks(tpl.pdf_domain, section["domain"])):
+                # Titre de la section : destination des liens de la synthèse et signet
+                if style != "hr":
+                    flowable.outline = (section["anchor"], html.unescape(section["domain"]))
+                yield flowable
+            if section["error"] is not None:
+                yield from self._blocks(tpl.pdf_error, section["error"])
+                continue
+            fields = section["fields"]
+            for name in REPORT_FIELDS:
+                yield self._paragraph(tpl.pdf_rows[name] + fields[name])
+            if section["notice"]:
+                yield self._paragraph("<em>%s</em>" % section["notice"])
+        yield from self._blocks(tpl.pdf_footer)
+
+    def render(self, model, output):
+        """Écrit le PDF du rapport dans `output` (fichier binaire ouvert)."""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate
+
+        tpl = get_report_template(model["lang"])
+        # Marges de 40px de la version HTML (30 pt)
+        doc = SimpleDocTemplate(output, pagesize=A4, leftMargin=30, rightMargin=30,
+                                topMargin=30, bottomMargin=30, title=tpl.pdf_title)
+
+        def after_flowable(flowable):
+            outline = getattr(flowable, "outline", None)
+            if outline is not None:
+                doc.canv.bookmarkPage(outline[0])
+                doc.canv.addOutlineEntry(outline[1], outline[0], level=0)
+
+        doc.afterFlowable = after_flowable
+        doc.build([_story_chunks(self._story(model, tpl))])
+
+class WkhtmltopdfBackend:
+    """
+    HTML complet du rapport converti par le binaire wkhtmltopdf (un
+    processus WebKit par rapport). OSError si le binaire est introuvable.
+    Le HTML est écrit par morceaux dans un fichier temporaire.
+    """
+
+    name = "wkhtmltopdf"
+
+    def __init__(self):
+        import pdfkit
+
+        self._config = pdfkit.configuration(wkhtmltopdf=setting("WKHTMLTOPDF_PATH"))
+
+    def warm_up(self):
+        pass  # rien à préparer : chaque rapport lance son propre processus
+
+    def render(self, model, output):
+        """Écrit le PDF du rapport dans `output` (fichier binaire ouvert)."""
+        import pdfkit
+
+        with tempfile.TemporaryDirectory(prefix="rgpd_report_") as tmp_dir:
+            html_path = os.path.join(tmp_dir, "report.html")
+            pdf_path = os.path.join(tmp_dir, "report.pdf")
+            with open(html_path, "w", encoding="utf-8") as f:
+                f.writelines(iter_report_html(model))
+            pdfkit.from_file(html_path, pdf_path, configuration=self._config)
+            with open(pdf_path, "rb") as f:
+                shutil.copyfileobj(f, output)
+
+PDF_BACKENDS = {
+    ReportlabBackend.name: ReportlabBackend,
+    WkhtmltopdfBackend.name: WkhtmltopdfBackend,
+}
+
+_pdf_backend = None
+_pdf_backend_lock = threading.Lock()
+
+def get_pdf_backend():
+    """
+    Backend choisi par PDF_BACKEND, créé au premier PDF puis réutilisé.
+    En mode "auto", wkhtmltopdf ne sert que si reportlab n'est pas installé.
+    """
+    global _pdf_backend
+    with _pdf_backend_lock:
+        if _pdf_backend is None:
+            choice = setting("PDF_BACKEND")
+            if choice != "auto":
+                _pdf_backend = PDF_BACKENDS[choice]()
+            else:
+                try:
+                    _pdf_backend = ReportlabBackend()
+                except ImportError:
+                    logger.warning(
+                        "reportlab n'est pas installé (pip install -r requirements.txt) : PDF rendus"
+                        " par wkhtmltopdf (%s)", setting("WKHTMLTOPDF_PATH"))
+                    _pdf_backend = WkhtmltopdfBackend()
+        return _pdf_backend
+
+def warm_up_pdf():
+    """Crée et prépare le backend PDF au démarrage, hors du premier rapport."""
+    try:
+        backend = get_pdf_backend()
+        backend.warm_up()
+        logger.info("Rendu des PDF : %s", backend.name)
+    except (ImportError, OSError) as exc:
+        logger.warning("Rendu des PDF indisponible : %s", exc)
+
+def generate_gdpr_report(model, backend=None, output=None):
+    """
+    Génère le PDF et renvoie (nom du fichier, octets du PDF). Sans
+    `output`, le PDF est produit en mémoire (aucun fichier partagé sur le
+    disque) ; avec `output` (fichier binaire ouvert), il y est écrit et la
+    fonction renvoie (nom du fichier, None). Nom en fonction de la langue
+    et de la date, ex:
+    rgpd_eprivacy_report_YYYY-MM-DD_HH-MM.pdf (fr)
+    gdpr_eprivacy_report_YYYY-MM-DD_HH-MM.pdf (en)
+    (sans l'heure pour un modèle réutilisable, voir build_report_model)
+    """
+    date_str = model["file_date"]
+    # Nom du fichier en fonction de la langue
+    if model["lang"] == "fr":
+        file_name = f"rgpd_eprivacy_report_{date_str}.pdf"
+    else:
+        file_name = f"gdpr_eprivacy_report_{date_str}.pdf"
+
+    if backend is None:
+        backend = get_pdf_backend()
+    buffer = io.BytesIO() if output is None else output
+    with metrics.stage("pdf"):
+        backend.render(model, buffer)
+
+    return file_name, buffer.getvalue() if output is None else None
+
+class PdfRenderPool:
+    """
+    Rendu des PDF hors du thread du handler Telegram : pool de workers
+    borné et file d'attente limitée. Chaque job écrit son PDF dans un
+    fichier temporaire (en mémoire jusqu'à PDF_SPOOL_MAX_BYTES, sur disque
+    au-delà), puis appelle on_done(nom, fichier) ou on_error(exception) ;
+    le fichier, positionné au début, est fermé au retour de on_done.
+    """
+
+    def __init__(self, workers=PDF_RENDER_WORKERS, queue_size=PDF_QUEUE_SIZE):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf")
+        # Jobs en cours + en attente
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def submit(self, model, on_done, on_error):
+        """Renvoie False si la file est pleine (le job n'est pas accepté)."""
+        if not self._slots.acquire(blocking=False):
+            return False
+        self._executor.submit(self._render, model, on_done, on_error)
+        return True
+
+    def _render(self, model, on_done, on_error):
+        with tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES) as pdf_file:
+            try:
+                try:
+                    file_name, _ = generate_gdpr_report(model, output=pdf_file)
+                finally:
+                    self._slots.release()
+            except Exception as exc:
+                logger.exception("Échec du rendu PDF")
+                metrics.error("pdf")
+                self._notify(on_error, exc)
+                return
+            pdf_file.seek(0)
+            self._notify(on_done, file_name, pdf_file)
+
+    @staticmethod
+    def _notify(callback, *args):
+        try:
+            callback(*args)
+        except Exception:
+            logger.exception("Échec de l'envoi du rapport PDF")
+
+pdf_renderer = PdfRenderPool()
+
+# ---------------------------------------------------------------------------
+# ------------- PDF déjà rendus (stockage adressé par contenu) ---------------
+# ---------------------------------------------------------------------------
+
+# À incrémenter à chaque changement de mise en page ou de textes du rapport :
+# les PDF rendus avec l'ancienne version ne sont plus réutilisés
+REPORT_TEMPLATE_VERSION = 2
+
+# Champs d'un résultat qui ne changent pas le PDF d'un modèle réutilisable
+_REPORT_VOLATILE_FIELDS = ("cached", "scanned_at")
+
+def report_key(model, results):
+    """
+    Empreinte du PDF d'un modèle réutilisable (build_report_model(...,
+    reusable=True)) : version des gabarits, langue, date du jour affichée
+    et constats de chaque domaine (dans l'ordre). Ni la date d'analyse, ni
+    le drapeau « en cache », ni l'expiration des cookies (absente du PDF)
+    n'y entrent : le même constat, analysé à nouveau ou servi depuis le
+    cache, donne le même PDF dans la journée.
+    """
+    digest = hashlib.sha256(
+        json.dumps([REPORT_TEMPLATE_VERSION, model["lang"], model["date_label"]]).encode())
+    for domain, data in results.items():
+        state = {k: v for k, v in data.items() if k not in _REPORT_VOLATILE_FIELDS}
+        if "cookies" in state:
+            state["cookies"] = [cookie_identity(c) for c in state["cookies"]]
+        digest.update(json.dumps([domain, state], sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+class ReportArtifactStore:
+    """
+    PDF déjà rendus, indexés par report_key() : un rapport identique (mêmes
+    constats, même langue, même jour, mêmes gabarits) n'est ni re-rendu, ni renvoyé
+    à Telegram, qui ne reçoit plus que le file_id du premier envoi.
+    Fichiers <empreinte>.pdf dans `directory`, index SQLite à côté
+    (nom affiché, taille, dates, file_id). Au-delà de `max_bytes`, les
+    fichiers les moins récemment envoyés sont supprimés (leur file_id reste
+    utilisable) ; une entrée non envoyée depuis `max_age` est oubliée.
+    """
+
+    def __init__(self, directory=REPORT_STORE_DIR, max_bytes=REPORT_STORE_MAX_BYTES, max_age=REPORT_STORE_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connect(self):
+        if self._db is None:
+            os.makedirs(self.directory, exist_ok=True)
+            # Écritures interrompues (crash pendant un put)
+            for name in os.listdir(self.directory):
+                if name.endswith(".pdf.tmp"):
+                    os.remove(os.path.join(self.directory, name))
+            db = sqlite3.connect(os.path.join(self.directory, "index.sqlite3"), check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                " key TEXT PRIMARY KEY,"
+                " file_name TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " stored INTEGER NOT NULL,"
+                " file_id TEXT,"
+                " created_at REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS artifacts_last_used ON artifacts (last_used)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pdf")
+
+    def get(self, key):
+        """
+        PDF connu pour cette empreinte : {"file_name", "path", "file_id"}
+        (path ou file_id à None s'ils manquent), sinon None.
+        """
+        with self._lock:
+            db = self._connect()
+            row = db.execute("SELECT file_name, stored, file_id FROM artifacts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            file_name, stored, file_id = row
+            path = self._path(key) if stored else None
+            if path is not None and not os.path.exists(path):
+                # Fichier supprimé à la main : seul le file_id reste utile
+                path = None
+                db.execute("UPDATE artifacts SET stored = 0 WHERE key = ?", (key,))
+            if path is None and file_id is None:
+                db.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+                db.commit()
+                return None
+            db.execute("UPDATE artifacts SET last_used = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+        return {"file_name": file_name, "path": path, "file_id": file_id}
+
+    def put(self, key, file_name, pdf_file):
+        """Copie le PDF (fichier ouvert, lu depuis sa position) dans le stockage, puis applique le quota."""
+        path = self._path(key)
+        with self._lock:
+            db = self._connect()
+            with open(path + ".tmp", "wb") as f:
+                shutil.copyfileobj(pdf_file, f)
+                size = f.tell()
+            os.replace(path + ".tmp", path)
+            now = time.time()
+            db.execute(
+                "INSERT INTO artifacts (key, file_name, size, stored, file_id, created_at, last_used)"
+                " VALUES (?, ?, ?, 1, NULL, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET file_name = excluded.file_name, size = excluded.size,"
+                " stored = 1, last_used = excluded.last_used",
+                (key, file_name, size, now, now),
+            )
+            self._evict(db, now)
+            db.commit()
+        return path
+
+    def set_file_id(self, key, file_id):
+        """file_id Telegram du PDF, renvoyé par le premier envoi."""
+        with self._lock:
+            db = self._connect()
+            db.execute("UPDATE artifacts SET file_id = ? WHERE key = ?", (file_id, key))
+            db.commit()
+
+    def forget_file_id(self, key):
+        """file_id refusé par Telegram : le prochain envoi repartira du fichier (ou d'un rendu)."""
+        with self._lock:
+            db = self._connect()
+            db.execute("UPDATE artifacts SET file_id = NULL WHERE key = ?", (key,))
+            db.execute("DELETE FROM artifacts WHERE key = ? AND stored = 0", (key,))
+            db.commit()
+
+    def _remove_file(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, db, now):
+        for (key,) in db.execute("SELECT key FROM artifacts WHERE last_used < ? AND stored = 1",
+                                 (now - self.max_age,)).fetchall():
+            self._remove_file(key)
+        db.execute("DELETE FROM artifacts WHERE last_used < ?", (now - self.max_age,))
+
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts WHERE stored = 1").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = db.execute("SELECT key, size FROM artifacts WHERE stored = 1 ORDER BY last_used").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._remove_file(key)
+            db.execute("UPDATE artifacts SET stored = 0 WHERE key = ?", (key,))
+            total -= size
+        db.execute("DELETE FROM artifacts WHERE stored = 0 AND file_id IS NULL")
+
+    def stats(self):
+        """Taille du stockage et origine des PDF envoyés (file_id, disque, nouveau rendu)."""
+        with self._lock:
+            files, size, file_ids = self._connect().execute(
+                "SELECT COALESCE(SUM(stored), 0), COALESCE(SUM(size * stored), 0), COUNT(file_id)"
+                " FROM artifacts"
+            ).fetchone()
+        return {
+            "reports_stored": files,
+            "reports_bytes": size,
+            "reports_file_ids": file_ids,
+            "reports_sent_file_id": scan_stats.get("reports.file_id"),
+            "reports_sent_stored": scan_stats.get("reports.stored"),
+            "reports_rendered": scan_stats.get("reports.rendered"),
+        }
+
+report_store = ReportArtifactStore(setting("REPORT_STORE_DIR")) if setting("REPORT_STORE_DIR") else None
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+Score RGPD/ePrivacy : règles déclaratives et versionnées (pondérations des
+constats, seuils des niveaux de risque), copie de l'historique des analyses
+en colonnes typées, et re-calcul vectorisé des scores et niveaux de risque
+de tout l'historique quand les règles changent, sans nouvelle analyse.
+
+numpy est utilisé s'il est installé ; sinon les colonnes sont des
+array.array de la bibliothèque standard (même format sur disque).
+"""
+
+import array
+import json
+import logging
+import os
+import threading
+from collections import Counter
+
+from rgpd.config import setting
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# ------------------------ Règles de score versionnées -----------------------
+# ---------------------------------------------------------------------------
+
+# Constats que les règles peuvent pondérer : un bit chacun dans les colonnes
+SCORE_FEATURES = (
+    "https_status", "privacy_policy", "cookie_banner", "legal_mentions", "cookies",
+    "google_analytics", "facebook_pixel", "contact_form", "third_party_trackers",
+)
+# Analyse en erreur (site inaccessible...) : pas de score
+ERROR_BIT = 1 << len(SCORE_FEATURES)
+NO_SCORE = -1
+NO_RISK = 255
+
+# Niveaux de risque possibles (clés de messages[...]["risk_level"])
+RISK_LEVELS = ("ok", "medium", "high", "critical")
+
+DEFAULT_SCORING_RULES = {
+    "version": 1,
+    # Points quand le constat est présent (négatif : pénalité) ; constat absent = 0
+    "weights": {
+        "https_status": 25, "privacy_policy": 25, "cookie_banner": 25, "legal_mentions": 25,
+        "cookies": -10,
+    },
+    "min_score": 0,
+    "max_score": 100,
+    # Score minimal de chaque niveau, du meilleur au pire (le dernier prend le reste)
+    "risk_levels": [["ok", 80], ["medium", 60], ["high", 40], ["critical", 0]],
+}
+
+_FEATURE_BITS = {name: 1 << bit for bit, name in enumerate(SCORE_FEATURES)}
+_FEATURE_BITS["error"] = ERROR_BIT
+
+def feature_mask(result):
+    """Bits des constats présents dans un résultat d'analyse (ERROR_BIT seul en cas d'erreur)."""
+    if "error" in result:
+        return ERROR_BIT
+    mask = 0
+    for name, bit in _FEATURE_BITS.items():
+        if result.get(name):
+            mask |= bit
+    return mask
+
+class ScoringRules:
+    """
+    Règles de score, au format de DEFAULT_SCORING_RULES (dict ou fichier
+    JSON). ValueError si elles sont invalides. Le score de chaque
+    combinaison de constats est calculé une fois pour toutes : scorer un
+    résultat, ou tout un historique, revient à lire une table.
+    """
+
+    def __init__(self, rules):
+        unknown = set(rules["weights"]) - set(SCORE_FEATURES)
+        if unknown:
+            raise ValueError("Constats inconnus dans les règles : %s" % ", ".join(sorted(unknown)))
+        levels = [(str(key), float(threshold)) for key, threshold in rules["risk_levels"]]
+        if not levels or any(key not in RISK_LEVELS for key, _ in levels):
+            raise ValueError("Niveaux de risque attendus parmi : %s" % ", ".join(RISK_LEVELS))
+        if any(a[1] < b[1] for a, b in zip(levels, levels[1:])):
+            raise ValueError("Les seuils des niveaux de risque doivent être décroissants")
+
+        self.version = int(rules["version"])
+        self.weights = {name: rules["weights"].get(name, 0) for name in SCORE_FEATURES}
+        self.min_score = rules.get("min_score", 0)
+        self.max_score = rules.get("max_score", 100)
+        self.risk_levels = levels
+        # Indexées par feature_mask() (bit d'erreur compris)
+        self.score_table = [self._score_mask(mask) for mask in range(ERROR_BIT * 2)]
+        self.risk_table = [self.risk_index(score) for score in self.score_table]
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _score_mask(self, mask):
+        if mask & ERROR_BIT:
+            return NO_SCORE
+        score = sum(w for name, w in self.weights.items() if mask & _FEATURE_BITS[name])
+        return int(min(max(score, self.min_score), self.max_score))
+
+    def risk_index(self, score):
+        """Rang du niveau de risque dans self.risk_levels (NO_RISK sans score)."""
+        if score is None or score == NO_SCORE:
+            return NO_RISK
+        for index, (_, threshold) in enumerate(self.risk_levels):
+            if score >= threshold:
+                return index
+        return len(self.risk_levels) - 1
+
+    def risk_level(self, score):
+        """Clé du niveau de risque ("ok", "medium", ...) d'un score."""
+        return self.risk_levels[self.risk_index(score)][0]
+
+    def risk_key(self, index):
+        """Clé du niveau de risque de rang `index` ("error" pour NO_RISK)."""
+        return "error" if index == NO_RISK else self.risk_levels[index][0]
+
+    def score(self, result):
+        return self.score_table[feature_mask(result)]
+
+_rules = None
+_rules_lock = threading.Lock()
+
+def get_scoring_rules():
+    """Règles actives : fichier SCORING_RULES_PATH s'il est défini, sinon les règles par défaut."""
+    global _rules
+    with _rules_lock:
+        if _rules is None:
+            path = setting("SCORING_RULES_PATH")
+            _rules = ScoringRules.load(path) if path else ScoringRules(DEFAULT_SCORING_RULES)
+            logger.info("Règles de score version %d", _rules.version)
+        return _rules
+
+def score_result(result):
+    """
+    Résultat réutilisé (cache, revalidation 304, historique) à jour des
+    règles actives : tel quel si sa version des règles est la bonne (ou en
+    cas d'erreur), sinon copie avec score et version recalculés.
+    """
+    rules = get_scoring_rules()
+    if "error" in result or result.get("scoring_version") == rules.version:
+        return result
+    return dict(result, gdpr_score=rules.score(result), scoring_version=rules.version)
+
+# ---------------------------------------------------------------------------
+# ------------- Historique en colonnes et re-calcul vectorisé ----------------
+# ---------------------------------------------------------------------------
+
+def _numpy():
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+# Colonnes : une valeur par analyse (code de type array.array / numpy)
+RESULT_COLUMNS = {
+    "domain": "I",            # indice du domaine dans domains.txt
+    "scanned_at": "d",
+    "features": "H",          # bits de feature_mask()
+    "score": "h",             # score enregistré lors de l'analyse (NO_SCORE : erreur)
+    "scoring_version": "H",   # version des règles de ce score (0 : inconnue)
+}
+# Mêmes colonnes, une valeur par domaine : sa dernière analyse
+LATEST_COLUMNS = ("features", "score", "scoring_version")
+
+def _read_column(path, typecode, count, np):
+    if not count:
+        return np.zeros(0, typecode) if np is not None else array.array(typecode)
+    if np is not None:
+        return np.fromfile(path, dtype=np.dtype(typecode), count=count)
+    column = array.array(typecode)
+    with open(path, "rb") as f:
+        column.frombytes(f.read(count * column.itemsize))
+    return column
+
+class ResultColumns:
+    """
+    Copie de l'historique des analyses (ScanHistory) en colonnes typées,
+    une ligne par analyse : domaine, date, constats (bits), score enregistré
+    et version des règles qui l'ont produit, soit 17 octets par analyse au
+    lieu d'un dict JSON. Les colonnes latest_* donnent la dernière analyse
+    de chaque domaine.
+
+    Sur disque (`directory`) : un fichier binaire brut par colonne, complété
+    en fin de fichier à chaque sync(), la liste des domaines et meta.json
+    (écrit en dernier : une synchronisation interrompue est ignorée).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._np = _numpy()
+        self.rows = 0
+        self.last_scan_id = 0
+        self.domains = []
+        self.columns = {}
+        self.latest = {}
+        self._load()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        meta = {}
+        if os.path.exists(self._path("meta.json")):
+            with open(self._path("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        self.rows = meta.get("rows", 0)
+        self.last_scan_id = meta.get("last_scan_id", 0)
+        count = meta.get("domains", 0)
+        self.domains = []
+        if count:
+            with open(self._path("domains.txt"), encoding="utf-8") as f:
+                self.domains = [line.rstrip("\n") for _, line in zip(range(count), f)]
+        self.columns = {
+            name: _read_column(self._path(name + ".bin"), typecode, self.rows, self._np)
+            for name, typecode in RESULT_COLUMNS.items()
+        }
+        self.latest = {
+            name: _read_column(self._path("latest_%s.bin" % name), RESULT_COLUMNS[name], count, self._np)
+            for name in LATEST_COLUMNS
+        }
+
+    def __len__(self):
+        return self.rows
+
+    def sync(self, history, batch_size=100000):
+        """
+        Ajoute les analyses de l'historique enregistrées depuis la dernière
+        synchronisation ; renvoie le nombre de lignes ajoutées. Les constats
+        de chaque analyse sont reconstitués à partir des changements
+        enregistrés (voir ScanHistory.record).
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        index = {url: i for i, url in enumerate(self.domains)}
+        latest = {name: array.array(RESULT_COLUMNS[name], self.latest[name]) for name in LATEST_COLUMNS}
+        new_domains = []
+        added = 0
+        last_scan_id = self.last_scan_id
+        files = {name: open(self._path(name + ".bin"), "ab") for name in RESULT_COLUMNS}
+        try:
+            # Fichiers remis à la longueur de meta.json (synchronisation interrompue)
+            for name, f in files.items():
+                f.truncate(self.rows * array.array(RESULT_COLUMNS[name]).itemsize)
+            buffers = {name: array.array(typecode) for name, typecode in RESULT_COLUMNS.items()}
+            for scan_id, url, scanned_at, score, changes in history.iter_scans(self.last_scan_id):
+                i = index.get(url)
+                if i is None:
+                    i = index[url] = len(index)
+                    new_domains.append(url)
+                    for name in LATEST_COLUMNS:
+                        latest[name].append(0)
+                changes = json.loads(changes)
+                mask = latest["features"][i]
+                for name in changes.pop("_removed", ()):
+                    mask &= ~_FEATURE_BITS.get(name, 0)
+                for name, value in changes.items():
+                    bit = _FEATURE_BITS.get(name)
+                    if bit is not None:
+                        mask = mask | bit if value else mask & ~bit
+                version = changes.get("scoring_version", latest["scoring_version"][i])
+                score = NO_SCORE if score is None else score
+                latest["features"][i] = mask
+                latest["score"][i] = score
+                latest["scoring_version"][i] = version
+                for name, value in (("domain", i), ("scanned_at", scanned_at), ("features", mask),
+                                    ("score", score), ("scoring_version", version)):
+                    buffers[name].append(value)
+                added += 1
+                last_scan_id = scan_id
+                if len(buffers["domain"]) >= batch_size:
+                    for name, f in files.items():
+                        buffers[name].tofile(f)
+                        del buffers[name][:]
+            for name, f in files.items():
+                buffers[name].tofile(f)
+        finally:
+            for f in files.values():
+                f.close()
+
+        with open(self._path("domains.txt"), "a", encoding="utf-8") as f:
+            f.truncate(sum(len(url.encode("utf-8")) + 1 for url in self.domains))
+            f.writelines(url + "\n" for url in new_domains)
+        for name in LATEST_COLUMNS:
+            with open(self._path("latest_%s.bin.tmp" % name), "wb") as f:
+                latest[name].tofile(f)
+            os.replace(self._path("latest_%s.bin.tmp" % name), self._path("latest_%s.bin" % name))
+        meta = {"rows": self.rows + added, "domains": len(index), "last_scan_id": last_scan_id,
+                "columns": RESULT_COLUMNS, "features": SCORE_FEATURES}
+        with open(self._path("meta.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(self._path("meta.json.tmp"), self._path("meta.json"))
+        self._load()
+        return added
+
+    def rescore(self, rules, latest=False):
+        """
+        (scores, rangs des niveaux de risque dans rules.risk_levels) de
+        chaque analyse, ou de la dernière analyse de chaque domaine, selon
+        `rules` : une lecture de table par ligne, vectorisée avec numpy.
+        """
+        features = self.latest["features"] if latest else self.columns["features"]
+        if self._np is not None:
+            np = self._np
+            return (np.asarray(rules.score_table, dtype=np.int16)[features],
+                    np.asarray(rules.risk_table, dtype=np.uint8)[features])
+        return (array.array("h", map(rules.score_table.__getitem__, features)),
+                array.array("B", map(rules.risk_table.__getitem__, features)))
+
+    def compare(self, current, candidate):
+        """
+        Effet du passage des règles `current` aux règles `candidate` :
+        nombre d'analyses dont le score change, et transitions de niveau de
+        risque de la dernière analyse de chaque domaine {(avant, après): n}.
+        """
+        scores_before, _ = self.rescore(current)
+        scores_after, _ = self.rescore(candidate)
+        _, risks_before = self.rescore(current, latest=True)
+        _, risks_after = self.rescore(candidate, latest=True)
+        if self._np is not None:
+            np = self._np
+            changed = int(np.count_nonzero(scores_before != scores_after))
+            pairs, counts = np.unique(risks_before.astype(np.uint16) * 256 + risks_after, return_counts=True)
+            transitions = {(int(p) >> 8, int(p) & 255): int(n) for p, n in zip(pairs, counts)}
+        else:
+            changed = sum(map(int.__ne__, scores_before, scores_after))
+            transitions = Counter(zip(risks_before, risks_after))
+
+        return {
+            "rows": self.rows,
+            "domains": len(self.domains),
+            "scores_changed": changed,
+            "risk_transitions": {
+                (current.risk_key(a), candidate.risk_key(b)): n for (a, b), n in transitions.items()
+            },
+        }
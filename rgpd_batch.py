@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Mode batch (sans Telegram) de l'analyse RGPD/ePrivacy :
+ - lit une liste de domaines depuis un fichier ou l'entrée standard
+   (un ou plusieurs domaines par ligne, séparés par des virgules ; # = commentaire)
+ - passe chaque domaine dans les mêmes vérifications que le bot, en parallèle
+ - écrit une ligne JSONL ou CSV par domaine dès que son analyse est terminée
+ - --crawl visite aussi les pages de politique / mentions et quelques
+   sous-pages de chaque site (résultat détaillé dans la clé "crawl" du JSONL)
+ - --history enregistre chaque analyse dans un historique SQLite (suivi
+   dans le temps ; une page inchangée depuis l'analyse précédente n'est
+   pas ré-analysée)
+ - --processes analyse les pages dans un pool de processus (plusieurs cœurs)
+ - --report écrit, une fois l'analyse terminée, le rapport PDF de tout le
+   fichier de sortie JSONL (synthèse, sommaire, une section par domaine),
+   relu au fil de l'eau : la mémoire ne dépend pas du nombre de domaines
+ - --metrics-port expose les durées par étape, erreurs et tailles de page
+   au format Prometheus pendant le traitement
+ - --resume reprend après un crash : les domaines déjà présents dans le
+   fichier de sortie sont ignorés et les nouvelles lignes y sont ajoutées
+
+Exemples :
+    python rgpd_batch.py domaines.txt -o resultats.jsonl --workers 32
+    cat domaines.txt | python rgpd_batch.py - -o resultats.csv --format csv --resume
+    python rgpd_batch.py portefeuille.txt -o resultats.jsonl --resume --report audit.pdf --lang fr
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from rgpd import analysis, config, engine, report
+from rgpd.metrics import metrics
+
+CSV_COLUMNS = [
+    "domain", "url", "error", "gdpr_score", "https_status", "privacy_policy",
+    "cookie_banner", "legal_mentions", "cookies_count", "google_analytics",
+    "facebook_pixel", "contact_form", "third_party_trackers", "scanned_at",
+]
+
+
+def read_domains(source):
+    """Domaines d'un fichier (ou de stdin si source == '-'), lus au fil de l'eau."""
+    stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        for line in stream:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            yield from analysis.parse_domains(line)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def completed_domains(path, fmt):
+    """
+    Domaines déjà écrits dans un fichier de sortie existant. Une dernière
+    ligne incomplète (crash pendant l'écriture) est supprimée du fichier.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+
+    lines = data.decode("utf-8").splitlines()
+    if fmt == "csv":
+        for row in csv.DictReader(lines):
+            done.add(row["domain"])
+    else:
+        for line in lines:
+            try:
+                done.add(json.loads(line)["domain"])
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+class JsonlResults:
+    """
+    Résultats d'un fichier de sortie JSONL vus comme un dict {domaine:
+    résultat} en lecture seule (items() et len()), relus depuis le disque à
+    chaque parcours : le rapport d'un portefeuille n'est jamais chargé en
+    entier. Un domaine présent plusieurs fois n'est compté qu'une fois.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._count = None
+
+    def items(self):
+        seen = set()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                    domain = result.pop("domain")
+                except (ValueError, KeyError):
+                    continue
+                if domain not in seen:
+                    seen.add(domain)
+                    yield domain, result
+
+    def __len__(self):
+        if self._count is None:
+            self._count = sum(1 for _ in self.items())
+        return self._count
+
+def write_report(path, results_path, lang):
+    """Rapport PDF de tous les domaines du fichier JSONL `results_path`."""
+    results = JsonlResults(results_path)
+    model = report.build_report_model((domain for domain, _ in results.items()), results, lang)
+    with open(path, "wb") as f:
+        report.generate_gdpr_report(model, output=f)
+    return len(results)
+
+def to_csv_row(domain, result):
+    row = {"domain": domain, "url": analysis.format_domain(domain)}
+    if "error" in result:
+        row["error"] = result["error"]
+        return row
+    row.update({
+        "gdpr_score": result["gdpr_score"],
+        "https_status": result["https_status"],
+        "privacy_policy": result["privacy_policy"] or "",
+        "cookie_banner": result["cookie_banner"],
+        "legal_mentions": result["legal_mentions"] or "",
+        "cookies_count": len(result["cookies"]),
+        "google_analytics": result["google_analytics"],
+        "facebook_pixel": result["facebook_pixel"],
+        "contact_form": result["contact_form"],
+        "third_party_trackers": ";".join(result["third_party_trackers"]),
+        "scanned_at": result["scanned_at"],
+    })
+    return row
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse RGPD/ePrivacy en batch (sans Telegram).")
+    parser.add_argument("source", help="fichier de domaines, ou '-' pour l'entrée standard")
+    parser.add_argument("-o", "--output", default="-", help="fichier de sortie (défaut : stdout)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    parser.add_argument("--workers", type=int, default=config.setting("SCAN_MAX_WORKERS"),
+                        help="domaines analysés en parallèle")
+    parser.add_argument("--per-host", type=int, default=config.setting("SCAN_MAX_PER_HOST"),
+                        help="requêtes simultanées max vers un même hôte")
+    parser.add_argument("--lang", choices=("fr", "en"), default="en",
+                        help="langue des messages d'erreur et du rapport")
+    parser.add_argument("--crawl", action="store_true",
+                        help="crawl superficiel (politique, mentions, quelques sous-pages)")
+    parser.add_argument("--history", metavar="SQLITE",
+                        help="base d'historique des analyses (ex: static/scan_history.sqlite3)")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="processus d'analyse des pages (0 : dans les threads de scan)")
+    parser.add_argument("--report", metavar="PDF",
+                        help="rapport PDF de tous les domaines du fichier de sortie (JSONL)")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="exposer les métriques Prometheus sur http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--resume", action="store_true",
+                        help="ignorer les domaines déjà présents dans le fichier de sortie")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.resume and args.output == "-":
+        sys.exit("--resume nécessite un fichier de sortie (-o)")
+    if args.report and (args.output == "-" or args.format != "jsonl"):
+        sys.exit("--report nécessite un fichier de sortie JSONL (-o)")
+
+    skip = completed_domains(args.output, args.format) if args.resume else set()
+    if args.output == "-":
+        out = sys.stdout
+        write_header = args.format == "csv"
+    else:
+        empty = not os.path.exists(args.output) or os.path.getsize(args.output) == 0
+        write_header = args.format == "csv" and (not args.resume or empty)
+        out = open(args.output, "a" if args.resume else "w", encoding="utf-8", newline="")
+
+    writer = None
+    if args.format == "csv":
+        writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS)
+        if write_header:
+            writer.writeheader()
+
+    def pending_domains():
+        for domain in read_domains(args.source):
+            if domain not in skip:
+                skip.add(domain)  # évite aussi les doublons dans l'entrée
+                yield domain
+
+    analysis.warm_up_analysis()
+    if args.metrics_port:
+        metrics.serve(port=args.metrics_port)
+    pool = engine.AnalysisPool(args.processes) if args.processes else None
+    if pool is not None:
+        pool.warm_up()
+    crawler = engine.ShallowCrawler(analysis_pool=pool) if args.crawl else None
+    history = engine.ScanHistory(args.history) if args.history else None
+    scanner = engine.ScanEngine(max_workers=args.workers, max_per_host=args.per_host,
+                                crawler=crawler, history=history, analysis_pool=pool)
+    start = time.monotonic()
+    count = errors = 0
+    try:
+        for domain, result in scanner.scan_iter(pending_domains(), args.lang):
+            if writer is not None:
+                writer.writerow(to_csv_row(domain, result))
+            else:
+                out.write(json.dumps({"domain": domain, **result}, ensure_ascii=False) + "\n")
+            # Une ligne complète sur disque par domaine terminé : point de reprise
+            out.flush()
+            count += 1
+            errors += "error" in result
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if pool is not None:
+            pool.shutdown()
+
+    elapsed = time.monotonic() - start
+    print("%d domaines analysés (%d erreurs) en %.1f s" % (count, errors, elapsed), file=sys.stderr)
+
+    if args.report:
+        start = time.monotonic()
+        total = write_report(args.report, args.output, args.lang)
+        print("Rapport PDF de %d domaines écrit dans %s en %.1f s"
+              % (total, args.report, time.monotonic() - start), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
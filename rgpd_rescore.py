@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Effet d'un changement des règles de score sur tout l'historique, sans
+nouvelle analyse :
+ - copie les analyses nouvelles de l'historique SQLite (HISTORY_DB) dans
+   les colonnes de RESULT_COLUMNS_DIR (une fois copiées, elles ne sont plus
+   relues)
+ - recalcule le score de chaque analyse et le niveau de risque de la
+   dernière analyse de chaque domaine avec les règles actives
+   (SCORING_RULES_PATH) et avec les règles candidates (--rules)
+ - affiche le nombre de scores modifiés et les changements de niveau de
+   risque ; --changed-csv écrit les domaines dont le niveau change
+
+Exemples :
+    python rgpd_rescore.py --rules regles_v2.json
+    python rgpd_rescore.py --rules regles_v2.json --history static/scan_history.sqlite3 --changed-csv changements.csv
+"""
+
+import argparse
+import csv
+import sys
+import time
+
+from rgpd import config, engine, scoring
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Re-calcul des scores de l'historique avec d'autres règles.")
+    parser.add_argument("--rules", metavar="JSON",
+                        help="règles candidates (défaut : DEFAULT_SCORING_RULES de rgpd/scoring.py)")
+    parser.add_argument("--history", metavar="SQLITE", default=config.setting("HISTORY_DB"),
+                        help="base d'historique des analyses")
+    parser.add_argument("--columns", metavar="DIR", default=config.setting("RESULT_COLUMNS_DIR"),
+                        help="répertoire des colonnes")
+    parser.add_argument("--no-sync", action="store_true",
+                        help="ne pas copier les nouvelles analyses de l'historique")
+    parser.add_argument("--changed-csv", metavar="CSV",
+                        help="domaines dont le niveau de risque change (dernière analyse)")
+    return parser.parse_args(argv)
+
+
+def write_changed(path, columns, current, candidate):
+    """Domaines dont le niveau de risque change, avec anciens et nouveaux score et niveau."""
+    scores_before, risks_before = columns.rescore(current, latest=True)
+    scores_after, risks_after = columns.rescore(candidate, latest=True)
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["domain", "score_before", "score_after", "risk_before", "risk_after"])
+        for i, domain in enumerate(columns.domains):
+            if current.risk_key(risks_before[i]) != candidate.risk_key(risks_after[i]):
+                writer.writerow([domain, int(scores_before[i]), int(scores_after[i]),
+                                 current.risk_key(risks_before[i]), candidate.risk_key(risks_after[i])])
+                count += 1
+    return count
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        current = scoring.get_scoring_rules()
+        candidate = (scoring.ScoringRules.load(args.rules) if args.rules
+                     else scoring.ScoringRules(scoring.DEFAULT_SCORING_RULES))
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        sys.exit("Règles de score invalides : %s" % exc)
+
+    start = time.monotonic()
+    columns = scoring.ResultColumns(args.columns)
+    if not args.no_sync and args.history:
+        added = columns.sync(engine.ScanHistory(args.history))
+        print("%d analyses copiées depuis %s en %.1f s"
+              % (added, args.history, time.monotonic() - start), file=sys.stderr)
+
+    start = time.monotonic()
+    summary = columns.compare(current, candidate)
+    elapsed = time.monotonic() - start
+    print("Règles v%d -> v%d : %d analyses de %d domaines recalculées en %.2f s"
+          % (current.version, candidate.version, summary["rows"], summary["domains"], elapsed))
+    print("Scores modifiés : %d" % summary["scores_changed"])
+    print("Niveau de risque de la dernière analyse (avant -> après) :")
+    for (before, after), count in sorted(summary["risk_transitions"].items()):
+        print("  %-8s -> %-8s %8d%s" % (before, after, count, "" if before == after else "  *"))
+
+    if args.changed_csv:
+        count = write_changed(args.changed_csv, columns, current, candidate)
+        print("%d domaines écrits dans %s" % (count, args.changed_csv), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()